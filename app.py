@@ -3,12 +3,23 @@ Flask API for NASA EarthData Probability Calculations
 Endpoint: POST /calculate_probability
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, stream_with_context
 from flask_cors import CORS
+import hashlib
+import json
 import logging
+import os
+from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
-from calculate_ocean_probabilities import calculate_probabilities, DATASET_CONFIG
+from calculate_ocean_probabilities import (
+    calculate_probabilities_batch, calculate_probabilities_detailed, calculate_probability_calendar,
+    calculate_probability_grid, calculate_voyage_probabilities, effective_window_days,
+    iter_probabilities_detailed, snap_to_grid,
+    CALENDAR_DAYS, DATASET_CONFIG, MAX_WINDOW_DAYS
+)
+from jobs import JOB_QUEUE, ensure_embedded_workers
+from memory_cache import LRUCache
 
 # Flask uygulamasını oluştur
 app = Flask(__name__)
@@ -23,6 +34,300 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Yanıt önbelleği: sonuçlar 1991-2020 sabit referans döneminin saf fonksiyonudur.
+# Hesaplama veya yanıt formatı değiştiğinde RESPONSE_CACHE_VERSION artırılır (eski ETag'ler geçersizleşir).
+RESPONSE_CACHE_VERSION = 3
+RESPONSE_CACHE_MAX_AGE = int(os.environ.get('RESPONSE_CACHE_MAX_AGE', 86400))
+RESPONSE_CACHE = LRUCache(
+    max_size=int(os.environ.get('RESPONSE_CACHE_SIZE', 1024)),
+    ttl=RESPONSE_CACHE_MAX_AGE
+)
+
+# Toplu istekte kabul edilen en fazla öğe sayısı
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 1000))
+
+# Akış yanıtı biçimleri ve MIME tipleri
+STREAM_FORMATS = {'ndjson': 'application/x-ndjson', 'sse': 'text/event-stream'}
+
+# /calculate_probability süre bütçesi (saniye, 0 ise sınırsız). gunicorn --timeout
+# değerinin altında tutulur: bütçe dolunca toplanan yıllarla kısmi sonuç döner.
+REQUEST_DEADLINE_SECONDS = float(os.environ.get('REQUEST_DEADLINE_SECONDS', 90))
+
+
+def canonical_request_hash(lat: float, lon: float, month: int, day: int, events: List[str],
+                           thresholds: Optional[Dict], use_synthetic, use_climatology,
+                           window_days: int = 0) -> str:
+    """
+    Olasılık isteğinin kanonik hash'i (ETag ve yanıt önbelleği anahtarı).
+    
+    Aynı yanıtı üreten istekler aynı hash'i alır: olay sırası önemsizdir
+    (yanıt anahtarları sıralıdır), sayılar float olarak normalize edilir.
+    """
+    canonical = {
+        'version': RESPONSE_CACHE_VERSION,
+        'lat': lat,
+        'lon': lon,
+        'month': month,
+        'day': day,
+        'events': sorted(events),
+        'thresholds': None if thresholds is None else {
+            event: [float(v) for v in value] if isinstance(value, list) else float(value)
+            for event, value in thresholds.items()
+        },
+        'use_synthetic': use_synthetic,
+        'use_climatology': use_climatology,
+        'window_days': window_days
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def parse_probability_request(data: Dict) -> Dict:
+    """
+    Olasılık isteğinin parametrelerini doğrular ve tiplerini dönüştürür.
+    
+    Tek istek ve toplu istek endpoint'leri ortak kullanır.
+    
+    Args:
+        data: İstek gövdesi (veya toplu istekteki tek öğe)
+        
+    Returns:
+        lat, lon, month, day, events, thresholds, use_synthetic, use_climatology,
+        window_days anahtarlı sözlük
+        
+    Raises:
+        ValueError: İstemciye döndürülecek hata mesajıyla
+    """
+    if not isinstance(data, dict):
+        raise ValueError('request must be a JSON object')
+    
+    # Gerekli parametreleri kontrol et
+    required_fields = ['lat', 'lon', 'month', 'day', 'events']
+    missing_fields = [field for field in required_fields if field not in data]
+    if missing_fields:
+        raise ValueError(f'Missing required fields: {", ".join(missing_fields)}')
+    
+    events = data.get('events')
+    thresholds = data.get('thresholds', None)
+    
+    # Parametre tipi kontrolü
+    try:
+        lat = float(data.get('lat'))
+        lon = float(data.get('lon'))
+        month = int(data.get('month'))
+        day = int(data.get('day'))
+    except (ValueError, TypeError):
+        raise ValueError('lat and lon must be numbers, month and day must be integers')
+    
+    # events listesi kontrolü
+    if not isinstance(events, list) or len(events) == 0:
+        raise ValueError('events must be a non-empty list')
+    
+    # Geçersiz event kontrolü
+    invalid_events = [e for e in events if e not in DATASET_CONFIG]
+    if invalid_events:
+        raise ValueError(
+            f'Invalid events: {", ".join(map(str, invalid_events))}. Valid events: {", ".join(DATASET_CONFIG.keys())}'
+        )
+    
+    # thresholds dict kontrolü (opsiyonel)
+    if thresholds is not None and not isinstance(thresholds, dict):
+        raise ValueError('thresholds must be a dictionary')
+    
+    # threshold değerleri: sayı veya sayı listesi (eşik taraması için)
+    if thresholds is not None:
+        for event_name, value in thresholds.items():
+            values = value if isinstance(value, list) else [value]
+            if not values or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                raise ValueError(f'threshold for {event_name} must be a number or a non-empty list of numbers')
+    
+    # Parametre aralık kontrolü
+    if not (-90 <= lat <= 90):
+        raise ValueError(f'lat must be between -90 and 90, got {lat}')
+    if not (-180 <= lon <= 180):
+        raise ValueError(f'lon must be between -180 and 180, got {lon}')
+    if not (1 <= month <= 12):
+        raise ValueError(f'month must be between 1 and 12, got {month}')
+    if not (1 <= day <= 31):
+        raise ValueError(f'day must be between 1 and 31, got {day}')
+    
+    # Gün penceresi (opsiyonel): her yıldan ±N gün havuzlanır
+    window_days = data.get('window_days', 0)
+    if isinstance(window_days, bool) or not isinstance(window_days, int) or not (0 <= window_days <= MAX_WINDOW_DAYS):
+        raise ValueError(f'window_days must be an integer between 0 and {MAX_WINDOW_DAYS}, got {window_days}')
+    
+    return {
+        'lat': lat,
+        'lon': lon,
+        'month': month,
+        'day': day,
+        'events': events,
+        'thresholds': thresholds,
+        'use_synthetic': data.get('use_synthetic', False),
+        'use_climatology': data.get('use_climatology', False),
+        'window_days': window_days
+    }
+
+
+def _query_request_data() -> Dict:
+    """GET sorgu parametrelerini POST gövdesiyle aynı yapıya çevirir."""
+    args = request.args
+    data = {field: args[field] for field in ('lat', 'lon', 'month', 'day') if field in args}
+    if 'events' in args:
+        data['events'] = [e.strip() for e in args['events'].split(',') if e.strip()]
+    if 'thresholds' in args:
+        try:
+            data['thresholds'] = json.loads(args['thresholds'])
+        except ValueError:
+            data['thresholds'] = args['thresholds']
+    if 'window_days' in args:
+        try:
+            data['window_days'] = int(args['window_days'])
+        except ValueError:
+            data['window_days'] = args['window_days']
+    for flag in ('use_synthetic', 'use_climatology'):
+        if flag in args:
+            data[flag] = args[flag].lower() in ('1', 'true', 'yes')
+    return data
+
+
+def _stream_format(data: Dict) -> Optional[str]:
+    """
+    İstenen akış biçimi: 'ndjson', 'sse' veya akışsız için None.
+    
+    ?stream=ndjson|sse, gövdede "stream" alanı veya Accept başlığı
+    (application/x-ndjson, text/event-stream) ile seçilir.
+    """
+    value = request.args.get('stream') or (data.get('stream') if isinstance(data, dict) else None)
+    if value:
+        value = str(value).lower()
+        if value not in STREAM_FORMATS:
+            raise ValueError(f'stream must be one of: {", ".join(STREAM_FORMATS)}')
+        return value
+    accept = request.accept_mimetypes
+    for stream_format, mimetype in STREAM_FORMATS.items():
+        if accept.best == mimetype:
+            return stream_format
+    return None
+
+
+def _stream_record(stream_format: str, kind: str, payload: Dict) -> str:
+    """Tek akış kaydını NDJSON satırı veya SSE olayı olarak biçimlendirir."""
+    body = json.dumps(dict(payload, type=kind), ensure_ascii=False)
+    if stream_format == 'sse':
+        return f"event: {kind}\ndata: {body}\n\n"
+    return body + '\n'
+
+
+def _probability_response(params: Dict, details: Dict[str, Dict]) -> Dict:
+    """calculate_probability yanıt gövdesini olay ayrıntılarından oluşturur."""
+    events = params['events']
+    probabilities = {event: detail['probability'] for event, detail in details.items()}
+    partial_events = [event for event, detail in details.items() if detail['partial']]
+    
+    # Her olay için verinin okunduğu grid hücresi merkezi
+    grid_cells = {}
+    for event in events:
+        cell = snap_to_grid(event, params['lat'], params['lon'])
+        grid_cells[event] = {'lat': cell.lat, 'lon': cell.lon}
+    
+    return {
+        'success': True,
+        'data': {
+            'location': {
+                'lat': params['lat'],
+                'lon': params['lon']
+            },
+            'date': {
+                'month': params['month'],
+                'day': params['day']
+            },
+            'probabilities': probabilities,
+            'partial': bool(partial_events),
+            'metadata': {
+                'samples': {event: detail['samples'] for event, detail in details.items()},
+                'partial_events': partial_events,
+                'total_events': len(events),
+                'custom_thresholds': params['thresholds'] is not None,
+                'synthetic_data': params['use_synthetic'],
+                'climatology_lookup': params['use_climatology'],
+                'window_days': params['window_days'],
+                # Günden uzun zaman adımlı veri setlerinde pencere uygulanmaz (0)
+                'applied_window_days': {event: effective_window_days(event, params['window_days'])
+                                        for event in events},
+                'grid_cells': grid_cells
+            }
+        }
+    }
+
+
+def _is_cacheable(etag: Optional[str], details: Dict[str, Dict]) -> bool:
+    """Yalnızca tüm olaylar eksiksiz gerçek veriden hesaplandıysa yanıt önbelleğe alınır."""
+    return etag is not None and all(
+        detail['probability'] is not None and not detail['partial'] for detail in details.values()
+    )
+
+
+def _stream_probabilities(params: Dict, etag: Optional[str], stream_format: str):
+    """
+    Olay sonuçlarını biter bitmez akış kaydı olarak gönderir, sonunda özet kaydı.
+    
+    Önbellekteki yanıtlar hesaplama yapılmadan aynı kayıtlarla akıtılır; akış
+    sonunda eksiksiz hesaplanan yanıt normal istekler için önbelleğe yazılır.
+    """
+    cached = RESPONSE_CACHE.get(etag) if etag is not None else None
+    if cached is not None:
+        logger.info(f"Response cache hit (stream): {etag}")
+        data = cached['data']
+        for event in params['events']:
+            yield _stream_record(stream_format, 'event', {
+                'event': event,
+                'probability': data['probabilities'][event],
+                'samples': data['metadata']['samples'][event],
+                'partial': False
+            })
+        yield _stream_record(stream_format, 'summary', dict(cached, etag=etag))
+        return
+    
+    try:
+        results = iter_probabilities_detailed(
+            params['lat'], params['lon'], params['month'], params['day'], params['events'],
+            params['thresholds'], params['use_synthetic'], params['use_climatology'],
+            params['window_days'], REQUEST_DEADLINE_SECONDS or None
+        )
+        details = {}
+        for event, detail in results:
+            details[event] = detail
+            yield _stream_record(stream_format, 'event', dict(event=event, **detail))
+    except Exception as e:
+        logger.error(f"Unexpected error in calculate_probability stream: {e}", exc_info=True)
+        yield _stream_record(stream_format, 'error', {'success': False, 'error': str(e)})
+        return
+    
+    details = {event: details[event] for event in params['events']}
+    response = _probability_response(params, details)
+    if _is_cacheable(etag, details):
+        RESPONSE_CACHE.set(etag, response)
+        response = dict(response, etag=etag)
+    logger.info(f"Streamed probabilities: {response['data']['probabilities']}")
+    yield _stream_record(stream_format, 'summary', response)
+
+
+def _cached_json_response(body: Dict, etag: str, cache_status: str):
+    """Önbelleklenebilir yanıtı ETag ve Cache-Control başlıklarıyla döner."""
+    response = jsonify(body)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={RESPONSE_CACHE_MAX_AGE}'
+    response.headers['X-Cache'] = cache_status
+    return response
+
+
+def _not_modified_response(etag: str):
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={RESPONSE_CACHE_MAX_AGE}'
+    return response
+
 
 @app.route('/', methods=['GET'])
 def index():
@@ -47,7 +352,7 @@ def index():
                 'description': 'Get available events and their configurations'
             },
             'calculate_probability': {
-                'method': 'POST',
+                'method': 'GET, POST',
                 'path': '/calculate_probability',
                 'description': 'Calculate event probabilities for a location and date',
                 'example': {
@@ -58,6 +363,36 @@ def index():
                     'events': ['wind_high', 'wave_high'],
                     'use_synthetic': True
                 }
+            },
+            'calculate_probability_batch': {
+                'method': 'POST',
+                'path': '/calculate_probability/batch',
+                'description': 'Calculate event probabilities for many locations and dates in one request'
+            },
+            'calculate_probability_voyage': {
+                'method': 'POST',
+                'path': '/calculate_probability/voyage',
+                'description': 'Per-waypoint and whole-voyage probabilities for a timed route'
+            },
+            'calculate_probability_grid': {
+                'method': 'POST',
+                'path': '/calculate_probability/grid',
+                'description': 'Probability raster over a lat/lon bounding box'
+            },
+            'calculate_probability_calendar': {
+                'method': 'POST',
+                'path': '/calculate_probability/calendar',
+                'description': 'Daily probabilities for every day of the year at one location'
+            },
+            'jobs': {
+                'method': 'POST',
+                'path': '/jobs',
+                'description': 'Queue a calculate_probability request and return a job id'
+            },
+            'job_status': {
+                'method': 'GET',
+                'path': '/jobs/<job_id>',
+                'description': 'Job status, per-event progress and result'
             }
         },
         'documentation': 'See README_API.md for detailed documentation',
@@ -94,6 +429,7 @@ def get_available_events():
             'name': config['name'],
             'threshold': config['threshold'],
             'year_range': config['year_range'],
+            'grid_resolution': config.get('grid', {}).get('resolution'),
             'description': f"{config['name']} - Default threshold: {config['threshold']}"
         }
     
@@ -104,11 +440,29 @@ def get_available_events():
     }), 200
 
 
-@app.route('/calculate_probability', methods=['POST'])
+@app.route('/calculate_probability', methods=['GET', 'POST'])
 def calculate_probability():
     """
     Belirli konum ve tarih için olay olasılıklarını hesaplar.
     
+    GET ile aynı parametreler sorgu dizesinde verilebilir (events virgülle
+    ayrılmış, thresholds JSON); GET yanıtları ara proxy'lerde önbelleklenebilir.
+    
+    Önbellek: Eksiksiz gerçek veriden hesaplanan yanıtlar kanonik istek
+    hash'i ile ETag ve Cache-Control başlıkları taşır ve süreç içi yanıt
+    önbelleğine alınır. If-None-Match eşleşirse hesaplama yapılmadan 304
+    döner. Sentetik, eksik veya hatalı olay içeren yanıtlar önbelleğe alınmaz
+    (Cache-Control: no-store).
+    
+    Süre bütçesi: Hesaplama REQUEST_DEADLINE_SECONDS içinde bitmezse bekleyen
+    yıl okumaları iptal edilir ve olasılıklar toplanan yıllardan hesaplanır;
+    yanıt "partial": true taşır ve önbelleğe alınmaz.
+    
+    Akış kipi (?stream=ndjson|sse, "stream" alanı veya Accept başlığı): her
+    olay bitince {"type": "event", "event", "probability", "samples", "partial"}
+    kaydı, sonunda normal yanıt gövdesiyle {"type": "summary", ...} kaydı
+    gönderilir (NDJSON satırları veya SSE olayları).
+    
     Request Body (JSON):
         {
             "lat": float,              # Enlem (-90 ile 90 arası)
@@ -116,8 +470,11 @@ def calculate_probability():
             "month": int,              # Ay (1-12)
             "day": int,                # Gün (1-31)
             "events": list[str],       # Olay listesi (örn: ['wind_high', 'rain_high'])
-            "thresholds": dict,        # Opsiyonel: Özel threshold'lar (örn: {'rain_high': 15.0})
-            "use_synthetic": bool      # Opsiyonel: Test için sentetik veri kullan (varsayılan: False)
+            "thresholds": dict,        # Opsiyonel: Özel threshold'lar (örn: {'rain_high': 15.0}
+                                       #   veya tarama için liste: {'wind_high': [8, 10, 12]})
+            "use_synthetic": bool,     # Opsiyonel: Test için sentetik veri kullan (varsayılan: False)
+            "use_climatology": bool,   # Opsiyonel: Yalnızca önceden hesaplanmış klimatoloji deposundan oku
+            "window_days": int         # Opsiyonel: Her yıldan ±N gün havuzla (0-15, varsayılan: 0)
         }
     
     Returns:
@@ -130,6 +487,14 @@ def calculate_probability():
                 "probabilities": {
                     "wind_high": 0.25,
                     "rain_high": 0.15
+                },
+                "partial": false,                   # Bir olay eksik yıllarla hesaplandıysa true
+                "metadata": {
+                    "samples": {"wind_high": 30, "rain_high": 30},
+                    "partial_events": [],
+                    "grid_cells": {                 # Verinin okunduğu hücre merkezleri
+                        "wind_high": {"lat": 40.125, "lon": 29.125}
+                    }
                 }
             }
         }
@@ -141,147 +506,719 @@ def calculate_probability():
         }
     """
     try:
-        # Request body'den JSON verisini al
-        if not request.is_json:
+        # GET: sorgu parametreleri, POST: JSON gövdesi
+        if request.method == 'GET':
+            data = _query_request_data()
+        elif not request.is_json:
             logger.warning("Request body is not JSON")
             return jsonify({
                 'success': False,
                 'error': 'Request body must be JSON'
             }), 400
+        else:
+            data = request.get_json()
         
-        data = request.get_json()
+        try:
+            params = parse_probability_request(data)
+            stream_format = _stream_format(data)
+        except ValueError as e:
+            logger.warning(f"Invalid request: {e}")
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        lat = params['lat']
+        lon = params['lon']
+        month = params['month']
+        day = params['day']
+        events = params['events']
+        thresholds = params['thresholds']
+        use_synthetic = params['use_synthetic']
+        use_climatology = params['use_climatology']
+        window_days = params['window_days']
+        
+        # Log request
+        logger.info(f"Calculate probability request: lat={lat}, lon={lon}, month={month}, day={day}, events={events}")
+        
+        # Koşullu istek ve yanıt önbelleği (sentetik veri rastgele olduğundan hariç)
+        etag = None
+        if not use_synthetic:
+            etag = canonical_request_hash(lat, lon, month, day, events, thresholds,
+                                          use_synthetic, use_climatology, window_days)
+        
+        # Akış kipi: olaylar biter bitmez kayıt olarak gönderilir
+        if stream_format is not None:
+            logger.info(f"Streaming response ({stream_format})")
+            streamed = app.response_class(
+                stream_with_context(_stream_probabilities(params, etag, stream_format)),
+                mimetype=STREAM_FORMATS[stream_format]
+            )
+            streamed.headers['Cache-Control'] = 'no-store'
+            # Reverse proxy (nginx) tamponlamasını kapat
+            streamed.headers['X-Accel-Buffering'] = 'no'
+            return streamed
+        
+        if etag is not None:
+            if not request.if_none_match.star_tag and request.if_none_match.contains_weak(etag):
+                logger.info(f"Not modified: {etag}")
+                return _not_modified_response(etag)
+            
+            cached = RESPONSE_CACHE.get(etag)
+            if cached is not None:
+                logger.info(f"Response cache hit: {etag}")
+                return _cached_json_response(cached, etag, 'HIT')
+        
+        # Olasılıkları hesapla
+        details = calculate_probabilities_detailed(
+            lat=lat,
+            lon=lon,
+            month=month,
+            day=day,
+            events=events,
+            thresholds=thresholds,
+            use_synthetic=use_synthetic,
+            use_climatology=use_climatology,
+            window_days=window_days,
+            deadline_seconds=REQUEST_DEADLINE_SECONDS or None
+        )
+        
+        # Response oluştur
+        response = _probability_response(params, details)
+        
+        logger.info(f"Successfully calculated probabilities: {response['data']['probabilities']}")
+        
+        # Yalnızca tüm olaylar eksiksiz gerçek veriden hesaplandıysa önbelleğe al
+        if _is_cacheable(etag, details):
+            RESPONSE_CACHE.set(etag, response)
+            return _cached_json_response(response, etag, 'MISS'), 200
         
-        # Gerekli parametreleri kontrol et
-        required_fields = ['lat', 'lon', 'month', 'day', 'events']
-        missing_fields = [field for field in required_fields if field not in data]
+        uncached = jsonify(response)
+        uncached.headers['Cache-Control'] = 'no-store'
+        return uncached, 200
         
-        if missing_fields:
-            logger.warning(f"Missing required fields: {missing_fields}")
+    except ValueError as e:
+        logger.error(f"ValueError in calculate_probability: {e}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
+    except Exception as e:
+        logger.error(f"Unexpected error in calculate_probability: {e}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+
+@app.route('/calculate_probability/batch', methods=['POST'])
+def calculate_probability_batch():
+    """
+    Birden çok konum/tarih için olay olasılıklarını tek istekte hesaplar.
+    
+    Aynı olay ve tarihe düşen öğeler birlikte çekilir: her yıl dosyası bir kez
+    açılır ve tüm noktalar tek okumada seçilir.
+    
+    Süre bütçesi: Toplu hesaplama tekil istekle aynı REQUEST_DEADLINE_SECONDS
+    bütçesiyle çalışır; bütçede okunamayan olaylar partial olarak döner.
+    
+    Request Body (JSON):
+        {
+            "items": [                     # En fazla BATCH_MAX_ITEMS öğe
+                {"lat": 40.0, "lon": 29.0, "month": 7, "day": 15, "events": ["wind_high"]},
+                ...
+            ],
+            "thresholds": dict,            # Opsiyonel: Öğede yoksa kullanılacak threshold'lar
+            "use_synthetic": bool,         # Opsiyonel: Öğede yoksa kullanılacak değer
+            "use_climatology": bool,       # Opsiyonel: Öğede yoksa kullanılacak değer
+            "window_days": int             # Opsiyonel: Öğede yoksa kullanılacak değer
+        }
+    
+    Returns:
+        JSON response (öğelerle aynı sırada):
+        {
+            "success": true,
+            "data": {
+                "results": [
+                    {"index": 0, "success": true, "location": {...}, "date": {...},
+                     "probabilities": {"wind_high": 0.25}, "partial": false,
+                     "samples": {"wind_high": 30}, "partial_events": []},
+                    {"index": 1, "success": false, "error": "Error message"}
+                ],
+                "metadata": {"total_items": 2, "failed_items": 1, "partial_items": 0}
+            }
+        }
+    """
+    try:
+        if not request.is_json:
+            logger.warning("Request body is not JSON")
             return jsonify({
                 'success': False,
-                'error': f'Missing required fields: {", ".join(missing_fields)}'
+                'error': 'Request body must be JSON'
             }), 400
         
-        # Parametreleri al
-        lat = data.get('lat')
-        lon = data.get('lon')
-        month = data.get('month')
-        day = data.get('day')
-        events = data.get('events')
-        thresholds = data.get('thresholds', None)
-        use_synthetic = data.get('use_synthetic', False)
+        data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else None
         
-        # Parametre tipi kontrolü
-        try:
-            lat = float(lat)
-            lon = float(lon)
-            month = int(month)
-            day = int(day)
-        except (ValueError, TypeError) as e:
-            logger.warning(f"Invalid parameter types: {e}")
+        if not isinstance(items, list) or len(items) == 0:
             return jsonify({
                 'success': False,
-                'error': 'lat and lon must be numbers, month and day must be integers'
+                'error': 'items must be a non-empty list'
             }), 400
         
-        # events listesi kontrolü
-        if not isinstance(events, list) or len(events) == 0:
-            logger.warning("events must be a non-empty list")
+        if len(items) > BATCH_MAX_ITEMS:
             return jsonify({
                 'success': False,
-                'error': 'events must be a non-empty list'
+                'error': f'items must contain at most {BATCH_MAX_ITEMS} entries, got {len(items)}'
             }), 400
         
-        # Geçersiz event kontrolü
-        invalid_events = [e for e in events if e not in DATASET_CONFIG]
-        if invalid_events:
-            logger.warning(f"Invalid events: {invalid_events}")
+        # Üst düzey opsiyonel alanlar öğelerde yoksa varsayılan olarak uygulanır
+        defaults = {
+            key: data[key] for key in ('thresholds', 'use_synthetic', 'use_climatology', 'window_days')
+            if key in data
+        }
+        
+        # Her öğe ayrı doğrulanır; hatalı öğeler diğerlerini etkilemez
+        results: List[Optional[Dict]] = [None] * len(items)
+        valid_indices = []
+        valid_params = []
+        for index, item in enumerate(items):
+            try:
+                params = parse_probability_request({**defaults, **item} if isinstance(item, dict) else item)
+            except ValueError as e:
+                results[index] = {'index': index, 'success': False, 'error': str(e)}
+                continue
+            valid_indices.append(index)
+            valid_params.append(params)
+        
+        logger.info(f"Batch request: {len(items)} items, {len(valid_params)} valid")
+        
+        if valid_params:
+            details_list = calculate_probabilities_batch(
+                valid_params, deadline_seconds=REQUEST_DEADLINE_SECONDS or None
+            )
+            for index, params, details in zip(valid_indices, valid_params, details_list):
+                partial_events = [event for event, detail in details.items() if detail['partial']]
+                results[index] = {
+                    'index': index,
+                    'success': True,
+                    'location': {'lat': params['lat'], 'lon': params['lon']},
+                    'date': {'month': params['month'], 'day': params['day']},
+                    'probabilities': {event: detail['probability'] for event, detail in details.items()},
+                    'partial': bool(partial_events),
+                    'samples': {event: detail['samples'] for event, detail in details.items()},
+                    'partial_events': partial_events
+                }
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'results': results,
+                'metadata': {
+                    'total_items': len(items),
+                    'failed_items': sum(1 for result in results if not result['success']),
+                    'partial_items': sum(1 for result in results if result.get('partial'))
+                }
+            }
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Unexpected error in calculate_probability_batch: {e}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+
+@app.route('/calculate_probability/voyage', methods=['POST'])
+def calculate_probability_voyage():
+    """
+    Zamanlı rota noktaları için nokta ve sefer bazında olasılıkları hesaplar.
+    
+    Aynı takvim gününe düşen noktalar birlikte çekilir (her yıl dosyası bir kez
+    açılır, tüm noktalar tek okumada seçilir).
+    
+    Süre bütçesi: Rota tekil istekle aynı REQUEST_DEADLINE_SECONDS bütçesiyle
+    hesaplanır; bütçede okunamayan noktalar partial olarak döner.
+    
+    Request Body (JSON):
+        {
+            "waypoints": [                 # Rota sırasıyla, en fazla BATCH_MAX_ITEMS nokta
+                {"lat": 40.0, "lon": 29.0, "date": "2025-07-15"},
+                ...
+            ],
+            "events": list[str],           # Olay listesi
+            "thresholds": dict,            # Opsiyonel: Özel threshold'lar
+            "use_synthetic": bool,         # Opsiyonel: Test için sentetik veri kullan
+            "window_days": int             # Opsiyonel: Her yıldan ±N gün havuzla
+        }
+    
+    Returns:
+        JSON response:
+        {
+            "success": true,
+            "data": {
+                "waypoints": [
+                    {"index": 0, "location": {...}, "date": "2025-07-15",
+                     "probabilities": {"wind_high": 0.25}}
+                ],
+                "voyage": {
+                    "any_exceedance": {"wind_high": 0.58},   # 1 - Π(1 - p)
+                    "max_waypoint": {"wind_high": 0.31}
+                },
+                "metadata": {"total_waypoints": 3, "distinct_days": 2, "partial": false}
+            }
+        }
+    """
+    try:
+        if not request.is_json:
+            logger.warning("Request body is not JSON")
             return jsonify({
                 'success': False,
-                'error': f'Invalid events: {", ".join(invalid_events)}. Valid events: {", ".join(DATASET_CONFIG.keys())}'
+                'error': 'Request body must be JSON'
             }), 400
         
-        # thresholds dict kontrolü (opsiyonel)
-        if thresholds is not None and not isinstance(thresholds, dict):
-            logger.warning("thresholds must be a dictionary")
+        data = request.get_json()
+        waypoints = data.get('waypoints') if isinstance(data, dict) else None
+        
+        if not isinstance(waypoints, list) or len(waypoints) == 0:
             return jsonify({
                 'success': False,
-                'error': 'thresholds must be a dictionary'
+                'error': 'waypoints must be a non-empty list'
             }), 400
         
-        # Parametre aralık kontrolü
-        if not (-90 <= lat <= 90):
+        if len(waypoints) > BATCH_MAX_ITEMS:
             return jsonify({
                 'success': False,
-                'error': f'lat must be between -90 and 90, got {lat}'
+                'error': f'waypoints must contain at most {BATCH_MAX_ITEMS} entries, got {len(waypoints)}'
             }), 400
         
-        if not (-180 <= lon <= 180):
+        # Her nokta tekil istek kurallarıyla doğrulanır; rota bütün olarak reddedilir
+        params_list = []
+        dates = []
+        for index, waypoint in enumerate(waypoints):
+            try:
+                if not isinstance(waypoint, dict) or 'date' not in waypoint:
+                    raise ValueError('Missing required fields: date')
+                try:
+                    date = datetime.strptime(str(waypoint['date']), '%Y-%m-%d')
+                except ValueError:
+                    raise ValueError(f'date must be YYYY-MM-DD, got {waypoint["date"]}')
+                params = parse_probability_request({
+                    'lat': waypoint.get('lat'),
+                    'lon': waypoint.get('lon'),
+                    'month': date.month,
+                    'day': date.day,
+                    'events': data.get('events'),
+                    'thresholds': data.get('thresholds'),
+                    'use_synthetic': data.get('use_synthetic', False),
+                    'window_days': data.get('window_days', 0)
+                })
+            except ValueError as e:
+                logger.warning(f"Invalid waypoint {index}: {e}")
+                return jsonify({
+                    'success': False,
+                    'error': f'waypoint {index}: {e}'
+                }), 400
+            params_list.append(params)
+            dates.append(date.strftime('%Y-%m-%d'))
+        
+        events = params_list[0]['events']
+        logger.info(f"Voyage request: {len(waypoints)} waypoints, events={events}")
+        
+        result = calculate_voyage_probabilities(
+            [(p['lat'], p['lon'], p['month'], p['day']) for p in params_list],
+            events=events,
+            thresholds=params_list[0]['thresholds'],
+            use_synthetic=params_list[0]['use_synthetic'],
+            window_days=params_list[0]['window_days'],
+            deadline_seconds=REQUEST_DEADLINE_SECONDS or None
+        )
+        
+        waypoint_results = [
+            {
+                'index': index,
+                'location': {'lat': params['lat'], 'lon': params['lon']},
+                'date': date,
+                'probabilities': {event: detail['probability'] for event, detail in details.items()}
+            }
+            for index, (params, date, details) in enumerate(zip(params_list, dates, result['waypoints']))
+        ]
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'waypoints': waypoint_results,
+                'voyage': {
+                    'any_exceedance': result['any_exceedance'],
+                    'max_waypoint': result['max_waypoint']
+                },
+                'metadata': {
+                    'total_waypoints': len(waypoints),
+                    'distinct_days': len({(p['month'], p['day']) for p in params_list}),
+                    'synthetic_data': params_list[0]['use_synthetic'],
+                    'window_days': params_list[0]['window_days'],
+                    'partial': result['partial']
+                }
+            }
+        }), 200
+        
+    except ValueError as e:
+        logger.error(f"ValueError in calculate_probability_voyage: {e}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
+    except Exception as e:
+        logger.error(f"Unexpected error in calculate_probability_voyage: {e}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+
+def _raster_to_json(raster) -> List:
+    """NumPy rasterını (veya dizisini) JSON listesine çevirir (NaN → null)."""
+    if raster.ndim > 1:
+        return [_raster_to_json(row) for row in raster]
+    return [None if value != value else float(value) for value in raster.tolist()]
+
+
+@app.route('/calculate_probability/grid', methods=['POST'])
+def calculate_probability_grid_endpoint():
+    """
+    Bir bölge (bounding box) için olasılık rasterı hesaplar.
+    
+    Her yıl dosyasından tek dikdörtgen alt küme okunur; olasılıklar veri
+    setinin doğal gridinde hücre bazında döner.
+    
+    Request Body (JSON):
+        {
+            "lat_range": [float, float],   # (min, max) enlem
+            "lon_range": [float, float],   # (min, max) boylam (-180/180, meridyeni geçmeden)
+            "month": int,
+            "day": int,
+            "events": list[str],
+            "thresholds": dict             # Opsiyonel
+        }
+    
+    Returns:
+        JSON response:
+        {
+            "success": true,
+            "data": {
+                "rasters": {
+                    "sst_high": {
+                        "lats": [...], "lons": [...],        # Hücre merkezleri
+                        "probability": [[0.2, null, ...]],   # (enlem, boylam); verisiz hücreler null
+                        "samples": [[30, 0, ...]],
+                        "partial": false
+                    }
+                }
+            }
+        }
+    """
+    try:
+        if not request.is_json:
+            logger.warning("Request body is not JSON")
             return jsonify({
                 'success': False,
-                'error': f'lon must be between -180 and 180, got {lon}'
+                'error': 'Request body must be JSON'
             }), 400
         
-        if not (1 <= month <= 12):
+        data = request.get_json()
+        if not isinstance(data, dict):
+            data = {}
+        lat_range = data.get('lat_range')
+        lon_range = data.get('lon_range')
+        
+        for name, value in (('lat_range', lat_range), ('lon_range', lon_range)):
+            if not (isinstance(value, list) and len(value) == 2):
+                return jsonify({
+                    'success': False,
+                    'error': f'{name} must be a list of two numbers'
+                }), 400
+        
+        # Köşeler tekil istek kurallarıyla doğrulanır (aralıklar, ay/gün, olaylar, threshold'lar)
+        try:
+            corners = [
+                parse_probability_request(dict(data, lat=lat, lon=lon))
+                for lat, lon in zip(lat_range, lon_range)
+            ]
+        except ValueError as e:
+            logger.warning(f"Invalid grid request: {e}")
             return jsonify({
                 'success': False,
-                'error': f'month must be between 1 and 12, got {month}'
+                'error': str(e)
             }), 400
         
-        if not (1 <= day <= 31):
+        params = corners[0]
+        if params['window_days']:
             return jsonify({
                 'success': False,
-                'error': f'day must be between 1 and 31, got {day}'
+                'error': 'window_days is not supported for grid requests'
             }), 400
+        lat_range = (corners[0]['lat'], corners[1]['lat'])
+        lon_range = (corners[0]['lon'], corners[1]['lon'])
         
-        # Log request
-        logger.info(f"Calculate probability request: lat={lat}, lon={lon}, month={month}, day={day}, events={events}")
+        logger.info(f"Grid request: lat={lat_range}, lon={lon_range}, month={params['month']}, "
+                    f"day={params['day']}, events={params['events']}")
         
-        # Olasılıkları hesapla
-        probabilities = calculate_probabilities(
-            lat=lat,
-            lon=lon,
-            month=month,
-            day=day,
-            events=events,
-            thresholds=thresholds,
-            use_synthetic=use_synthetic
+        results = calculate_probability_grid(
+            lat_range, lon_range, params['month'], params['day'],
+            params['events'], params['thresholds']
         )
         
-        # Response oluştur
-        response = {
+        rasters = {}
+        for event, result in results.items():
+            if result is None:
+                rasters[event] = None
+                continue
+            probability = result['probability']
+            rasters[event] = {
+                'lats': result['lats'].tolist(),
+                'lons': result['lons'].tolist(),
+                'probability': (
+                    {key: _raster_to_json(value) for key, value in probability.items()}
+                    if isinstance(probability, dict) else _raster_to_json(probability)
+                ),
+                'samples': result['samples'].tolist(),
+                'partial': result['partial']
+            }
+        
+        return jsonify({
             'success': True,
             'data': {
-                'location': {
-                    'lat': lat,
-                    'lon': lon
-                },
-                'date': {
-                    'month': month,
-                    'day': day
-                },
-                'probabilities': probabilities,
-                'metadata': {
-                    'total_events': len(events),
-                    'custom_thresholds': thresholds is not None,
-                    'synthetic_data': use_synthetic
+                'lat_range': list(lat_range),
+                'lon_range': list(lon_range),
+                'date': {'month': params['month'], 'day': params['day']},
+                'rasters': rasters
+            }
+        }), 200
+        
+    except ValueError as e:
+        logger.error(f"ValueError in calculate_probability_grid: {e}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
+    except Exception as e:
+        logger.error(f"Unexpected error in calculate_probability_grid: {e}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+
+@app.route('/calculate_probability/calendar', methods=['POST'])
+def calculate_probability_calendar_endpoint():
+    """
+    Bir konum için yılın her günündeki (366 gün, 29 Şubat dahil) olasılıkları döner.
+    
+    Request Body (JSON):
+        {
+            "lat": float,
+            "lon": float,
+            "events": list[str],
+            "thresholds": dict             # Opsiyonel
+        }
+    
+    Returns:
+        JSON response:
+        {
+            "success": true,
+            "data": {
+                "location": {"lat": 40.0, "lon": 29.0},
+                "days": ["01-01", ..., "12-31"],
+                "calendar": {
+                    "sst_high": {"probability": [0.0, ...], "samples": [30, ...], "source": "aggregation"},
+                    "wave_high": {"error": "..."}      # Küp yoksa
                 }
             }
         }
+    """
+    try:
+        if not request.is_json:
+            logger.warning("Request body is not JSON")
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be JSON'
+            }), 400
         
-        logger.info(f"Successfully calculated probabilities: {probabilities}")
+        data = request.get_json()
         
-        return jsonify(response), 200
+        # Tarih alanları yok; tekil istek kuralları ay/gün sabitlenerek uygulanır
+        try:
+            params = parse_probability_request(dict(data, month=1, day=1) if isinstance(data, dict) else data)
+        except ValueError as e:
+            logger.warning(f"Invalid calendar request: {e}")
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        logger.info(f"Calendar request: lat={params['lat']}, lon={params['lon']}, events={params['events']}")
+        
+        results = calculate_probability_calendar(
+            params['lat'], params['lon'], params['events'], params['thresholds']
+        )
+        
+        calendar = {}
+        for event, result in results.items():
+            if 'error' in result:
+                calendar[event] = {'error': result['error']}
+                continue
+            probability = result['probability']
+            calendar[event] = {
+                'probability': (
+                    {key: _raster_to_json(value) for key, value in probability.items()}
+                    if isinstance(probability, dict) else _raster_to_json(probability)
+                ),
+                'samples': result['samples'].tolist(),
+                'source': result['source']
+            }
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'location': {'lat': params['lat'], 'lon': params['lon']},
+                'days': [f"{month:02d}-{day:02d}" for month, day in CALENDAR_DAYS],
+                'calendar': calendar
+            }
+        }), 200
         
     except ValueError as e:
-        logger.error(f"ValueError in calculate_probability: {e}", exc_info=True)
+        logger.error(f"ValueError in calculate_probability_calendar: {e}", exc_info=True)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 400
         
     except Exception as e:
-        logger.error(f"Unexpected error in calculate_probability: {e}", exc_info=True)
+        logger.error(f"Unexpected error in calculate_probability_calendar: {e}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    /calculate_probability isteğini kalıcı iş kuyruğuna alır ve hemen iş kimliği döner.
+    
+    Gövde /calculate_probability ile aynıdır. Aynı kanonik isteğe ait bekleyen,
+    çalışan veya eksiksiz tamamlanmış iş varsa yeni iş açılmaz, mevcut iş döner.
+    
+    Returns:
+        202 Accepted:
+        {
+            "success": true,
+            "data": {"job_id": "...", "status": "queued", "deduplicated": false,
+                     "status_url": "/jobs/<job_id>"}
+        }
+    """
+    try:
+        if not request.is_json:
+            logger.warning("Request body is not JSON")
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be JSON'
+            }), 400
+        
+        try:
+            params = parse_probability_request(request.get_json())
+        except ValueError as e:
+            logger.warning(f"Invalid job request: {e}")
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        # Sentetik veri rastgele olduğundan tekilleştirilmez
+        request_hash = None
+        if not params['use_synthetic']:
+            request_hash = canonical_request_hash(
+                params['lat'], params['lon'], params['month'], params['day'], params['events'],
+                params['thresholds'], params['use_synthetic'], params['use_climatology'],
+                params['window_days']
+            )
+        
+        job = JOB_QUEUE.submit(params, request_hash)
+        ensure_embedded_workers()
+        logger.info(f"Job {job['id']} ({job['status']}, deduplicated={job['deduplicated']})")
+        
+        status_url = f"/jobs/{job['id']}"
+        response = jsonify({
+            'success': True,
+            'data': {
+                'job_id': job['id'],
+                'status': job['status'],
+                'deduplicated': job['deduplicated'],
+                'status_url': status_url
+            }
+        })
+        response.headers['Location'] = status_url
+        return response, 202
+        
+    except Exception as e:
+        logger.error(f"Unexpected error in submit_job: {e}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str):
+    """
+    İşin durumunu, olay başına ilerlemesini ve tamamlandıysa sonucunu döner.
+    
+    Returns:
+        {
+            "success": true,
+            "data": {
+                "job_id": "...",
+                "status": "queued" | "running" | "done" | "failed",
+                "progress": {"sst_high": {"status": "done", "probability": 0.1, ...},
+                             "wave_high": {"status": "pending"}},
+                "completed_events": 1,
+                "total_events": 2,
+                "result": {...}      # status=done: /calculate_probability yanıtının "data" alanı
+            }
+        }
+    """
+    try:
+        job = JOB_QUEUE.get(job_id)
+        if job is None:
+            return jsonify({
+                'success': False,
+                'error': f'Job not found: {job_id}'
+            }), 404
+        
+        progress = job['progress']
+        data = {
+            'job_id': job['id'],
+            'status': job['status'],
+            'progress': progress,
+            'completed_events': sum(1 for item in progress.values() if item['status'] == 'done'),
+            'total_events': len(progress),
+            'created': datetime.fromtimestamp(job['created'], tz=timezone.utc).isoformat()
+        }
+        if job['status'] == 'done':
+            data['result'] = _probability_response(job['params'], job['result'])['data']
+        elif job['status'] == 'failed':
+            data['error'] = job['error']
+        
+        response = jsonify({'success': True, 'data': data})
+        response.headers['Cache-Control'] = 'no-store'
+        return response, 200
+        
+    except Exception as e:
+        logger.error(f"Unexpected error in get_job: {e}", exc_info=True)
         return jsonify({
             'success': False,
             'error': f'Internal server error: {str(e)}'
@@ -0,0 +1,240 @@
+"""
+Sık sorgulanan konumlar için seri önbelleğini önceden dolduran ısıtıcı.
+Yapılandırılmış konumlar ve önümüzdeki WARM_HORIZON_DAYS gün için her olayın
+serisini fetch_event_data ile çeker; eksiksiz seriler kalıcı seri önbelleğine
+(SERIES_CACHE) yazıldığından web worker'larında ilk istek de önbellek hızında
+cevaplanır. Isıtıcı düşük öncelikle (nice), dakikalık istek sınırıyla ve
+loop kipinde yalnızca yoğun olmayan saatlerde çalışır.
+
+Kullanım:
+    python cache_warmer.py once                      # Hemen bir tur çalıştır
+    python cache_warmer.py loop                      # Her gün yoğun olmayan saatlerde
+    python cache_warmer.py once --locations spots.json --horizon 30 --events sst_high wind_high
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Varsayılan sıcak noktalar (interactive_nasa_test.py TURKEY_LOCATIONS ile aynı)
+DEFAULT_LOCATIONS = [
+    {'name': 'İstanbul (Marmara Denizi)', 'lat': 41.0, 'lon': 29.0},
+    {'name': 'İzmir (Ege Denizi)', 'lat': 38.4, 'lon': 27.1},
+    {'name': 'Antalya (Akdeniz)', 'lat': 36.9, 'lon': 30.7},
+    {'name': 'Trabzon (Karadeniz)', 'lat': 41.0, 'lon': 39.7},
+]
+
+# Bugünden itibaren ısıtılan gün sayısı
+WARM_HORIZON_DAYS = int(os.environ.get('WARM_HORIZON_DAYS', 60))
+# Dakikada en fazla uzak seri çekimi (önbellekte olanlar sayılmaz)
+WARM_RATE_PER_MINUTE = float(os.environ.get('WARM_RATE_PER_MINUTE', 30))
+# Loop kipinde çalışılan UTC saat aralığı ("başlangıç-bitiş", bitiş hariç)
+WARM_OFF_PEAK_HOURS = os.environ.get('WARM_OFF_PEAK_HOURS', '1-6')
+# Konum listesi JSON dosyası ([{"name": ..., "lat": ..., "lon": ...}])
+WARM_LOCATIONS_FILE = os.environ.get('WARM_LOCATIONS_FILE')
+
+
+def load_locations(path: Optional[str] = None) -> List[Dict]:
+    """
+    Isıtılacak konumları yükler.
+
+    Args:
+        path: JSON dosyası; None ise WARM_LOCATIONS_FILE, o da yoksa DEFAULT_LOCATIONS
+
+    Raises:
+        ValueError: Dosyadaki konumlar geçersizse
+    """
+    path = path or WARM_LOCATIONS_FILE
+    if not path:
+        return list(DEFAULT_LOCATIONS)
+    with open(path, 'r', encoding='utf-8') as f:
+        locations = json.load(f)
+    if not isinstance(locations, list) or not all(
+        isinstance(item, dict) and 'lat' in item and 'lon' in item for item in locations
+    ):
+        raise ValueError(f"Konum dosyası [{{'lat': .., 'lon': ..}}, ...] listesi olmalı: {path}")
+    return locations
+
+
+def parse_hours(spec: str) -> Tuple[int, int]:
+    """'1-6' biçimindeki UTC saat aralığını (başlangıç, bitiş) olarak döner."""
+    try:
+        start, end = (int(part) for part in spec.split('-'))
+    except ValueError:
+        raise ValueError(f"Saat aralığı 'başlangıç-bitiş' biçiminde olmalı: {spec}")
+    if not (0 <= start <= 23 and 0 <= end <= 24):
+        raise ValueError(f"Saatler 0-24 aralığında olmalı: {spec}")
+    return start, end
+
+
+def in_hours(hours: Tuple[int, int], now: Optional[datetime] = None) -> bool:
+    """UTC saat aralığında mı (gece yarısını geçen aralıklar dahil)?"""
+    hour = (now or datetime.now(timezone.utc)).hour
+    start, end = hours
+    return start <= hour < end if start < end else (hour >= start or hour < end)
+
+
+def horizon_days(horizon: int, today: Optional[datetime] = None) -> List[Tuple[int, int]]:
+    """Bugünden itibaren horizon günün (ay, gün) çiftleri."""
+    today = today or datetime.now(timezone.utc)
+    return [((today + timedelta(days=offset)).month, (today + timedelta(days=offset)).day)
+            for offset in range(horizon)]
+
+
+class RateLimiter:
+    """Çağrılar arasında en az 60/rate_per_minute saniye bırakır."""
+
+    def __init__(self, rate_per_minute: float):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._next = 0.0
+
+    def wait(self) -> None:
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = time.monotonic() + self.interval
+
+
+def warm_tasks(locations: List[Dict], days: List[Tuple[int, int]],
+               events: List[str]) -> Iterator[Tuple[str, float, float, int, int, str]]:
+    """
+    Isıtılacak (olay, lat, lon, ay, gün, önbellek anahtarı) görevleri.
+
+    Aynı grid hücresine düşen konumlar tek görev olur; yakın günler önce gelir.
+    """
+    from calculate_ocean_probabilities import series_cache_key, snap_to_grid
+
+    seen = set()
+    for month, day in days:
+        for location in locations:
+            for event in events:
+                key = series_cache_key(event, snap_to_grid(event, location['lat'], location['lon']),
+                                       month, day)
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield event, float(location['lat']), float(location['lon']), month, day, key
+
+
+def served_by_cube(event: str, lat: float, lon: float, month: int, day: int) -> bool:
+    """
+    Seri küp arka ucundan mı cevaplanıyor?
+
+    Küp kapsamındaki seriler _local_series ile küpten okunur ve seri
+    önbelleğine hiç yazılmaz; bu yüzden ısıtılmaları gerekmez.
+    """
+    from calculate_ocean_probabilities import CLIMATOLOGY_CUBES, get_event_backend, snap_to_grid
+    from climatology_store import day_of_year
+
+    if get_event_backend(event) != 'cube':
+        return False
+    cell = snap_to_grid(event, lat, lon)
+    values = CLIMATOLOGY_CUBES.series(event, cell.row, cell.col, day_of_year(month, day))
+    return values is not None and len(values) > 0
+
+
+def warm_once(locations: List[Dict], horizon: int, events: Optional[List[str]] = None,
+              rate_per_minute: float = WARM_RATE_PER_MINUTE,
+              hours: Optional[Tuple[int, int]] = None) -> Dict[str, int]:
+    """
+    Bir ısıtma turu çalıştırır.
+
+    Args:
+        locations: Konumlar
+        horizon: Bugünden itibaren gün sayısı
+        events: Olaylar (varsayılan: tümü)
+        rate_per_minute: Dakikada en fazla uzak çekim
+        hours: Verilirse bu UTC saat aralığının dışına çıkıldığında tur durur
+
+    Returns:
+        {'warm': önbellekte olan, 'cube': küpten cevaplanan, 'fetched': çekilip yazılan,
+         'incomplete': eksik kalan, 'failed': hata veren,
+         'skipped': saat aralığı dolduğu için çalışılmayan}
+    """
+    from calculate_ocean_probabilities import DATASET_CONFIG, SERIES_CACHE, fetch_event_data
+
+    events = events or list(DATASET_CONFIG.keys())
+    tasks = list(warm_tasks(locations, horizon_days(horizon), events))
+    limiter = RateLimiter(rate_per_minute)
+    stats = {'warm': 0, 'cube': 0, 'fetched': 0, 'incomplete': 0, 'failed': 0, 'skipped': 0}
+    logger.info(f"Isıtma turu: {len(locations)} konum x {horizon} gün x {len(events)} olay "
+                f"= {len(tasks)} seri")
+
+    for index, (event, lat, lon, month, day, key) in enumerate(tasks):
+        if SERIES_CACHE.get(key) is not None:
+            stats['warm'] += 1
+            continue
+        # Küpten cevaplanan seriler önbelleğe yazılmaz; hız sınırı beklenmeden geçilir
+        if served_by_cube(event, lat, lon, month, day):
+            stats['cube'] += 1
+            continue
+        if hours is not None and not in_hours(hours):
+            stats['skipped'] = len(tasks) - index
+            logger.info(f"Yoğun olmayan saatler bitti, {stats['skipped']} seri sonraki tura kaldı")
+            break
+
+        limiter.wait()
+        try:
+            fetch_event_data(event, lat, lon, month, day)
+        except Exception as e:
+            logger.warning(f"{event} ({lat}, {lon}) {month}/{day} ısıtılamadı: {e}")
+            stats['failed'] += 1
+            continue
+        # Eksik yıllı seriler önbelleğe yazılmaz; sonraki turda yeniden denenir
+        if SERIES_CACHE.get(key) is not None:
+            stats['fetched'] += 1
+        else:
+            stats['incomplete'] += 1
+
+    logger.info(f"Isıtma turu bitti: {stats}")
+    return stats
+
+
+def lower_priority(niceness: int = 10) -> None:
+    """Süreç önceliğini düşürür (desteklenmeyen platformlarda yok sayılır)."""
+    try:
+        os.nice(niceness)
+    except (AttributeError, OSError) as e:
+        logger.debug(f"Öncelik düşürülemedi: {e}")
+
+
+def main(argv: List[str]) -> None:
+    """Isıtıcı CLI girişi."""
+    parser = argparse.ArgumentParser(prog='cache_warmer.py', description="Seri önbelleğini önceden doldurur")
+    parser.add_argument('mode', choices=['once', 'loop'], help="once: hemen bir tur, loop: her gün yoğun olmayan saatlerde")
+    parser.add_argument('--locations', default=None, help="Konum listesi JSON dosyası")
+    parser.add_argument('--horizon', type=int, default=WARM_HORIZON_DAYS, help="Bugünden itibaren gün sayısı")
+    parser.add_argument('--events', nargs='+', default=None, help="Olaylar (varsayılan: tümü)")
+    parser.add_argument('--rate', type=float, default=WARM_RATE_PER_MINUTE, help="Dakikada en fazla uzak çekim")
+    parser.add_argument('--off-peak', default=WARM_OFF_PEAK_HOURS, help="Loop kipinde UTC saat aralığı (örn. 1-6)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    lower_priority()
+
+    locations = load_locations(args.locations)
+    if args.mode == 'once':
+        stats = warm_once(locations, args.horizon, args.events, args.rate)
+        print(json.dumps(stats, ensure_ascii=False))
+        return
+
+    hours = parse_hours(args.off_peak)
+    while True:
+        if in_hours(hours):
+            warm_once(locations, args.horizon, args.events, args.rate, hours=hours)
+            # Aynı aralıkta ikinci tur yapılmaz
+            while in_hours(hours):
+                time.sleep(300)
+        time.sleep(300)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
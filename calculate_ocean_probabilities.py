@@ -5,10 +5,28 @@ NASA EarthData OPeNDAP veri setlerinden empirik olasılık hesaplama modülü.
 
 import xarray as xr
 import numpy as np
+import argparse
 import json
 import logging
-from typing import Dict, List, Optional
-from datetime import datetime
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from datetime import datetime, timedelta
+
+from climatology_cube import CLIMATOLOGY_CUBES, CUBE_DIR, new_cube_data_path, publish_cube
+from climatology_store import CLIMATOLOGY_REGIONS, CLIMATOLOGY_STORE, HARMONIC_DOY, day_of_year
+from dataset_catalog import DATASET_CATALOG, nearest_indices
+from dataset_mirror import DATASET_MIRROR, MIRROR_DIR
+from dataset_pool import DATASET_POOL
+from memory_cache import LRUCache
+from series_cache import SERIES_CACHE, cache_path
+from singleflight import FILE_LOCKS, SINGLE_FLIGHT
+from upstream_guard import UPSTREAM_GUARD, is_missing_error
 
 # Logging yapılandırması
 logging.basicConfig(
@@ -17,7 +35,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-
 # Veri seti konfigürasyonları
 DATASET_CONFIG = {
     'wind_high': {
@@ -27,7 +44,9 @@ DATASET_CONFIG = {
         'derived': True,  # sqrt(u^2 + v^2) hesaplanacak
         'threshold': 10.0,  # m/s
         'year_range': (1991, 2020),
-        'temporal': 'monthly'
+        'temporal': 'monthly',
+        # Doğal grid: CCMP 0.25° (78.375°S-78.375°N, 0-360 boylam)
+        'grid': {'resolution': 0.25, 'lat_range': (-78.375, 78.375), 'lon_range': (0.125, 359.875)}
     },
     'rain_high': {
         'name': 'GPCP Daily Precipitation',
@@ -35,7 +54,9 @@ DATASET_CONFIG = {
         'variable': 'precip',
         'threshold': 10.0,  # mm/gün
         'year_range': (1991, 2020),
-        'temporal': 'daily'
+        'temporal': 'daily',
+        # Doğal grid: GPCP 0.5° (-180/180 boylam)
+        'grid': {'resolution': 0.5, 'lat_range': (-89.75, 89.75), 'lon_range': (-179.75, 179.75)}
     },
     'wave_high': {
         'name': 'Merged Altimeter SWH',
@@ -43,7 +64,9 @@ DATASET_CONFIG = {
         'variable': 'swh',
         'threshold': 2.0,  # m
         'year_range': (1993, 2020),  # Altimeter verisi 1993'te başladı
-        'temporal': 'daily'
+        'temporal': 'daily',
+        # Doğal grid: Birleşik altimetre 0.5°
+        'grid': {'resolution': 0.5, 'lat_range': (-89.75, 89.75), 'lon_range': (0.25, 359.75)}
     },
     'storm_high': {
         'name': 'TRMM/GPM TCPF',
@@ -51,7 +74,9 @@ DATASET_CONFIG = {
         'variable': 'rain_rate',
         'threshold': 20.0,  # mm/h
         'year_range': (1998, 2020),  # TRMM 1997'de başladı
-        'temporal': 'daily'
+        'temporal': 'daily',
+        # Doğal grid: TRMM 0.25° (50°S-50°N)
+        'grid': {'resolution': 0.25, 'lat_range': (-49.875, 49.875), 'lon_range': (-179.875, 179.875)}
     },
     'fog_low': {
         'name': 'MODIS AOD',
@@ -59,6 +84,8 @@ DATASET_CONFIG = {
         'variable': 'Optical_Depth_Land_And_Ocean',
         'threshold': 0.5,  # AOD
         'year_range': (2000, 2020),  # MODIS Terra 2000'de başladı
+        # MOD04_L2 2-B geokonumlu swath ürünüdür; sabit gridi olmadığından grid
+        # tanımı yoktur ve koordinatlar hücreye oturtulmaz
         'temporal': 'daily'
     },
     'sst_high': {
@@ -67,7 +94,9 @@ DATASET_CONFIG = {
         'variable': 'sst',
         'threshold': 25.0,  # °C
         'year_range': (1991, 2020),
-        'temporal': 'daily'
+        'temporal': 'daily',
+        # Doğal grid: OISST 0.25° (0-360 boylam)
+        'grid': {'resolution': 0.25, 'lat_range': (-89.875, 89.875), 'lon_range': (0.125, 359.875)}
     },
     'current_strong': {
         'name': 'OSCAR Surface Currents',
@@ -76,7 +105,9 @@ DATASET_CONFIG = {
         'derived': True,  # sqrt(u^2 + v^2)
         'threshold': 0.5,  # m/s
         'year_range': (1993, 2020),
-        'temporal': 'daily'
+        'temporal': 'daily',
+        # Doğal grid: OSCAR 0.25° (0-360 boylam)
+        'grid': {'resolution': 0.25, 'lat_range': (-89.75, 89.75), 'lon_range': (0.0, 359.75)}
     },
     'tide_high': {
         'name': 'TPXO9 Tide Model',
@@ -85,7 +116,9 @@ DATASET_CONFIG = {
         'derived': True,  # Harmonik hesaplama
         'threshold': 1.0,  # m
         'year_range': (1991, 2020),
-        'temporal': 'harmonic'  # Tidal model - zamansal değil
+        'temporal': 'harmonic',  # Tidal model - zamansal değil
+        # Doğal grid: TPXO9 atlas 1/30°
+        'grid': {'resolution': 1 / 30, 'lat_range': (-90 + 1 / 60, 90 - 1 / 60), 'lon_range': (1 / 60, 360 - 1 / 60)}
     },
     'ssha_high': {
         'name': 'MEaSUREs Gridded SSHA',
@@ -93,11 +126,66 @@ DATASET_CONFIG = {
         'variable': 'ssha',
         'threshold': 0.05,  # 5 cm = 0.05 m
         'year_range': (1993, 2020),
-        'temporal': '5day'
+        'temporal': '5day',
+        # Doğal grid: MEaSUREs 1/6° (80°S-80°N)
+        'grid': {'resolution': 1 / 6, 'lat_range': (-80 + 1 / 12, 80 - 1 / 12), 'lon_range': (1 / 12, 360 - 1 / 12)}
     }
 }
 
 
+# Tek okumada indirilecek en uzun zaman aralığı (adım sayısı); daha genişse
+# yalnızca hedef indeksler okunur
+SERIES_HYPERSLAB_LIMIT = 20000
+
+# Gün penceresi (window_days) üst sınırı: ±N gün havuzlanır
+MAX_WINDOW_DAYS = 15
+
+# Raster isteğinde olay başına izin verilen en fazla grid hücresi
+GRID_MAX_CELLS = int(os.environ.get('GRID_MAX_CELLS', 20000))
+
+# Çok noktalı okumada noktaları kapsayan kutu bu kadar değerden büyükse kutu
+# yerine vektörel noktasal seçim yapılır
+POINT_BLOCK_LIMIT = 2_000_000
+
+# Şablon URL'li veri setlerinde yıl bazlı dosyaları paralel çeken havuz.
+# Genişlik FETCH_YEAR_WORKERS ile ayarlanır (worker süreci başına).
+FETCH_YEAR_WORKERS = max(1, int(os.environ.get('FETCH_YEAR_WORKERS', 8)))
+YEAR_FETCH_EXECUTOR = ThreadPoolExecutor(max_workers=FETCH_YEAR_WORKERS,
+                                         thread_name_prefix='year-fetch')
+
+# calculate_probabilities içinde olayları paralel değerlendiren havuz
+FETCH_EVENT_WORKERS = max(1, int(os.environ.get('FETCH_EVENT_WORKERS', len(DATASET_CONFIG))))
+EVENT_EXECUTOR = ThreadPoolExecutor(max_workers=FETCH_EVENT_WORKERS,
+                                    thread_name_prefix='event-fetch')
+
+# Worker süreci başına aynı anda açık olabilecek en fazla uzak okuma.
+# Olay ve yıl paralelliği ne olursa olsun upstream yükü bu sınırı aşmaz.
+MAX_UPSTREAM_REQUESTS = max(1, int(os.environ.get('MAX_UPSTREAM_REQUESTS', 16)))
+UPSTREAM_SLOTS = threading.BoundedSemaphore(MAX_UPSTREAM_REQUESTS)
+
+# Süre bütçesi dolduktan sonra olayların toplanan yıllardan sonucu hesaplaması için ek süre
+DEADLINE_GRACE_SECONDS = 5.0
+
+# Worker belleğinde tutulan sıralı seriler (grid hücresi anahtarlı)
+SORTED_SERIES_CACHE = LRUCache(max_size=int(os.environ.get('SORTED_SERIES_CACHE_SIZE', 4096)))
+
+# Gelgit günlük maksimumunun arandığı zaman adımı (dakika); varsayılan saatlik
+TIDE_TIME_STEP_MINUTES = float(os.environ.get('TIDE_TIME_STEP_MINUTES', 60))
+if not 0 < TIDE_TIME_STEP_MINUTES <= 60:
+    raise ValueError(f"TIDE_TIME_STEP_MINUTES 0-60 aralığında olmalı: {TIDE_TIME_STEP_MINUTES}")
+
+# Hücre başına gelgit günlük maksimumu (tarihten bağımsız; url ve snap_to_grid hücresi anahtarlı)
+TIDAL_CACHE = LRUCache(max_size=int(os.environ.get('TIDAL_CACHE_SIZE', 65536)))
+
+# Olay bazında veri arka ucu (bkz. get_event_backend)
+DATA_BACKEND_NAMES = ('opendap', 'cube', 'mirror')
+EVENT_BACKENDS: Dict[str, str] = {}
+
+# Eşik: tek değer veya eşik listesi; sonuç: olasılık veya {eşik: olasılık}
+ThresholdSpec = Union[float, List[float]]
+EventResult = Optional[Union[float, Dict[str, float]]]
+
+
 def generate_synthetic_data(event: str, years: int = 30, target_prob: float = 0.3) -> np.ndarray:
     """
     Test için sentetik veri üretir.
@@ -143,275 +231,2270 @@ def calculate_current_speed(u: xr.DataArray, v: xr.DataArray) -> xr.DataArray:
     return np.sqrt(u**2 + v**2)
 
 
-def calculate_tidal_height(h_m2_real: xr.DataArray, h_m2_imag: xr.DataArray,
-                          h_s2_real: xr.DataArray, h_s2_imag: xr.DataArray,
-                          time_hours: float) -> float:
+def tidal_heights(h_m2_real: np.ndarray, h_m2_imag: np.ndarray,
+                  h_s2_real: np.ndarray, h_s2_imag: np.ndarray,
+                  time_hours: np.ndarray) -> np.ndarray:
     """
-    M2 ve S2 harmoniklerinden gelgit yüksekliğini hesaplar.
+    M2 ve S2 harmoniklerinden gelgit yüksekliklerini vektörel hesaplar.
+    
+    Bileşenler herhangi bir şekildeki dizi olabilir (nokta listesi, bölge
+    gridi); zaman ekseni broadcasting ile son eksene eklenir.
     
     Args:
         h_m2_real, h_m2_imag: M2 bileşeni (12.42 saat periyot)
         h_s2_real, h_s2_imag: S2 bileşeni (12.00 saat periyot)
-        time_hours: Gün içindeki saat
+        time_hours: Gün içindeki saat(ler)
         
     Returns:
-        Gelgit yüksekliği (m)
+        (bileşen şekli..., zaman) şeklinde gelgit yüksekliği (m)
     """
-    # M2 frekansı (rad/saat)
+    # M2 ve S2 frekansları (rad/saat)
     omega_m2 = 2 * np.pi / 12.42
-    # S2 frekansı (rad/saat)
     omega_s2 = 2 * np.pi / 12.00
+    hours = np.atleast_1d(np.asarray(time_hours, dtype=float))
     
     # Kompleks amplitüdler
-    h_m2 = complex(h_m2_real, h_m2_imag)
-    h_s2 = complex(h_s2_real, h_s2_imag)
+    h_m2 = np.asarray(h_m2_real, dtype=float) + 1j * np.asarray(h_m2_imag, dtype=float)
+    h_s2 = np.asarray(h_s2_real, dtype=float) + 1j * np.asarray(h_s2_imag, dtype=float)
     
     # Harmonik toplam
-    tide = abs(h_m2) * np.cos(omega_m2 * time_hours + np.angle(h_m2))
-    tide += abs(h_s2) * np.cos(omega_s2 * time_hours + np.angle(h_s2))
+    tide = np.abs(h_m2)[..., None] * np.cos(omega_m2 * hours + np.angle(h_m2)[..., None])
+    tide += np.abs(h_s2)[..., None] * np.cos(omega_s2 * hours + np.angle(h_s2)[..., None])
     
-    return float(tide)
+    return tide
 
 
-def fetch_event_data(event: str, lat: float, lon: float, month: int, day: int,
-                     use_synthetic: bool = False) -> np.ndarray:
+def calculate_tidal_height(h_m2_real: xr.DataArray, h_m2_imag: xr.DataArray,
+                          h_s2_real: xr.DataArray, h_s2_imag: xr.DataArray,
+                          time_hours: float) -> float:
     """
-    Belirli bir olay için 1991-2020 arası verileri çeker.
+    M2 ve S2 harmoniklerinden tek noktadaki gelgit yüksekliğini hesaplar.
     
     Args:
-        event: Olay tipi (örn: 'wind_high', 'rain_high')
-        lat: Enlem
-        lon: Boylam
-        month: Ay (1-12)
-        day: Gün (1-31)
-        use_synthetic: True ise sentetik veri kullanır
+        h_m2_real, h_m2_imag: M2 bileşeni (12.42 saat periyot)
+        h_s2_real, h_s2_imag: S2 bileşeni (12.00 saat periyot)
+        time_hours: Gün içindeki saat
         
     Returns:
-        Yıllık veri dizisi (NaN'ler filtrelenmiş)
+        Gelgit yüksekliği (m)
     """
-    if event not in DATASET_CONFIG:
-        raise ValueError(f"Geçersiz olay tipi: {event}. Desteklenen: {list(DATASET_CONFIG.keys())}")
+    return float(tidal_heights(h_m2_real, h_m2_imag, h_s2_real, h_s2_imag, time_hours).reshape(-1)[0])
+
+
+def tidal_daily_max(h_m2_real: np.ndarray, h_m2_imag: np.ndarray,
+                    h_s2_real: np.ndarray, h_s2_imag: np.ndarray) -> np.ndarray:
+    """
+    M2+S2 gelgitinin gün içindeki maksimumunu dizi halinde hesaplar.
     
-    config = DATASET_CONFIG[event]
-    year_start, year_end = config['year_range']
+    Gün TIDE_TIME_STEP_MINUTES adımlı zaman gridinde tek broadcasting
+    işlemiyle değerlendirilir (varsayılan saatlik: 24 adım).
     
-    logger.info(f"{event} için veri çekiliyor: lat={lat}, lon={lon}, tarih={month}/{day}")
+    Returns:
+        Bileşenlerle aynı şekilde günlük maksimum gelgit yüksekliği (m)
+    """
+    hours = np.arange(0, 24, TIDE_TIME_STEP_MINUTES / 60)
+    return tidal_heights(h_m2_real, h_m2_imag, h_s2_real, h_s2_imag, hours).max(axis=-1)
+
+
+def _tidal_points(event: str, config: Dict, url: str, source: str, lats, lons) -> np.ndarray:
+    """
+    Noktaların gelgit günlük maksimumunu TIDAL_CACHE üzerinden döner.
     
-    # Sentetik veri kullan
-    if use_synthetic:
-        logger.warning(f"{event} için sentetik veri kullanılıyor")
-        return generate_synthetic_data(event, years=year_end - year_start + 1)
+    Değer tarihten bağımsız olduğundan hücre başına bir kez hesaplanır.
+    Önbellek snap_to_grid hücresiyle anahtarlandığından tüm noktalar
+    önbellekteyse model hiç açılmaz; eksik hücrelerin bileşenleri tek
+    açılışta ve tek vektörel okumayla alınır.
+    
+    Args:
+        url: Model URL'i (önbellek anahtarı; yansıdan okunsa da aynı)
+        source: Okunacak kaynak (URL veya yerel yansı dosyası)
     
-    data_values = []
+    Returns:
+        Nokta başına günlük maksimum gelgit yüksekliği (m)
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    cells = [snap_to_grid(event, lat, lon) for lat, lon in zip(lats, lons)]
+    keys = [(url, TIDE_TIME_STEP_MINUTES, cell.row, cell.col) for cell in cells]
+    maxima = np.array([TIDAL_CACHE.get(key, np.nan) for key in keys], dtype=float)
     
-    for year in range(year_start, year_end + 1):
+    missing = np.flatnonzero(np.isnan(maxima))
+    if len(missing) == 0:
+        return maxima
+    
+    with open_event_dataset(config, source) as ds:
+        rows, cols = resolve_point_indices(ds, lats[missing], lons[missing])
+        # Aynı hücreye düşen noktalar bir kez okunur
+        unique, inverse = np.unique(np.stack([rows, cols]), axis=1, return_inverse=True)
+        components = [select_points(ds[name], unique[0], unique[1]) for name in config['variables']]
+        computed = tidal_daily_max(*components).reshape(-1)
+    
+    for index, value in zip(missing, computed[inverse.reshape(-1)]):
+        maxima[index] = value
+        # Kara hücreleri (NaN) önbelleğe alınmaz
+        if not np.isnan(value):
+            TIDAL_CACHE.set(keys[index], float(value))
+    
+    return maxima
+
+
+@contextmanager
+def open_event_dataset(config: Dict, url: str) -> Iterator[xr.Dataset]:
+    """
+    Olay için veri setini açar.
+    
+    Tek URL'li veri setleri (config['url']) süreç genelindeki handle havuzundan
+    paylaşılır; yıl bazlı şablon URL'ler her seferinde açılıp kapatılır.
+    Açma ve okuma süresince bir UPSTREAM_SLOTS kotası tutulur.
+    
+    Açılış DATASET_CATALOG üzerinden yapılır: kataloğa alınmış veri setlerinde
+    koordinat dizileri indirilmez ve alternatif değişken adları (örn. u10)
+    config'deki adlara çevrilir.
+    
+    Bulunamadığı bilinen URL'ler ve devresi açık host'lar UPSTREAM_GUARD
+    tarafından kota beklenmeden reddedilir (MissingDataset/UpstreamUnavailable).
+    
+    Yerel yansı dosyaları (bkz. event_source) kota ve devre kesici olmadan,
+    uzak gridden ayrı bir katalog kaydıyla açılır.
+    
+    Args:
+        config: DATASET_CONFIG girdisi
+        url: Açılacak OPeNDAP URL'si veya yansı dosyası yolu
+    """
+    local = DATASET_MIRROR.owns(url)
+    # Yansı bölge alt kümesidir; koordinatları uzak gridle ve diğer nesillerle aynı kayıtta tutulamaz
+    key = DATASET_MIRROR.catalog_key(url, catalog_key(config)) if local else catalog_key(config)
+    
+    def opener(target: str) -> xr.Dataset:
+        return DATASET_CATALOG.open(key, target, event_variables(config), with_time='url' in config)
+    
+    if local:
+        with _dataset_handle(config, url, opener) as ds:
+            yield ds
+        return
+    
+    UPSTREAM_GUARD.check(url)
+    try:
+        with UPSTREAM_SLOTS:
+            with _dataset_handle(config, url, opener) as ds:
+                yield ds
+    except (OSError, RuntimeError) as e:
+        # Açma/okuma hatası (netCDF4 DAP hataları OSError veya RuntimeError)
+        UPSTREAM_GUARD.failure(url, e)
+        raise
+    except Exception:
+        # Veri seviyesindeki hatalar (eksik değişken, geçersiz tarih): sunucu yanıt verdi
+        UPSTREAM_GUARD.success(url)
+        raise
+    else:
+        UPSTREAM_GUARD.success(url)
+
+
+@contextmanager
+def _dataset_handle(config: Dict, url: str, opener) -> Iterator[xr.Dataset]:
+    """Tek URL'li veri setlerinde havuzdaki handle'ı, diğerlerinde yeni açılan veri setini verir."""
+    if 'url' in config:
+        with DATASET_POOL.dataset(url, opener=opener) as ds:
+            yield ds
+    else:
+        ds = opener(url)
         try:
-            # URL oluştur
-            if 'url_template' in config:
-                url = config['url_template'].format(
-                    year=year, month=month, day=day,
-                    doy=datetime(year, month, day).timetuple().tm_yday
-                )
-            else:
-                url = config['url']
-            
-            logger.debug(f"URL açılıyor: {url}")
-            
-            # Dataset aç
-            ds = xr.open_dataset(url, engine='netcdf4')
-            
-            # Zaman dilimi oluştur
-            if config['temporal'] == 'harmonic':
-                # Gelgit modeli - zamansal değil, anlık hesaplama
-                if event == 'tide_high':
-                    # Harmonik bileşenleri al
-                    h_m2_r = ds['h_m2_real'].sel(lat=lat, lon=lon, method='nearest').values
-                    h_m2_i = ds['h_m2_imag'].sel(lat=lat, lon=lon, method='nearest').values
-                    h_s2_r = ds['h_s2_real'].sel(lat=lat, lon=lon, method='nearest').values
-                    h_s2_i = ds['h_s2_imag'].sel(lat=lat, lon=lon, method='nearest').values
-                    
-                    # Gün içinde 24 farklı saat için hesapla (maksimum gelgit)
-                    tide_values = []
-                    for hour in range(24):
-                        tide_height = calculate_tidal_height(h_m2_r, h_m2_i, h_s2_r, h_s2_i, hour)
-                        tide_values.append(tide_height)
-                    
-                    value = np.max(tide_values)  # Günün maksimum gelgiti
-            else:
-                # Zamansal veri - belirli tarihi seç
-                time_str = f"{year}-{month:02d}-{day:02d}"
-                
-                # Konum subset'i
-                if config.get('derived', False):
-                    # Türetilmiş değişken (rüzgar/akıntı hızı)
-                    variables = config['variables']
-                    
-                    if event in ['wind_high', 'current_strong']:
-                        # u ve v bileşenlerini al
-                        try:
-                            u = ds[variables[0]].sel(lat=lat, lon=lon, time=time_str, method='nearest')
-                            v = ds[variables[1]].sel(lat=lat, lon=lon, time=time_str, method='nearest')
-                            
-                            if event == 'wind_high':
-                                value = float(calculate_wind_speed(u, v).values)
-                            else:  # current_strong
-                                value = float(calculate_current_speed(u, v).values)
-                        except KeyError:
-                            # Alternatif değişken isimleri dene
-                            var_names = list(ds.data_vars)
-                            logger.debug(f"Mevcut değişkenler: {var_names}")
-                            raise
-                else:
-                    # Doğrudan değişken
-                    var_name = config['variable']
-                    data_subset = ds[var_name].sel(
-                        lat=lat, lon=lon, time=time_str, method='nearest'
-                    )
-                    value = float(data_subset.values)
-            
-            # NaN kontrolü
-            if not np.isnan(value):
-                data_values.append(value)
-                logger.debug(f"{year}: {value:.3f}")
-            else:
-                logger.debug(f"{year}: NaN (atlandı)")
-            
+            yield ds
+        finally:
             ds.close()
-            
-        except Exception as e:
-            logger.error(f"{year} için veri çekme hatası ({event}): {str(e)}")
-            # Hata durumunda devam et
-            continue
-    
-    if len(data_values) == 0:
-        logger.warning(f"{event} için hiç veri bulunamadı, sentetik veri kullanılıyor")
-        return generate_synthetic_data(event, years=year_end - year_start + 1)
+
+
+def event_source(event: str, url: str, lats, lons) -> str:
+    """
+    Olay verisinin okunacağı kaynak.
     
-    return np.array(data_values)
+    Mirror arka ucu seçili olaylarda, URL yansıda varsa ve yansı bölgesi
+    noktaları kapsıyorsa yerel dosya; aksi halde URL (OPeNDAP).
+    """
+    if get_event_backend(event) == 'mirror':
+        path = DATASET_MIRROR.local(event, url, lats, lons)
+        if path is not None:
+            return path
+        logger.debug(f"{event} yansıda yok veya kapsam dışında, OPeNDAP kullanılacak: {url}")
+    return url
 
 
-def calculate_empirical_probability(data: np.ndarray, threshold: float) -> float:
+def catalog_key(config: Dict) -> str:
+    """Katalog anahtarı: aynı gridi paylaşan dosyalar için URL şablonu, değilse URL."""
+    return config.get('url_template') or config['url']
+
+
+def event_variables(config: Dict) -> List[str]:
+    """Olayın okuduğu değişken adları."""
+    return list(config['variables']) if 'variables' in config else [config['variable']]
+
+
+def is_single_aggregation(config: Dict) -> bool:
+    """Tüm yılların tek bir OPeNDAP aggregation'ında bulunduğu günlük veri setleri (GPCP, OISST)."""
+    return 'url' in config and config['temporal'] == 'daily'
+
+
+def fetch_series_values(ds: xr.Dataset, var_name: str, lat: float, lon: float,
+                        dates: List[datetime]) -> np.ndarray:
     """
-    Empirik olasılık hesaplar.
+    Bir noktanın birden çok tarihteki değerlerini tek okumada çeker.
+    
+    Hedef tarihler önce zaman indekslerine çözülür (en yakın zaman adımı),
+    ardından bu indeksleri kapsayan tek bir hyperslab indirilip değerler
+    yerelde seçilir. Aralık çok genişse seçili indeksler tek bir fancy-index
+    okumasıyla alınır.
     
     Args:
-        data: Veri dizisi (NaN'ler zaten filtrelenmiş)
-        threshold: Eşik değeri
+        ds: Açık veri seti
+        var_name: Değişken adı
+        lat: Enlem
+        lon: Boylam
+        dates: Hedef tarihler
         
     Returns:
-        Olasılık (0-1 arası)
+        Tarihlerle aynı sırada değer dizisi (NaN'ler dahil)
     """
-    if len(data) == 0:
-        logger.warning("Boş veri dizisi, olasılık 0.0")
-        return 0.0
+    return fetch_points_values(ds, var_name, [lat], [lon], dates)[:, 0]
+
+
+def resolve_point_indices(ds: xr.Dataset, lats, lons) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Noktaları veri setinin en yakın lat/lon indekslerine çözer.
     
-    # Threshold'u aşan veri sayısı
-    exceeds = np.sum(data > threshold)
-    total = len(data)
+    Returns:
+        (satır indeksleri, sütun indeksleri)
+    """
+    try:
+        rows = nearest_indices(ds.indexes['lat'].values, np.asarray(lats, dtype=float))
+        cols = nearest_indices(ds.indexes['lon'].values, np.asarray(lons, dtype=float))
+    except (KeyError, ValueError, IndexError) as e:
+        raise KeyError(f"Konum indeksi çözülemedi: {e}")
+    return rows, cols
+
+
+def resolve_time_indices(ds: xr.Dataset, dates: List[datetime]) -> np.ndarray:
+    """
+    Tarihleri veri setinin en yakın zaman adımı indekslerine çözer.
     
-    probability = exceeds / total
+    Returns:
+        Tarihlerle aynı sırada zaman indeksleri
+    """
+    try:
+        return nearest_indices(ds.indexes['time'].values, np.array(dates, dtype='datetime64[ns]'))
+    except (KeyError, ValueError, IndexError, TypeError) as e:
+        raise KeyError(f"Zaman indeksi çözülemedi: {e}")
+
+
+def _point_selection(obj, rows: np.ndarray, cols: np.ndarray):
+    """
+    Noktaları kapsayan tembel (lazy) seçimi kurar.
     
-    logger.info(f"Empirik olasılık: {exceeds}/{total} = {probability:.4f}")
+    Kutu POINT_BLOCK_LIMIT değerden küçükse lat/lon dilimi ve kutu içi yerel
+    indeksler, değilse 'points' boyutlu vektörel seçim ve None döner.
+    """
+    r0, r1 = int(rows.min()), int(rows.max()) + 1
+    c0, c1 = int(cols.min()), int(cols.max()) + 1
+    other = int(np.prod([size for dim, size in obj.sizes.items() if dim not in ('lat', 'lon')]))
+    if isinstance(obj, xr.Dataset):
+        other *= len(obj.data_vars)
     
-    return float(probability)
+    if (r1 - r0) * (c1 - c0) * other <= POINT_BLOCK_LIMIT:
+        return obj.isel(lat=slice(r0, r1), lon=slice(c0, c1)), (rows - r0, cols - c0)
+    
+    return obj.isel(lat=xr.DataArray(rows, dims='points'), lon=xr.DataArray(cols, dims='points')), None
 
 
-def calculate_probabilities(lat: float, lon: float, month: int, day: int,
-                           events: List[str],
-                           thresholds: Optional[Dict[str, float]] = None,
-                           use_synthetic: bool = False) -> Dict[str, float]:
+def _points_array(da: xr.DataArray, local) -> np.ndarray:
+    """_point_selection sonucundaki değişkeni (diğer boyutlar..., nokta) dizisine çevirir."""
+    if local is None:
+        return np.asarray(da.transpose(..., 'points').values, dtype=float)
+    return np.asarray(da.transpose(..., 'lat', 'lon').values, dtype=float)[..., local[0], local[1]]
+
+
+def select_points(da: xr.DataArray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
     """
-    NASA EarthData'dan belirli konum ve tarih için olay olasılıklarını hesaplar.
+    Bir değişkenden birden çok noktayı tek okumada seçer.
+    
+    Noktaları kapsayan lat/lon kutusu POINT_BLOCK_LIMIT değerden küçükse tek
+    hyperslab olarak indirilip noktalar yerelde seçilir; değilse tek bir
+    vektörel noktasal seçim (isel ile 'points' boyutu) yapılır.
     
-    Args:
-        lat: Enlem (-90 ile 90 arası)
-        lon: Boylam (-180 ile 180 arası)
-        month: Ay (1-12)
-        day: Gün (1-31)
-        events: Hesaplanacak olay listesi (örn: ['wind_high', 'rain_high'])
-        thresholds: Özel eşik değerleri (opsiyonel, varsayılan değerleri override eder)
-        use_synthetic: True ise sentetik test verisi kullanır
-        
     Returns:
-        Olay olasılıklarını içeren dictionary (örn: {'wind_high': 0.25, 'rain_high': 0.15})
-        
-    Raises:
-        ValueError: Geçersiz parametreler için
-        
-    Örnek:
-        >>> probs = calculate_probabilities(
-        ...     lat=40.0, lon=30.0, month=7, day=15,
-        ...     events=['wind_high', 'sst_high'],
-        ...     thresholds={'wind_high': 12.0}  # Özel threshold
-        ... )
-        >>> print(probs)
-        {'wind_high': 0.23, 'sst_high': 0.67}
+        (diğer boyutlar..., nokta) şeklinde dizi
     """
-    # Parametre validasyonu
-    if not (-90 <= lat <= 90):
-        raise ValueError(f"Enlem -90 ile 90 arası olmalı: {lat}")
+    selection, local = _point_selection(da, rows, cols)
+    return _points_array(selection, local)
+
+
+def select_vector_points(ds: xr.Dataset, names: List[str], rows: np.ndarray,
+                         cols: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Vektör bileşenlerini (u, v) aynı kısıtlı seçimle birlikte okur.
     
-    if not (-180 <= lon <= 180):
-        raise ValueError(f"Boylam -180 ile 180 arası olmalı: {lon}")
+    Bileşenler tek Dataset alt kümesi olarak seçilip bir kez yüklenir; böylece
+    aynı zaman/konum kısıtı iki ayrı seçim yerine tek yüklemede uygulanır.
     
-    if not (1 <= month <= 12):
-        raise ValueError(f"Ay 1 ile 12 arası olmalı: {month}")
+    Returns:
+        Bileşen başına (diğer boyutlar..., nokta) şeklinde diziler
+    """
+    selection, local = _point_selection(ds[list(names)], rows, cols)
+    selection = selection.load()
+    return tuple(_points_array(selection[name], local) for name in names)
+
+
+def fetch_points_values(ds: xr.Dataset, var_name: str, lats, lons,
+                        dates: List[datetime]) -> np.ndarray:
+    """
+    Birden çok noktanın birden çok tarihteki değerlerini tek okumada çeker.
     
-    if not (1 <= day <= 31):
-        raise ValueError(f"Gün 1 ile 31 arası olmalı: {day}")
+    fetch_series_values'un çok noktalı hali: zaman indeksleri aynı şekilde
+    çözülür, konumlar select_points ile tek okumada seçilir.
     
-    if not events:
-        raise ValueError("En az bir olay belirtilmeli")
+    Returns:
+        (tarih, nokta) şeklinde değer dizisi (NaN'ler dahil)
+    """
+    if not dates:
+        return np.empty((0, len(lats)), dtype=float)
     
-    # Threshold'ları hazırla
-    if thresholds is None:
-        thresholds = {}
+    indices = resolve_time_indices(ds, dates)
     
-    logger.info("="*70)
-    logger.info(f"Olasılık Hesaplama Başladı")
-    logger.info(f"Konum: ({lat}, {lon}), Tarih: {month}/{day}")
-    logger.info(f"Olaylar: {events}")
-    logger.info(f"Sentetik veri: {use_synthetic}")
-    logger.info("="*70)
+    rows, cols = resolve_point_indices(ds, lats, lons)
+    start, stop = int(indices.min()), int(indices.max()) + 1
     
-    results = {}
+    if stop - start <= SERIES_HYPERSLAB_LIMIT:
+        block = select_points(ds[var_name].isel(time=slice(start, stop)), rows, cols)
+        return block[indices - start]
     
-    for event in events:
-        logger.info(f"\n--- {event} işleniyor ---")
-        
+    return select_points(ds[var_name].isel(time=indices), rows, cols)
+
+
+def effective_window_days(event: str, window_days: int) -> int:
+    """
+    Olay için uygulanan gün penceresi.
+    
+    Zaman adımı günden uzun (aylık CCMP, 5 günlük SSHA) veya tarihten bağımsız
+    (gelgit) veri setlerinde pencere içindeki tarihler aynı zaman adımına düşer;
+    aynı değer 2·N+1 kez sayılmasın diye pencere uygulanmaz (0).
+    """
+    return window_days if DATASET_CONFIG[event]['temporal'] == 'daily' else 0
+
+
+def window_dates(config: Dict, month: int, day: int, window_days: int = 0) -> List[datetime]:
+    """
+    Veri dönemindeki her yıl için hedef gün ve ±window_days çevresindeki tarihler.
+    
+    Hedef tarihi geçersiz olan yıllar (örn. artık olmayan yılda 29 Şubat) ve
+    veri döneminin dışına taşan tarihler atlanır.
+    
+    Returns:
+        Yıl, ardından gün sırasıyla tarihler
+    """
+    year_start, year_end = config['year_range']
+    first, last = datetime(year_start, 1, 1), datetime(year_end, 12, 31)
+    
+    dates = []
+    for year in range(year_start, year_end + 1):
         try:
-            # Threshold belirle
-            default_threshold = DATASET_CONFIG[event]['threshold']
-            threshold = thresholds.get(event, default_threshold)
-            logger.info(f"Threshold: {threshold} (varsayılan: {default_threshold})")
-            
-            # Veriyi çek
-            data = fetch_event_data(event, lat, lon, month, day, use_synthetic)
-            
-            # NaN'leri filtrele (fetch_event_data zaten yapıyor ama emin olmak için)
-            data = data[~np.isnan(data)]
-            
-            logger.info(f"Toplam veri noktası: {len(data)}")
-            if len(data) > 0:
-                logger.info(f"İstatistikler - Min: {np.min(data):.3f}, "
-                          f"Max: {np.max(data):.3f}, Mean: {np.mean(data):.3f}, "
-                          f"Std: {np.std(data):.3f}")
-            
-            # Olasılık hesapla
-            probability = calculate_empirical_probability(data, threshold)
-            results[event] = round(probability, 4)
-            
-            logger.info(f"✓ {event}: {probability:.4f}")
+            target = datetime(year, month, day)
+        except ValueError:
+            logger.debug(f"{year}: geçersiz tarih {month}/{day} (atlandı)")
+            continue
+        for offset in range(-window_days, window_days + 1):
+            date = target + timedelta(days=offset)
+            if first <= date <= last:
+                dates.append(date)
+    return dates
+
+
+def event_url(config: Dict, date: datetime) -> str:
+    """Olayın verilen tarihi içeren dosyasının URL'si."""
+    if 'url_template' in config:
+        return config['url_template'].format(
+            year=date.year, month=date.month, day=date.day,
+            doy=date.timetuple().tm_yday
+        )
+    return config['url']
+
+
+def _fetch_aggregation_points(event: str, config: Dict, lats, lons,
+                              dates: List[datetime]) -> np.ndarray:
+    """
+    Tek aggregation'lı veri setinde tüm tarihleri ve noktaları tek okumada çeker.
+    
+    Returns:
+        (tarih, nokta) şeklinde değer dizisi (NaN'ler dahil)
+    """
+    with open_event_dataset(config, event_source(event, config['url'], lats, lons)) as ds:
+        values = fetch_points_values(ds, config['variable'], lats, lons, dates)
+    
+    logger.debug(f"{event}: {len(dates)} tarih x {len(lats)} nokta tek okumada çekildi")
+    return values
+
+
+def _fetch_file_values(event: str, config: Dict, url: str, lats, lons,
+                       dates: List[datetime]) -> np.ndarray:
+    """
+    Tek bir dosyadan olay değerlerini birden çok tarih ve noktada çeker.
+    
+    Dosya bir kez açılır; aynı dosyaya düşen tüm tarihler ve noktalar tek
+    okumada seçilir.
+    
+    Returns:
+        (tarih, nokta) şeklinde değerler (eksik veri için NaN)
+        
+    Raises:
+        Exception: URL açma veya okuma hatalarında (çağıran dosya bazında yakalar)
+    """
+    logger.debug(f"URL açılıyor: {url}")
+    
+    values = np.full((len(dates), len(lats)), np.nan)
+    
+    # Dataset aç (tek URL'li veri setleri havuzdan gelir; mirror arka ucunda yerel dosya)
+    source = event_source(event, url, lats, lons)
+    
+    if config['temporal'] == 'harmonic':
+        # Gelgit modeli - zamansal değil, günün (saatlik) maksimum gelgiti her tarih için aynı;
+        # önbellekte olmayan hücre varsa model açılır
+        if event == 'tide_high':
+            values[:] = _tidal_points(event, config, url, source, lats, lons)
+        return values
+    
+    with open_event_dataset(config, source) as ds:
+        rows, cols = resolve_point_indices(ds, lats, lons)
+        
+        # Zamansal veri - tarihler en yakın zaman adımı indekslerine çözülür
+        times = resolve_time_indices(ds, dates)
+        
+        if config.get('derived', False):
+            # Türetilmiş değişken (rüzgar/akıntı hızı)
+            variables = config['variables']
             
-        except Exception as e:
-            logger.error(f"✗ {event} için hata: {str(e)}", exc_info=True)
-            results[event] = None
+            if event in ['wind_high', 'current_strong']:
+                # u ve v bileşenleri tek kısıtlı okumayla, hız NumPy üzerinde
+                try:
+                    u, v = select_vector_points(ds[variables[:2]].isel(time=times),
+                                                variables[:2], rows, cols)
+                except KeyError:
+                    # Alternatif değişken isimleri dene
+                    var_names = list(ds.data_vars)
+                    logger.debug(f"Mevcut değişkenler: {var_names}")
+                    raise
+                
+                values = np.hypot(u, v).reshape(len(dates), len(lats))
+        else:
+            # Doğrudan değişken
+            var_name = config['variable']
+            data_subset = ds[var_name].isel(time=times)
+            values = select_points(data_subset, rows, cols).reshape(len(dates), len(lats))
     
-    logger.info("="*70)
-    logger.info(f"Hesaplama Tamamlandı - Sonuçlar: {results}")
-    logger.info("="*70)
+    return values
+
+
+def get_event_backend(event: str) -> str:
+    """
+    Olayın veri arka ucunu döner.
     
-    return results
+    DATA_BACKENDS ortam değişkeni olay bazında arka uç seçer
+    (örn. 'sst_high=cube,rain_high=mirror' veya tümü için '*=cube').
+    'mirror' nokta serilerini `mirror` komutuyla indirilen yerel dosyalardan okur.
+    
+    Returns:
+        'opendap' (varsayılan), 'cube' veya 'mirror'
+    """
+    return EVENT_BACKENDS.get(event, EVENT_BACKENDS.get('*', 'opendap'))
+
+
+def _parse_backends(spec: str) -> Dict[str, str]:
+    """'olay=arka_uç,...' biçimindeki ayarı sözlüğe çevirir."""
+    backends = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        event, _, backend = item.partition('=')
+        backend = backend.strip()
+        if backend not in DATA_BACKEND_NAMES:
+            raise ValueError(f"Geçersiz arka uç: {item}. Desteklenen: {DATA_BACKEND_NAMES}")
+        backends[event.strip()] = backend
+    return backends
+
+
+EVENT_BACKENDS.update(_parse_backends(os.environ.get('DATA_BACKENDS', '')))
+
+
+class GridCell(NamedTuple):
+    """Bir isteğin veri setinin doğal gridinde düştüğü hücre."""
+    row: Optional[int]
+    col: Optional[int]
+    lat: float          # Hücre merkezi enlemi
+    lon: float          # Hücre merkezi boylamı (-180/180)
+    native_lon: float   # Hücre merkezi boylamı (veri setinin konvansiyonunda)
+
+
+def to_native_lon(config: Dict, lon: float) -> float:
+    """-180/180 boylamı veri setinin boylam konvansiyonuna (0-360 veya -180/180) çevirir."""
+    grid = config.get('grid')
+    if grid is not None and grid['lon_range'][1] > 180:
+        return lon % 360
+    return (lon + 180) % 360 - 180
+
+
+def gridded_events() -> List[str]:
+    """Sabit grid tanımı olan olaylar (bölge küpü, klimatoloji ve yansı oluşturulabilir)."""
+    return [event for event, config in DATASET_CONFIG.items() if 'grid' in config]
+
+
+def _grid_shape(grid: Dict) -> Tuple[int, int]:
+    """Grid tanımından (enlem, boylam) hücre sayılarını hesaplar."""
+    resolution = grid['resolution']
+    n_lat = int(round((grid['lat_range'][1] - grid['lat_range'][0]) / resolution)) + 1
+    n_lon = int(round((grid['lon_range'][1] - grid['lon_range'][0]) / resolution)) + 1
+    return n_lat, n_lon
+
+
+def snap_to_grid(event: str, lat: float, lon: float) -> GridCell:
+    """
+    Koordinatı olayın veri setindeki en yakın grid hücresine oturtur.
+    
+    `.sel(method='nearest')` aynı hücreye düşen tüm koordinatlar için aynı veriyi
+    okur; bu yüzden önbellekler ham koordinat yerine hücre indeksini anahtar
+    olarak kullanır. 0-360 boylamlı veri setlerinde negatif boylamlar da
+    doğru hücreye çevrilir.
+    
+    Args:
+        event: Olay tipi
+        lat: Enlem
+        lon: Boylam (-180 ile 180 arası)
+        
+    Returns:
+        GridCell (grid tanımı olmayan olaylarda row/col None, koordinat aynen döner)
+    """
+    config = DATASET_CONFIG[event]
+    grid = config.get('grid')
+    if grid is None:
+        return GridCell(None, None, lat, lon, lon)
+    
+    resolution = grid['resolution']
+    lat_first = grid['lat_range'][0]
+    lon_first = grid['lon_range'][0]
+    n_lat, n_lon = _grid_shape(grid)
+    
+    # Boylamı veri setinin konvansiyonuna çevir
+    native_lon = to_native_lon(config, lon)
+    
+    # Hücre sınırındaki koordinatlar her zaman üst hücreye yuvarlanır (round() çift sayıya yuvarlar)
+    row = min(max(math.floor((lat - lat_first) / resolution + 0.5), 0), n_lat - 1)
+    col = math.floor((native_lon - lon_first) / resolution + 0.5)
+    if abs(n_lon * resolution - 360) < resolution / 2:
+        col %= n_lon  # Küresel grid: boylamda sarmal
+    else:
+        col = min(max(col, 0), n_lon - 1)
+    
+    cell_lat = round(lat_first + row * resolution, 6)
+    cell_native_lon = round(lon_first + col * resolution, 6)
+    cell_lon = cell_native_lon - 360 if cell_native_lon > 180 else cell_native_lon
+    
+    return GridCell(row, col, cell_lat, round(cell_lon, 6), cell_native_lon)
+
+
+def series_cache_key(event: str, cell: GridCell, month: int, day: int, window_days: int = 0) -> str:
+    """
+    Olay serisinin önbellek anahtarını üretir.
+    
+    Anahtar (olay, grid hücresi, ay, gün, yıl aralığı, uygulanan gün penceresi)
+    içerir; aynı hücreye düşen tüm koordinatlar aynı anahtarı paylaşır.
+    """
+    year_start, year_end = DATASET_CONFIG[event]['year_range']
+    window_days = effective_window_days(event, window_days)
+    if cell.row is None:
+        location = f"{cell.lat:.4f},{cell.lon:.4f}"
+    else:
+        location = f"r{cell.row}c{cell.col}"
+    key = f"{event}|{location}|{month:02d}-{day:02d}|{year_start}-{year_end}"
+    if window_days:
+        key += f"|w{window_days}"
+    if DATASET_CONFIG[event]['temporal'] == 'harmonic' and TIDE_TIME_STEP_MINUTES != 60:
+        # Farklı zaman adımıyla hesaplanan günlük maksimumlar ayrı saklanır
+        key += f"|t{TIDE_TIME_STEP_MINUTES:g}"
+    return key
+
+
+def remaining_time(deadline: Optional[float]) -> Optional[float]:
+    """Süre bütçesinin kalanı (saniye, en az 0); bütçe yoksa None."""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def sample_count(event: str, window_days: int = 0) -> int:
+    """Olay serisinin beklenen örnek sayısı (yıl sayısı x pencere genişliği)."""
+    year_start, year_end = DATASET_CONFIG[event]['year_range']
+    return (year_end - year_start + 1) * (2 * effective_window_days(event, window_days) + 1)
+
+
+def fetch_event_data(event: str, lat: float, lon: float, month: int, day: int,
+                     use_synthetic: bool = False, window_days: int = 0,
+                     deadline: Optional[float] = None) -> np.ndarray:
+    """
+    Belirli bir olay için 1991-2020 arası verileri çeker.
+    
+    Args:
+        event: Olay tipi (örn: 'wind_high', 'rain_high')
+        lat: Enlem
+        lon: Boylam
+        month: Ay (1-12)
+        day: Gün (1-31)
+        use_synthetic: True ise sentetik veri kullanır
+        window_days: Her yıldan hedef günün ±window_days çevresi de havuzlanır
+        deadline: time.monotonic() cinsinden süre bütçesi sonu; dolunca bekleyen
+            yıl okumaları iptal edilir ve toplanan yıllar döner
+        
+    Returns:
+        Yıllık veri dizisi (NaN'ler filtrelenmiş)
+        
+    Not:
+        Eksiksiz okunan gerçek veri serileri SERIES_CACHE'e yazılır ve sonraki
+        isteklerde ağa çıkmadan döner. Sentetik veri önbelleğe alınmaz.
+    """
+    if event not in DATASET_CONFIG:
+        raise ValueError(f"Geçersiz olay tipi: {event}. Desteklenen: {list(DATASET_CONFIG.keys())}")
+    
+    config = DATASET_CONFIG[event]
+    year_start, year_end = config['year_range']
+    
+    logger.info(f"{event} için veri çekiliyor: lat={lat}, lon={lon}, tarih={month}/{day}")
+    
+    # Sentetik veri kullan
+    if use_synthetic:
+        logger.warning(f"{event} için sentetik veri kullanılıyor")
+        return generate_synthetic_data(event, years=sample_count(event, window_days))
+    
+    values, _ = _fetch_event_series(event, lat, lon, month, day, window_days, deadline)
+    return values
+
+
+def _fetch_event_series(event: str, lat: float, lon: float, month: int, day: int,
+                        window_days: int = 0, deadline: Optional[float] = None) -> Tuple[np.ndarray, bool]:
+    """
+    Gerçek veri serisini önbellekten veya uzak veri setlerinden getirir.
+    
+    Returns:
+        (NaN'ler filtrelenmiş değerler, seri eksiksiz gerçek veri ise True).
+        False dönen seriler (eksik yıllar veya sentetik yedek) önbelleğe alınmamalı.
+    """
+    config = DATASET_CONFIG[event]
+    year_start, year_end = config['year_range']
+    
+    # Koordinatı veri setinin doğal grid hücresine oturt
+    cell = snap_to_grid(event, lat, lon)
+    logger.debug(f"{event} grid hücresi: ({cell.lat}, {cell.lon}) [{cell.row}, {cell.col}]")
+    
+    cache_key = series_cache_key(event, cell, month, day, window_days)
+    local = _local_series(event, cell, month, day, cache_key, window_days)
+    if local is not None:
+        return local, True
+    
+    # Aynı seriyi isteyen eşzamanlı çağrılar tek uzak okumada birleştirilir. Eksik
+    # (süre bütçesi dolan) seri paylaşılmaz; bekleyenler kendi bütçeleriyle yeniden çeker.
+    try:
+        (values, complete), shared = SINGLE_FLIGHT.do(
+            cache_key,
+            lambda: _fetch_and_cache_series(event, config, cell, month, day, cache_key,
+                                            window_days, deadline),
+            timeout=remaining_time(deadline),
+            shareable=lambda result: result[1]
+        )
+    except TimeoutError:
+        logger.warning(f"{event}: süre bütçesi devam eden okumayı beklerken doldu")
+        values, complete, shared = np.array([]), False, False
+    if shared:
+        # Paylaşılan dizi çağıranlar arasında değiştirilmesin
+        values = values.copy()
+    
+    if len(values) == 0:
+        logger.warning(f"{event} için hiç veri bulunamadı, sentetik veri kullanılıyor")
+        return generate_synthetic_data(event, years=sample_count(event, window_days)), False
+    
+    return values, complete
+
+
+def _local_series(event: str, cell: GridCell, month: int, day: int,
+                  cache_key: str, window_days: int = 0) -> Optional[np.ndarray]:
+    """
+    Seriyi ağa çıkmadan yerel kaynaklardan okur.
+    
+    Küp arka ucu seçiliyse önce bellek eşlemeli küpe, ardından kalıcı seri
+    önbelleğine bakar. Küpler tek gün serisi tuttuğundan gün penceresi
+    istenirse yalnızca seri önbelleği kullanılır.
+    
+    Returns:
+        NaN'leri filtrelenmiş değerler; yerelde yoksa None
+    """
+    # Küp arka ucu: bellek eşlemeli küpten doğrudan dilim (kapsam dışındaysa OPeNDAP)
+    if get_event_backend(event) == 'cube' and effective_window_days(event, window_days) == 0:
+        values = CLIMATOLOGY_CUBES.series(event, cell.row, cell.col, day_of_year(month, day))
+        if values is not None and len(values) > 0:
+            logger.info(f"{event} küpten okundu ({len(values)} değer)")
+            return values
+        logger.debug(f"{event} küp kapsamında değil, OPeNDAP kullanılacak")
+    
+    # Kalıcı önbellek (1991-2020 verisi değişmez)
+    cached = SERIES_CACHE.get(cache_key)
+    if cached is not None:
+        logger.info(f"{event} önbellekten okundu ({len(cached)} değer)")
+    return cached
+
+
+def _fetch_and_cache_series(event: str, config: Dict, cell: GridCell, month: int, day: int,
+                            cache_key: str, window_days: int = 0,
+                            deadline: Optional[float] = None) -> Tuple[np.ndarray, bool]:
+    """
+    Seriyi süreçler arası kilit altında uzak veri setlerinden çeker ve önbelleğe yazar.
+    
+    Kilidi bekleyen worker, kilidi aldığında önbelleği yeniden kontrol eder;
+    seri bu sırada başka bir worker tarafından yazıldıysa ağa çıkmaz.
+    """
+    with FILE_LOCKS.hold(cache_key, timeout=remaining_time(deadline)):
+        cached = SERIES_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info(f"{event} başka bir worker tarafından önbelleğe yazıldı ({len(cached)} değer)")
+            return cached, True
+        
+        values, complete = _fetch_remote_values(event, config, cell.lat, cell.native_lon, month, day,
+                                                window_days, deadline)
+        
+        # Hata alan yıl olduysa seri eksiktir; önbelleğe alma, sonraki istekte yeniden dene
+        if complete and len(values) > 0:
+            SERIES_CACHE.put(cache_key, values)
+    
+    return values, complete
+
+
+def _fetch_remote_values(event: str, config: Dict, lat: float, lon: float,
+                         month: int, day: int, window_days: int = 0,
+                         deadline: Optional[float] = None) -> Tuple[np.ndarray, bool]:
+    """
+    Olayın yıllık değerlerini uzak veri setlerinden çeker.
+    
+    Returns:
+        (NaN'ler filtrelenmiş değerler, tüm dosyalar hatasız okunduysa True)
+    """
+    values, complete = _fetch_remote_points(event, config, [lat], [lon], month, day, window_days, deadline)
+    values = values[:, 0]
+    return values[~np.isnan(values)], complete
+
+
+def _fetch_remote_points(event: str, config: Dict, lats, lons, month: int, day: int,
+                         window_days: int = 0, deadline: Optional[float] = None) -> Tuple[np.ndarray, bool]:
+    """
+    Olayın yıllık değerlerini birden çok noktada uzak veri setlerinden çeker.
+    
+    window_days > 0 ise her yıldan hedef günün ±window_days çevresi havuzlanır.
+    Tek aggregation'lı veri setlerinde tüm tarihler tek bitişik zaman dilimi
+    okumasından seçilir; dosya bazlı veri setlerinde her dosya bir kez açılır ve
+    dosyalar paralel çekilir. deadline dolduğunda henüz bitmemiş dosya okumaları
+    iptal edilir ve o ana kadar toplanan tarihler eksik (complete=False) döner.
+    
+    Returns:
+        ((tarih, nokta) şeklinde değerler (NaN'ler dahil), tüm dosyalar hatasız okunduysa True)
+    """
+    # Günden uzun zaman adımlı ve harmonik veri setlerinde pencere aynı değeri tekrarlar
+    dates = window_dates(config, month, day, effective_window_days(event, window_days))
+    
+    # Tek aggregation'lı günlük veri setleri: tüm tarihler tek okumada
+    if is_single_aggregation(config):
+        try:
+            return _fetch_aggregation_points(event, config, lats, lons, dates), True
+        except Exception as e:
+            logger.error(f"{event} için toplu seri okuma hatası, dosya dosya denenecek: {str(e)}")
+    
+    # Aynı dosyaya düşen tarihler (örn. aylık dosyalar) tek açılışta okunur
+    files: Dict[str, List[datetime]] = {}
+    for date in dates:
+        files.setdefault(event_url(config, date), []).append(date)
+    
+    rows = []
+    complete = True
+    
+    def read(url: str, file_dates: List[datetime]) -> np.ndarray:
+        # Kuyrukta bütçe dolduysa okuma başlatılmaz (iptalden önce başlayan görevler)
+        if deadline is not None and remaining_time(deadline) == 0:
+            raise TimeoutError("Süre bütçesi doldu, okuma başlatılmadı")
+        return _fetch_file_values(event, config, url, lats, lons, file_dates)
+    
+    # Dosyalar sınırlı genişlikteki havuzda paralel çekilir, sonuçlar tarih sırasıyla toplanır
+    futures = [
+        (url, YEAR_FETCH_EXECUTOR.submit(read, url, file_dates))
+        for url, file_dates in files.items()
+    ]
+    
+    expired = 0
+    for url, future in futures:
+        # Süre bütçesi doldu: kuyruktaki tüm okumalar iptal edilir, bitmiş olanlar yine toplanır
+        if future.cancelled():
+            expired += 1
+            continue
+        if deadline is not None and not future.done():
+            wait([future], timeout=remaining_time(deadline))
+            if not future.done():
+                for _, queued in futures:
+                    queued.cancel()
+                expired += 1
+                complete = False
+                continue
+        
+        try:
+            values = future.result()
+            rows.extend(values)
+            logger.debug(f"{url}: {np.count_nonzero(~np.isnan(values))}/{values.size} değer")
+            
+        except Exception as e:
+            logger.error(f"{url} için veri çekme hatası ({event}): {str(e)}")
+            # Geçersiz tarih eksik veri sayılmaz
+            if not isinstance(e, ValueError):
+                complete = False
+            # Hata durumunda devam et
+            continue
+    
+    if expired:
+        logger.warning(f"{event}: süre bütçesi doldu, {expired}/{len(futures)} dosya beklenmeden "
+                       f"{len(rows)} tarihle devam ediliyor")
+    
+    return np.array(rows, dtype=float).reshape(len(rows), len(lats)), complete
+
+
+class RegionBlock(NamedTuple):
+    """Bir bölgenin doğal grid üzerindeki değer bloğu."""
+    rows: np.ndarray    # Grid satır indeksleri (artan)
+    cols: np.ndarray    # Grid sütun indeksleri (artan)
+    values: np.ndarray  # Son iki eksen (satır, sütun); önünde zaman ekseni olabilir
+
+
+def region_grid(event: str, lat_range: Tuple[float, float],
+                lon_range: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merkezi bölge sınırları içinde kalan grid hücrelerinin indekslerini döner.
+    
+    Args:
+        event: Olay tipi
+        lat_range: (min, max) enlem
+        lon_range: (min, max) boylam (-180/180)
+        
+    Returns:
+        (satır indeksleri, sütun indeksleri)
+        
+    Raises:
+        ValueError: Grid tanımı yoksa veya bölge başlangıç meridyenini geçiyorsa
+    """
+    config = DATASET_CONFIG[event]
+    grid = config.get('grid')
+    if grid is None:
+        raise ValueError(f"{event} için grid tanımı yok")
+    
+    resolution = grid['resolution']
+    lat_first = grid['lat_range'][0]
+    lon_first = grid['lon_range'][0]
+    n_lat, n_lon = _grid_shape(grid)
+    
+    lat_min, lat_max = sorted(lat_range)
+    lon_min, lon_max = (to_native_lon(config, lon) for lon in sorted(lon_range))
+    if lon_min > lon_max:
+        raise ValueError("Başlangıç meridyenini geçen bölgeler desteklenmiyor")
+    
+    eps = 1e-6
+    row_start = max(int(np.ceil((lat_min - lat_first) / resolution - eps)), 0)
+    row_stop = min(int(np.floor((lat_max - lat_first) / resolution + eps)), n_lat - 1)
+    col_start = max(int(np.ceil((lon_min - lon_first) / resolution - eps)), 0)
+    col_stop = min(int(np.floor((lon_max - lon_first) / resolution + eps)), n_lon - 1)
+    
+    return np.arange(row_start, row_stop + 1), np.arange(col_start, col_stop + 1)
+
+
+def _region_indexers(ds: xr.Dataset, config: Dict, lat_range: Tuple[float, float],
+                     lon_range: Tuple[float, float]) -> Dict[str, slice]:
+    """Veri setinin koordinat yönüne uygun lat/lon slice'ları üretir."""
+    lat_min, lat_max = sorted(lat_range)
+    lon_min, lon_max = (to_native_lon(config, lon) for lon in sorted(lon_range))
+    
+    lat_values = ds['lat'].values
+    if lat_values[0] > lat_values[-1]:
+        lat_slice = slice(lat_max, lat_min)  # Kuzeyden güneye sıralı
+    else:
+        lat_slice = slice(lat_min, lat_max)
+    
+    return {'lat': lat_slice, 'lon': slice(lon_min, lon_max)}
+
+
+def _region_block(event: str, config: Dict, ds: xr.Dataset,
+                  lat_range: Tuple[float, float], lon_range: Tuple[float, float],
+                  time: Optional[datetime] = None,
+                  time_range: Optional[Tuple[datetime, datetime]] = None) -> RegionBlock:
+    """
+    Açık veri setinden bölge bloğunu tek okumada çeker.
+    
+    Args:
+        time: Tek tarih (en yakın zaman adımı seçilir)
+        time_range: (başlangıç, bitiş) zaman aralığı (zaman ekseni korunur)
+    """
+    subset = ds
+    if time is not None:
+        subset = subset.isel(time=int(resolve_time_indices(ds, [time])[0]))
+    elif time_range is not None:
+        subset = subset.sel(time=slice(*time_range))
+    subset = subset.sel(**_region_indexers(ds, config, lat_range, lon_range))
+    
+    def read(name: str) -> np.ndarray:
+        return np.asarray(subset[name].transpose(..., 'lat', 'lon').values)
+    
+    if config['temporal'] == 'harmonic':
+        values = tidal_daily_max(*(read(name) for name in config['variables']))
+    elif config.get('derived', False):
+        components = subset[config['variables'][:2]].load()
+        values = np.hypot(*(np.asarray(components[name].transpose(..., 'lat', 'lon').values)
+                            for name in config['variables'][:2]))
+    else:
+        values = read(config['variable'])
+    
+    grid = config['grid']
+    resolution = grid['resolution']
+    rows = np.rint((subset['lat'].values - grid['lat_range'][0]) / resolution).astype(int)
+    native_lons = np.array([to_native_lon(config, lon) for lon in subset['lon'].values])
+    cols = np.rint((native_lons - grid['lon_range'][0]) / resolution).astype(int)
+    
+    row_order = np.argsort(rows)
+    col_order = np.argsort(cols)
+    values = values[..., row_order, :][..., col_order]
+    
+    return RegionBlock(rows[row_order], cols[col_order], values.astype(float))
+
+
+def fetch_region_block(event: str, lat_range: Tuple[float, float], lon_range: Tuple[float, float],
+                       year: int, month: int, day: int) -> RegionBlock:
+    """
+    Bir olay için belirli tarihteki bölge bloğunu çeker (tek dikdörtgen okuma).
+    
+    Args:
+        event: Olay tipi
+        lat_range: (min, max) enlem
+        lon_range: (min, max) boylam (-180/180)
+        year, month, day: Tarih
+        
+    Returns:
+        RegionBlock (values şekli: (satır, sütun))
+    """
+    config = DATASET_CONFIG[event]
+    date = datetime(year, month, day)
+    
+    if 'url_template' in config:
+        url = config['url_template'].format(
+            year=year, month=month, day=day, doy=date.timetuple().tm_yday
+        )
+    else:
+        url = config['url']
+    
+    time = None if config['temporal'] == 'harmonic' else date
+    with open_event_dataset(config, url) as ds:
+        return _region_block(event, config, ds, lat_range, lon_range, time=time)
+
+
+def fetch_region_series(event: str, lat_range: Tuple[float, float], lon_range: Tuple[float, float],
+                        month: int, day: int) -> Tuple[RegionBlock, bool]:
+    """
+    Bölgenin tüm yıllardaki değerlerini (yıl, satır, sütun) bloğu olarak çeker.
+    
+    Her yıl için tek dikdörtgen okuma yapılır (fetch_region_block); yıllar
+    YEAR_FETCH_EXECUTOR üzerinde paralel çekilir. Harmonik (gelgit) olaylar tek
+    okumayla alınır ve tüm yıllar için aynı değer kullanılır.
+    
+    Returns:
+        (values şekli (yıl, satır, sütun) olan RegionBlock, tüm yıllar hatasız okunduysa True)
+    """
+    config = DATASET_CONFIG[event]
+    year_start, year_end = config['year_range']
+    n_years = year_end - year_start + 1
+    
+    if config['temporal'] == 'harmonic':
+        block = fetch_region_block(event, lat_range, lon_range, year_start, month, day)
+        return RegionBlock(block.rows, block.cols, np.repeat(block.values[None], n_years, axis=0)), True
+    
+    futures = [
+        (year, YEAR_FETCH_EXECUTOR.submit(fetch_region_block, event, lat_range, lon_range, year, month, day))
+        for year in range(year_start, year_end + 1)
+    ]
+    
+    blocks = []
+    complete = True
+    for year, future in futures:
+        try:
+            blocks.append(future.result())
+        except Exception as e:
+            logger.error(f"{year} için bölge okuma hatası ({event}): {str(e)}")
+            # Geçersiz tarih (örn. artık olmayan yılda 29 Şubat) eksik veri sayılmaz
+            if not isinstance(e, ValueError):
+                complete = False
+    
+    if not blocks:
+        raise ValueError(f"{event} için bölgede hiç veri okunamadı")
+    
+    first = blocks[0]
+    for block in blocks[1:]:
+        if not (np.array_equal(block.rows, first.rows) and np.array_equal(block.cols, first.cols)):
+            raise ValueError(f"{event} için yıllık bölge blokları aynı gridde değil")
+    
+    return RegionBlock(first.rows, first.cols, np.stack([block.values for block in blocks])), complete
+
+
+def region_exceedance(values: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (yıl, satır, sütun) bloğunda hücre bazında eşik aşım olasılığını hesaplar.
+    
+    NaN değerler hücrenin örnek sayısından düşülür (calculate_empirical_probability ile aynı).
+    
+    Returns:
+        (olasılık rasterı (verisiz hücrelerde NaN), hücre başına örnek sayısı)
+    """
+    valid = ~np.isnan(values)
+    samples = valid.sum(axis=0)
+    with np.errstate(invalid='ignore'):
+        exceed = (values > threshold).sum(axis=0)
+    probability = np.where(samples > 0, exceed / np.maximum(samples, 1), np.nan)
+    return np.round(probability, 4), samples
+
+
+def calculate_probability_grid(lat_range: Tuple[float, float], lon_range: Tuple[float, float],
+                               month: int, day: int, events: List[str],
+                               thresholds: Optional[Dict[str, ThresholdSpec]] = None) -> Dict[str, Dict]:
+    """
+    Bir bölge için olay olasılıklarını doğal grid üzerinde raster olarak hesaplar.
+    
+    Nokta nokta sorgu yerine her yıl dosyasından tek dikdörtgen alt küme okunur
+    ve aşım olasılığı tüm (yıl, satır, sütun) bloğu üzerinde vektörel hesaplanır.
+    
+    Args:
+        lat_range: (min, max) enlem
+        lon_range: (min, max) boylam (-180/180)
+        month: Ay (1-12)
+        day: Gün (1-31)
+        events: Olay listesi
+        thresholds: Özel eşik değerleri (sayı veya eşik listesi)
+        
+    Returns:
+        {olay: {'lats': hücre merkezi enlemleri, 'lons': hücre merkezi boylamları (-180/180),
+                'probability': (enlem, boylam) rasterı veya eşik listesi için {eşik: raster},
+                'samples': hücre başına örnek sayısı, 'partial': eksik yıl varsa True}}
+        Hata alan olaylar için değer None olur
+        
+    Raises:
+        ValueError: Geçersiz parametreler veya bölge GRID_MAX_CELLS hücreden büyükse
+    """
+    if not (1 <= month <= 12):
+        raise ValueError(f"Ay 1 ile 12 arası olmalı: {month}")
+    
+    if not (1 <= day <= 31):
+        raise ValueError(f"Gün 1 ile 31 arası olmalı: {day}")
+    
+    if not events:
+        raise ValueError("En az bir olay belirtilmeli")
+    
+    thresholds = thresholds or {}
+    
+    for event in events:
+        if event not in DATASET_CONFIG:
+            raise ValueError(f"Geçersiz olay tipi: {event}. Desteklenen: {list(DATASET_CONFIG.keys())}")
+        rows, cols = region_grid(event, lat_range, lon_range)
+        if len(rows) == 0 or len(cols) == 0:
+            raise ValueError(f"{event} için bölgede grid hücresi yok: lat={lat_range}, lon={lon_range}")
+        if len(rows) * len(cols) > GRID_MAX_CELLS:
+            raise ValueError(
+                f"{event} için bölge çok büyük: {len(rows) * len(cols)} hücre (en fazla {GRID_MAX_CELLS})"
+            )
+    
+    logger.info(f"Raster hesaplama: lat={lat_range}, lon={lon_range}, tarih={month}/{day}, olaylar={events}")
+    
+    futures = {
+        event: EVENT_EXECUTOR.submit(fetch_region_series, event, lat_range, lon_range, month, day)
+        for event in events
+    }
+    
+    results = {}
+    for event, future in futures.items():
+        config = DATASET_CONFIG[event]
+        try:
+            block, complete = future.result()
+        except Exception as e:
+            logger.error(f"✗ {event} için raster hatası: {str(e)}", exc_info=True)
+            results[event] = None
+            continue
+        
+        grid = config['grid']
+        lats = np.round(grid['lat_range'][0] + block.rows * grid['resolution'], 6)
+        lons = np.round(grid['lon_range'][0] + block.cols * grid['resolution'], 6)
+        lons = np.where(lons > 180, lons - 360, lons)
+        
+        threshold = thresholds.get(event, config['threshold'])
+        if isinstance(threshold, (list, tuple)):
+            probability = {}
+            for value in threshold:
+                probability[f"{float(value):g}"], samples = region_exceedance(block.values, float(value))
+        else:
+            probability, samples = region_exceedance(block.values, threshold)
+        
+        results[event] = {
+            'lats': lats,
+            'lons': lons,
+            'probability': probability,
+            'samples': samples,
+            'partial': not complete
+        }
+        logger.info(f"✓ {event}: {len(lats)}x{len(lons)} raster")
+    
+    return results
+
+
+# Artık yıl referanslı takvim günleri (1 Ocak - 31 Aralık, 29 Şubat dahil)
+CALENDAR_DAYS = [(month, day) for month in range(1, 13) for day in range(1, 32)
+                 if day <= [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month - 1]]
+
+
+def _calendar_matrix(event: str, config: Dict, cell: GridCell) -> np.ndarray:
+    """
+    Tek aggregation'lı veri setinde hücrenin tüm dönem serisini tek okumada
+    çekip (yıl, yılın günü) matrisine dağıtır.
+    
+    Returns:
+        (yıl, 366) şeklinde dizi; verisi olmayan günler NaN
+    """
+    year_start, year_end = config['year_range']
+    matrix = np.full((year_end - year_start + 1, len(CALENDAR_DAYS)), np.nan)
+    
+    with open_event_dataset(config, config['url']) as ds:
+        period = ds.sel(time=slice(f"{year_start}-01-01", f"{year_end}-12-31"))
+        rows, cols = resolve_point_indices(period, [cell.lat], [cell.native_lon])
+        values = select_points(period[config['variable']], rows, cols)[:, 0]
+        times = period.indexes['time']
+        years = np.asarray(times.year)
+        months = np.asarray(times.month)
+        days = np.asarray(times.day)
+    
+    logger.info(f"{event}: {len(values)} zaman adımı tek okumada çekildi")
+    
+    # Vektörel gruplama: her zaman adımı (yıl, artık yıl referanslı gün) hücresine
+    month_offsets = np.array([day_of_year(month, 1) - 1 for month in range(1, 13)])
+    doy_index = month_offsets[months - 1] + days - 1
+    matrix[years - year_start, doy_index] = values
+    return matrix
+
+
+def calculate_probability_calendar(lat: float, lon: float, events: List[str],
+                                   thresholds: Optional[Dict[str, ThresholdSpec]] = None) -> Dict[str, Optional[Dict]]:
+    """
+    Bir konum için yılın her günündeki (366 gün) olay olasılıklarını hesaplar.
+    
+    Tek aggregation'lı veri setlerinde (GPCP, OISST) hücrenin 1991-2020 serisi
+    tek okumada çekilir ve günlere vektörel gruplanır. Gelgit tarihten bağımsız
+    olduğundan tek değerle doldurulur. Günlük dosya bazlı veri setleri yalnızca
+    klimatoloji küpü varsa hesaplanır (aksi halde 366 x 30 dosya gerekir).
+    
+    Args:
+        lat: Enlem
+        lon: Boylam
+        events: Olay listesi
+        thresholds: Özel eşik değerleri (sayı veya eşik listesi)
+        
+    Returns:
+        {olay: {'probability': 366 uzunlukta dizi (verisiz günlerde NaN) veya
+                eşik listesi için {eşik: dizi}, 'samples': gün başına örnek sayısı,
+                'source': 'aggregation' | 'harmonic' | 'cube'}}
+        Hesaplanamayan olaylar için {'error': mesaj}
+        
+    Raises:
+        ValueError: Geçersiz parametreler için
+    """
+    _validate_request(lat, lon, 1, 1, events)
+    thresholds = thresholds or {}
+    
+    logger.info(f"Takvim hesaplama: ({lat}, {lon}), olaylar={events}")
+    
+    def evaluate(event: str) -> Dict:
+        config = DATASET_CONFIG[event]
+        cell = snap_to_grid(event, lat, lon)
+        year_start, year_end = config['year_range']
+        
+        if config['temporal'] == 'harmonic':
+            series = fetch_sorted_series(event, lat, lon, 1, 1)
+            matrix = np.repeat(series.values[:, None], len(CALENDAR_DAYS), axis=1)
+            source = 'harmonic'
+        elif is_single_aggregation(config):
+            matrix = _calendar_matrix(event, config, cell)
+            source = 'aggregation'
+        else:
+            cube = CLIMATOLOGY_CUBES.cell_matrix(event, cell.row, cell.col)
+            if cube is None:
+                raise LookupError(f"{event} için takvim yalnızca klimatoloji küpüyle hesaplanabilir "
+                                  f"(build-cube); ({cell.lat}, {cell.lon}) küp kapsamında değil")
+            matrix = cube.T
+            source = 'cube'
+        
+        threshold = thresholds.get(event, config['threshold'])
+        if isinstance(threshold, (list, tuple)):
+            probability = {}
+            for value in threshold:
+                probability[f"{float(value):g}"], samples = region_exceedance(matrix, float(value))
+        else:
+            probability, samples = region_exceedance(matrix, threshold)
+        return {'probability': probability, 'samples': samples, 'source': source}
+    
+    futures = {event: EVENT_EXECUTOR.submit(evaluate, event) for event in events}
+    
+    results = {}
+    for event, future in futures.items():
+        try:
+            results[event] = future.result()
+            logger.info(f"✓ {event}: takvim ({results[event]['source']})")
+        except Exception as e:
+            logger.error(f"✗ {event} için takvim hatası: {str(e)}")
+            results[event] = {'error': str(e)}
+    
+    return results
+
+
+def calculate_empirical_probability(data: np.ndarray, threshold: float) -> float:
+    """
+    Empirik olasılık hesaplar.
+    
+    Args:
+        data: Veri dizisi (NaN'ler zaten filtrelenmiş)
+        threshold: Eşik değeri
+        
+    Returns:
+        Olasılık (0-1 arası)
+    """
+    if len(data) == 0:
+        logger.warning("Boş veri dizisi, olasılık 0.0")
+        return 0.0
+    
+    # Threshold'u aşan veri sayısı
+    exceeds = np.sum(data > threshold)
+    total = len(data)
+    
+    probability = exceeds / total
+    
+    logger.info(f"Empirik olasılık: {exceeds}/{total} = {probability:.4f}")
+    
+    return float(probability)
+
+
+class SortedSeries:
+    """
+    Artan sırada tutulan yıllık değer serisi.
+    
+    Eşik aşım olasılığı ikili arama ile O(log n) hesaplanır; aynı seri
+    üzerinde istenen sayıda eşik yeniden veri çekmeden değerlendirilebilir.
+    
+    Args:
+        data: Yıllık değerler (NaN'ler atılır)
+        complete: Seri eksiksiz gerçek veriyse True (eksik yıllar veya sentetik yedekte False)
+    """
+    
+    __slots__ = ('values', 'complete')
+    
+    def __init__(self, data: np.ndarray, complete: bool = True):
+        data = np.asarray(data, dtype=float)
+        self.values = np.sort(data[~np.isnan(data)])
+        self.values.flags.writeable = False
+        self.complete = complete
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def count_above(self, threshold: float) -> int:
+        """Eşiği aşan (> threshold) değer sayısı."""
+        return len(self.values) - int(np.searchsorted(self.values, threshold, side='right'))
+    
+    def exceedance(self, threshold: float) -> float:
+        """Eşik aşım olasılığı (0-1 arası); boş seride 0.0."""
+        if len(self.values) == 0:
+            return 0.0
+        return self.count_above(threshold) / len(self.values)
+
+
+def fetch_sorted_series(event: str, lat: float, lon: float, month: int, day: int,
+                        use_synthetic: bool = False, window_days: int = 0,
+                        deadline: Optional[float] = None) -> SortedSeries:
+    """
+    Olay serisini sıralı haliyle döner.
+    
+    Eksiksiz gerçek veri serileri worker belleğinde (SORTED_SERIES_CACHE)
+    grid hücresi anahtarıyla tutulur; farklı eşiklerle gelen tekrar istekler
+    veri çekmeden ve yeniden sıralamadan cevaplanır. deadline için bkz.
+    fetch_event_data.
+    """
+    if use_synthetic:
+        return SortedSeries(fetch_event_data(event, lat, lon, month, day, use_synthetic=True,
+                                             window_days=window_days))
+    
+    if event not in DATASET_CONFIG:
+        raise ValueError(f"Geçersiz olay tipi: {event}. Desteklenen: {list(DATASET_CONFIG.keys())}")
+    
+    cache_key = series_cache_key(event, snap_to_grid(event, lat, lon), month, day, window_days)
+    series = SORTED_SERIES_CACHE.get(cache_key)
+    if series is not None:
+        logger.info(f"{event} sıralı seri bellekten okundu ({len(series)} değer)")
+        return series
+    
+    logger.info(f"{event} için veri çekiliyor: lat={lat}, lon={lon}, tarih={month}/{day}")
+    values, complete = _fetch_event_series(event, lat, lon, month, day, window_days, deadline)
+    series = SortedSeries(values, complete)
+    if complete:
+        SORTED_SERIES_CACHE.set(cache_key, series)
+    return series
+
+
+def fetch_sorted_series_batch(event: str, points: List[Tuple[float, float]],
+                              month: int, day: int, window_days: int = 0,
+                              deadline: Optional[float] = None) -> List[SortedSeries]:
+    """
+    Birden çok noktanın olay serilerini sıralı haliyle döner.
+    
+    Noktalar grid hücrelerine oturtulur ve tekilleştirilir; bellekte, küpte veya
+    seri önbelleğinde olmayan hücreler her yıl dosyası bir kez açılarak tek
+    okumada çekilir. Hücreler tekil isteklerle aynı single-flight anahtarlarını
+    kullanır: başka bir istekte okunmakta olan hücre yeniden okunmaz, beklenir.
+    
+    Args:
+        event: Olay tipi
+        points: (enlem, boylam) listesi
+        month: Ay (1-12)
+        day: Gün (1-31)
+        window_days: Her yıldan hedef günün ±window_days çevresi de havuzlanır
+        deadline: time.monotonic() cinsinden süre bütçesi sonu (bkz. fetch_event_data);
+            bütçede okunamayan hücreler eksik (sentetik yedek) döner
+        
+    Returns:
+        Noktalarla aynı sırada sıralı seriler
+    """
+    if event not in DATASET_CONFIG:
+        raise ValueError(f"Geçersiz olay tipi: {event}. Desteklenen: {list(DATASET_CONFIG.keys())}")
+    
+    config = DATASET_CONFIG[event]
+    
+    cells = [snap_to_grid(event, lat, lon) for lat, lon in points]
+    keys = [series_cache_key(event, cell, month, day, window_days) for cell in cells]
+    
+    series_by_key: Dict[str, SortedSeries] = {}
+    pending: Dict[str, GridCell] = {}
+    for key, cell in zip(keys, cells):
+        if key in series_by_key or key in pending:
+            continue
+        series = SORTED_SERIES_CACHE.get(key)
+        if series is None:
+            local = _local_series(event, cell, month, day, key, window_days)
+            if local is not None:
+                series = SortedSeries(local)
+                SORTED_SERIES_CACHE.set(key, series)
+        if series is not None:
+            series_by_key[key] = series
+        else:
+            pending[key] = cell
+    
+    if pending:
+        # Eksik (süre bütçesi dolan) seriler tekil isteklerde olduğu gibi paylaşılmaz
+        fetched = SINGLE_FLIGHT.do_many(
+            pending,
+            lambda keys: _fetch_and_cache_cells(event, config, {key: pending[key] for key in keys},
+                                                month, day, window_days, deadline),
+            timeout=remaining_time(deadline),
+            shareable=lambda result: result[1]
+        )
+        
+        for key in pending:
+            # Bütçede sonuçlanmayan hücreler boş ve eksik sayılır
+            (cell_values, complete), _ = fetched.get(key, ((np.array([]), False), False))
+            
+            if len(cell_values) == 0:
+                logger.warning(f"{event} ({pending[key].lat}, {pending[key].lon}) için hiç veri bulunamadı, "
+                               f"sentetik veri kullanılıyor")
+                series_by_key[key] = SortedSeries(
+                    generate_synthetic_data(event, years=sample_count(event, window_days)), complete=False
+                )
+                continue
+            
+            series = SortedSeries(cell_values, complete)
+            if complete:
+                SORTED_SERIES_CACHE.set(key, series)
+            series_by_key[key] = series
+    
+    return [series_by_key[key] for key in keys]
+
+
+def _fetch_and_cache_cells(event: str, config: Dict, cells: Dict[str, GridCell], month: int, day: int,
+                           window_days: int = 0,
+                           deadline: Optional[float] = None) -> Dict[str, Tuple[np.ndarray, bool]]:
+    """
+    Hücrelerin serilerini tek uzak okumada çeker ve eksiksiz olanları önbelleğe yazar.
+    
+    Single-flight liderliği alınana kadar başka bir çağrının önbelleğe yazdığı
+    hücreler ağa çıkmadan döner.
+    
+    Returns:
+        {önbellek anahtarı: (NaN'ler filtrelenmiş değerler, seri eksiksiz gerçek veri ise True)}
+    """
+    results: Dict[str, Tuple[np.ndarray, bool]] = {}
+    remote: Dict[str, GridCell] = {}
+    for key, cell in cells.items():
+        cached = SERIES_CACHE.get(key)
+        if cached is not None:
+            results[key] = (cached, True)
+        else:
+            remote[key] = cell
+    if not remote:
+        return results
+    
+    logger.info(f"{event} için {len(remote)} hücre uzak veri setlerinden çekiliyor")
+    values, complete = _fetch_remote_points(
+        event, config, [cell.lat for cell in remote.values()],
+        [cell.native_lon for cell in remote.values()], month, day, window_days, deadline
+    )
+    for column, key in enumerate(remote):
+        cell_values = values[:, column]
+        cell_values = cell_values[~np.isnan(cell_values)]
+        # Hata alan yıl olduysa seri eksiktir; önbelleğe alma, sonraki istekte yeniden dene
+        if complete and len(cell_values) > 0:
+            SERIES_CACHE.put(key, cell_values)
+        results[key] = (cell_values, complete)
+    return results
+
+
+def lookup_climatology(event: str, lat: float, lon: float, month: int, day: int) -> np.ndarray:
+    """
+    Olay serisini önceden hesaplanmış klimatoloji deposundan okur (ağa çıkmaz).
+    
+    Raises:
+        LookupError: Konum/gün depoda yoksa (bölge dışında veya depo oluşturulmamış)
+    """
+    cell = snap_to_grid(event, lat, lon)
+    values = CLIMATOLOGY_STORE.get(event, cell.row, cell.col, day_of_year(month, day))
+    if values is None:
+        raise LookupError(
+            f"{event} için klimatoloji deposunda kayıt yok: ({cell.lat}, {cell.lon}), {month}/{day}"
+        )
+    logger.info(f"{event} klimatoloji deposundan okundu ({len(values)} değer)")
+    return values
+
+
+def _evaluate_event(event: str, lat: float, lon: float, month: int, day: int,
+                    thresholds: Dict[str, ThresholdSpec], use_synthetic: bool,
+                    use_climatology: bool = False, window_days: int = 0,
+                    deadline: Optional[float] = None) -> Tuple[EventResult, SortedSeries]:
+    """
+    Tek bir olayın verisini çekip olasılığını hesaplar.
+    
+    Returns:
+        (4 basamağa yuvarlanmış olasılık veya eşik listesi verildiyse
+        {eşik: olasılık} sözlüğü, olasılığın hesaplandığı sıralı seri)
+    """
+    logger.info(f"\n--- {event} işleniyor ---")
+    
+    # Threshold belirle
+    default_threshold = DATASET_CONFIG[event]['threshold']
+    threshold = thresholds.get(event, default_threshold)
+    logger.info(f"Threshold: {threshold} (varsayılan: {default_threshold})")
+    
+    # Veriyi çek (lookup kipinde yalnızca yerel depodan); NaN'ler sıralamada filtrelenir
+    if use_climatology and not use_synthetic:
+        if window_days:
+            raise ValueError("Klimatoloji deposu gün penceresini desteklemiyor (window_days=0 olmalı)")
+        series = SortedSeries(lookup_climatology(event, lat, lon, month, day))
+    else:
+        series = fetch_sorted_series(event, lat, lon, month, day, use_synthetic, window_days, deadline)
+    
+    data = series.values
+    logger.info(f"Toplam veri noktası: {len(data)}")
+    if len(data) > 0:
+        logger.info(f"İstatistikler - Min: {data[0]:.3f}, "
+                  f"Max: {data[-1]:.3f}, Mean: {np.mean(data):.3f}, "
+                  f"Std: {np.std(data):.3f}")
+    
+    result = series_probability(series, threshold)
+    if not isinstance(threshold, (list, tuple)):
+        logger.info(f"Empirik olasılık: {series.count_above(threshold)}/{len(series)} = {result:.4f}")
+    logger.info(f"✓ {event}: {result}")
+    
+    return result, series
+
+
+def series_probability(series: SortedSeries, threshold: ThresholdSpec) -> EventResult:
+    """
+    Sıralı seriden eşik aşım olasılığını hesaplar.
+    
+    Returns:
+        4 basamağa yuvarlanmış olasılık; eşik listesi verildiyse {eşik: olasılık}
+        (tüm eşikler aynı sıralı seriden ikili aramayla)
+    """
+    if isinstance(threshold, (list, tuple)):
+        return {
+            f"{float(value):g}": round(series.exceedance(float(value)), 4)
+            for value in threshold
+        }
+    return round(series.exceedance(threshold), 4)
+
+
+def calculate_probabilities(lat: float, lon: float, month: int, day: int,
+                           events: List[str],
+                           thresholds: Optional[Dict[str, ThresholdSpec]] = None,
+                           use_synthetic: bool = False,
+                           use_climatology: bool = False,
+                           window_days: int = 0,
+                           deadline_seconds: Optional[float] = None) -> Dict[str, EventResult]:
+    """
+    NASA EarthData'dan belirli konum ve tarih için olay olasılıklarını hesaplar.
+    
+    Args:
+        lat: Enlem (-90 ile 90 arası)
+        lon: Boylam (-180 ile 180 arası)
+        month: Ay (1-12)
+        day: Gün (1-31)
+        events: Hesaplanacak olay listesi (örn: ['wind_high', 'rain_high'])
+        thresholds: Özel eşik değerleri (opsiyonel, varsayılan değerleri override eder).
+            Bir olay için eşik listesi verilirse (örn. {'wind_high': [8, 10, 12]})
+            tüm eşikler tek veri çekimiyle hesaplanır ve sonuç {eşik: olasılık} olur.
+        use_synthetic: True ise sentetik test verisi kullanır
+        use_climatology: True ise yalnızca önceden hesaplanmış klimatoloji
+            deposundan okur; depoda olmayan olaylar None döner
+        window_days: Her yıldan hedef günün ±window_days çevresi de örneğe
+            katılır (0-MAX_WINDOW_DAYS); örnek sayısı yıl x (2N+1) olur
+        deadline_seconds: Süre bütçesi (saniye); dolunca bekleyen yıl okumaları
+            iptal edilir ve olasılıklar toplanan yıllardan hesaplanır
+        
+    Returns:
+        Olay olasılıklarını içeren dictionary (örn: {'wind_high': 0.25, 'rain_high': 0.15})
+        
+    Raises:
+        ValueError: Geçersiz parametreler için
+        
+    Örnek:
+        >>> probs = calculate_probabilities(
+        ...     lat=40.0, lon=30.0, month=7, day=15,
+        ...     events=['wind_high', 'sst_high'],
+        ...     thresholds={'wind_high': 12.0}  # Özel threshold
+        ... )
+        >>> print(probs)
+        {'wind_high': 0.23, 'sst_high': 0.67}
+    """
+    details = calculate_probabilities_detailed(lat, lon, month, day, events, thresholds,
+                                               use_synthetic, use_climatology, window_days,
+                                               deadline_seconds)
+    return {event: detail['probability'] for event, detail in details.items()}
+
+
+def calculate_probabilities_detailed(lat: float, lon: float, month: int, day: int,
+                                     events: List[str],
+                                     thresholds: Optional[Dict[str, ThresholdSpec]] = None,
+                                     use_synthetic: bool = False,
+                                     use_climatology: bool = False,
+                                     window_days: int = 0,
+                                     deadline_seconds: Optional[float] = None) -> Dict[str, Dict]:
+    """
+    calculate_probabilities ile aynı hesaplamayı olay başına ayrıntılarla döner.
+    
+    deadline_seconds verilirse bütçe dolduğunda bekleyen yıl okumaları iptal
+    edilir; bütçe ve DEADLINE_GRACE_SECONDS sonunda hâlâ bitmemiş olaylar
+    hatalı olay gibi (None, partial) döner.
+    
+    Returns:
+        {olay: {'probability': EventResult, 'samples': veri noktası sayısı,
+                'partial': seri eksik yıllı/sentetik yedekse, süre bütçesi dolduysa
+                veya hata alındıysa True}}
+        
+    Raises:
+        ValueError: Geçersiz parametreler için
+    """
+    completed = dict(iter_probabilities_detailed(lat, lon, month, day, events, thresholds,
+                                                 use_synthetic, use_climatology, window_days,
+                                                 deadline_seconds))
+    # Sonuçlar tamamlanma sırasıyla değil istek sırasıyla döner
+    results = {event: completed[event] for event in events}
+    
+    logger.info("="*70)
+    logger.info(f"Hesaplama Tamamlandı - Sonuçlar: {results}")
+    logger.info("="*70)
+    
+    return results
+
+
+def iter_probabilities_detailed(lat: float, lon: float, month: int, day: int,
+                                events: List[str],
+                                thresholds: Optional[Dict[str, ThresholdSpec]] = None,
+                                use_synthetic: bool = False,
+                                use_climatology: bool = False,
+                                window_days: int = 0,
+                                deadline_seconds: Optional[float] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Olayları paralel başlatır ve her olayın sonucunu biter bitmez verir.
+    
+    Parametreler çağrı anında doğrulanır ve olaylar hemen başlatılır; dönen
+    iterator sonuçları tamamlanma sırasıyla üretir (akış yanıtları için).
+    
+    Returns:
+        (olay, calculate_probabilities_detailed ile aynı ayrıntı sözlüğü) çiftleri
+        
+    Raises:
+        ValueError: Geçersiz parametreler için
+    """
+    # Parametre validasyonu
+    _validate_request(lat, lon, month, day, events, window_days)
+    
+    # Threshold'ları hazırla
+    if thresholds is None:
+        thresholds = {}
+    
+    logger.info("="*70)
+    logger.info(f"Olasılık Hesaplama Başladı")
+    logger.info(f"Konum: ({lat}, {lon}), Tarih: {month}/{day}, Gün penceresi: ±{window_days}")
+    logger.info(f"Olaylar: {events}")
+    logger.info(f"Sentetik veri: {use_synthetic}, Klimatoloji deposu: {use_climatology}")
+    logger.info("="*70)
+    
+    deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+    
+    # Olaylar paralel değerlendirilir; bir olayın hatası diğerlerini etkilemez
+    futures = {
+        EVENT_EXECUTOR.submit(_evaluate_event, event, lat, lon, month, day,
+                              thresholds, use_synthetic, use_climatology, window_days, deadline): event
+        for event in dict.fromkeys(events)
+    }
+    return _collect_event_results(futures, deadline)
+
+
+def _collect_event_results(futures: Dict, deadline: Optional[float]) -> Iterator[Tuple[str, Dict]]:
+    """Olay future'larını tamamlanma sırasıyla ayrıntı sözlüğüne çevirir."""
+    timeout = remaining_time(deadline + DEADLINE_GRACE_SECONDS) if deadline is not None else None
+    pending = dict(futures)
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            event = pending.pop(future)
+            yield event, _event_detail(event, future)
+    except TimeoutError:
+        # Olay bütçe içinde bitmedi (örn. tek okumalı aggregation); sonucu beklenmez
+        for future, event in pending.items():
+            if future.done():
+                yield event, _event_detail(event, future)
+            else:
+                # Henüz başlamamış olay görevi havuzdan çıkarılır (çalışan okumalar bütçeyle durur)
+                future.cancel()
+                logger.warning(f"✗ {event} süre bütçesinde tamamlanamadı")
+                yield event, {'probability': None, 'samples': 0, 'partial': True}
+
+
+def _event_detail(event: str, future) -> Dict:
+    """Biten olay future'ının sonucunu ayrıntı sözlüğüne çevirir (hata → None, partial)."""
+    try:
+        probability, series = future.result()
+        return {
+            'probability': probability,
+            'samples': len(series),
+            'partial': not series.complete
+        }
+    except Exception as e:
+        logger.error(f"✗ {event} için hata: {str(e)}", exc_info=True)
+        return {'probability': None, 'samples': 0, 'partial': True}
+
+
+def _validate_request(lat: float, lon: float, month: int, day: int, events: List[str],
+                      window_days: int = 0) -> None:
+    """Olasılık isteği parametrelerini doğrular (ValueError fırlatır)."""
+    if not (-90 <= lat <= 90):
+        raise ValueError(f"Enlem -90 ile 90 arası olmalı: {lat}")
+    
+    if not (-180 <= lon <= 180):
+        raise ValueError(f"Boylam -180 ile 180 arası olmalı: {lon}")
+    
+    if not (1 <= month <= 12):
+        raise ValueError(f"Ay 1 ile 12 arası olmalı: {month}")
+    
+    if not (1 <= day <= 31):
+        raise ValueError(f"Gün 1 ile 31 arası olmalı: {day}")
+    
+    if not events:
+        raise ValueError("En az bir olay belirtilmeli")
+    
+    if not (0 <= window_days <= MAX_WINDOW_DAYS):
+        raise ValueError(f"Gün penceresi 0 ile {MAX_WINDOW_DAYS} arası olmalı: {window_days}")
+
+
+def calculate_probabilities_batch(items: List[Dict],
+                                  deadline_seconds: Optional[float] = None) -> List[Dict[str, Dict]]:
+    """
+    Birden çok konum/tarih isteğinin olasılıklarını birlikte hesaplar.
+    
+    Uzak veri gerektiren istekler (olay, ay, gün, gün penceresi) bazında gruplanır; her grup
+    için her yıl dosyası bir kez açılır ve gruptaki tüm noktalar tek okumada
+    seçilir. Sentetik ve klimatoloji deposu istekleri ağa çıkmadan tek tek hesaplanır.
+    
+    Args:
+        items: calculate_probabilities parametrelerini içeren sözlükler
+            ('lat', 'lon', 'month', 'day', 'events'; opsiyonel 'thresholds',
+            'use_synthetic', 'use_climatology', 'window_days')
+        deadline_seconds: Tüm toplu hesaplama için süre bütçesi (bkz.
+            calculate_probabilities_detailed); bütçede bitmeyen gruplar eksik döner
+        
+    Returns:
+        İsteklerle aynı sırada, calculate_probabilities_detailed biçiminde sonuçlar
+        
+    Raises:
+        ValueError: Geçersiz parametreli istek varsa
+    """
+    for index, item in enumerate(items):
+        try:
+            _validate_request(item['lat'], item['lon'], item['month'], item['day'], item['events'],
+                              item.get('window_days', 0))
+        except ValueError as e:
+            raise ValueError(f"İstek {index}: {e}")
+    
+    results: List[Optional[Dict[str, Dict]]] = [None] * len(items)
+    groups: Dict[Tuple[str, int, int, int], List[int]] = {}
+    
+    for index, item in enumerate(items):
+        if item.get('use_synthetic') or item.get('use_climatology'):
+            results[index] = calculate_probabilities_detailed(
+                item['lat'], item['lon'], item['month'], item['day'], item['events'],
+                item.get('thresholds'), item.get('use_synthetic', False),
+                item.get('use_climatology', False), item.get('window_days', 0)
+            )
+            continue
+        results[index] = {}
+        for event in item['events']:
+            if event not in DATASET_CONFIG:
+                results[index][event] = {'probability': None, 'samples': 0, 'partial': True}
+                continue
+            groups.setdefault((event, item['month'], item['day'], item.get('window_days', 0)), []).append(index)
+    
+    logger.info(f"Toplu hesaplama: {len(items)} istek, {len(groups)} (olay, tarih) grubu")
+    
+    deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+    
+    # Gruplar paralel çekilir; yıl okumaları ayrı havuzda olduğundan kilitlenme olmaz
+    futures = {
+        key: EVENT_EXECUTOR.submit(
+            fetch_sorted_series_batch, key[0],
+            [(items[index]['lat'], items[index]['lon']) for index in indices], *key[1:], deadline
+        )
+        for key, indices in groups.items()
+    }
+    
+    for (event, month, day, window_days), future in futures.items():
+        indices = groups[(event, month, day, window_days)]
+        try:
+            timeout = remaining_time(deadline + DEADLINE_GRACE_SECONDS) if deadline is not None else None
+            series_list = future.result(timeout)
+        except TimeoutError:
+            # Grup bütçe içinde bitmedi; başlamamışsa havuzdan çıkarılır, sonucu beklenmez
+            future.cancel()
+            logger.warning(f"✗ {event} {month}/{day} grubu süre bütçesinde tamamlanamadı")
+            series_list = [None] * len(indices)
+        except Exception as e:
+            logger.error(f"✗ {event} {month}/{day} grubu için hata: {str(e)}", exc_info=True)
+            series_list = [None] * len(indices)
+        
+        for index, series in zip(indices, series_list):
+            if series is None:
+                results[index][event] = {'probability': None, 'samples': 0, 'partial': True}
+                continue
+            thresholds = items[index].get('thresholds') or {}
+            threshold = thresholds.get(event, DATASET_CONFIG[event]['threshold'])
+            results[index][event] = {
+                'probability': series_probability(series, threshold),
+                'samples': len(series),
+                'partial': not series.complete
+            }
+    
+    # Olay sırası istekteki sırayla aynı olsun
+    return [{event: result[event] for event in item['events']} for item, result in zip(items, results)]
+
+
+def calculate_voyage_probabilities(waypoints: List[Tuple[float, float, int, int]],
+                                   events: List[str],
+                                   thresholds: Optional[Dict[str, ThresholdSpec]] = None,
+                                   use_synthetic: bool = False,
+                                   window_days: int = 0,
+                                   deadline_seconds: Optional[float] = None) -> Dict:
+    """
+    Zamanlı rota noktaları (waypoint) için nokta ve sefer bazında olasılıkları hesaplar.
+    
+    Noktalar calculate_probabilities_batch ile hesaplanır; aynı takvim gününe
+    düşen noktalar her yıl dosyasından tek okumada çekilir.
+    
+    Sefer olasılıkları olay başına iki şekilde özetlenir:
+        - any_exceedance: Seferin herhangi bir noktasında eşiğin aşılma
+          olasılığı, 1 - Π(1 - p) (noktalar bağımsız varsayılır)
+        - max_waypoint: En riskli noktanın olasılığı
+    Aynı grid hücresine ve güne düşen noktalar (rotada ardışık olmasalar da)
+    aynı seriyi paylaştığından riski şişirmemek için özette bir kez sayılır.
+    
+    Args:
+        waypoints: (enlem, boylam, ay, gün) listesi (rota sırasıyla)
+        events: Olay listesi
+        thresholds: Özel eşik değerleri (sayı veya eşik listesi)
+        use_synthetic: True ise sentetik test verisi kullanır
+        window_days: Her yıldan hedef günün ±window_days çevresi de havuzlanır
+        deadline_seconds: Tüm rota için süre bütçesi (bkz. calculate_probabilities_batch);
+            bütçede okunamayan noktalar partial döner
+        
+    Returns:
+        {'waypoints': nokta başına calculate_probabilities_detailed sonuçları,
+         'any_exceedance': {olay: olasılık}, 'max_waypoint': {olay: olasılık},
+         'partial': herhangi bir nokta eksik/hatalıysa True}
+    """
+    if not waypoints:
+        raise ValueError("En az bir rota noktası belirtilmeli")
+    
+    items = [
+        {'lat': lat, 'lon': lon, 'month': month, 'day': day, 'events': events,
+         'thresholds': thresholds, 'use_synthetic': use_synthetic, 'window_days': window_days}
+        for lat, lon, month, day in waypoints
+    ]
+    details = calculate_probabilities_batch(items, deadline_seconds=deadline_seconds)
+    
+    any_exceedance = {}
+    max_waypoint = {}
+    partial = False
+    for event in events:
+        # Aynı hücre ve güne düşen noktalar bir kez sayılır
+        seen = set()
+        probabilities = []
+        for (lat, lon, month, day), detail in zip(waypoints, details):
+            result = detail[event]
+            partial = partial or result['partial']
+            if result['probability'] is None:
+                continue
+            key = series_cache_key(event, snap_to_grid(event, lat, lon), month, day)
+            if key not in seen:
+                seen.add(key)
+                probabilities.append(result['probability'])
+        any_exceedance[event], max_waypoint[event] = _combine_voyage(probabilities)
+    
+    logger.info(f"Sefer olasılıkları ({len(waypoints)} nokta): {any_exceedance}")
+    
+    return {
+        'waypoints': details,
+        'any_exceedance': any_exceedance,
+        'max_waypoint': max_waypoint,
+        'partial': partial
+    }
+
+
+def _combine_voyage(probabilities: List[EventResult]) -> Tuple[EventResult, EventResult]:
+    """
+    Nokta olasılıklarını (1 - Π(1 - p), max) olarak birleştirir.
+    
+    Eşik taraması sonuçları ({eşik: olasılık}) eşik bazında birleştirilir.
+    Hiç sonuç yoksa (None, None) döner.
+    """
+    if not probabilities:
+        return None, None
+    
+    if isinstance(probabilities[0], dict):
+        combined = {
+            key: _combine_voyage([p[key] for p in probabilities])
+            for key in probabilities[0]
+        }
+        return ({key: value[0] for key, value in combined.items()},
+                {key: value[1] for key, value in combined.items()})
+    
+    values = np.asarray(probabilities, dtype=float)
+    return round(float(1 - np.prod(1 - values)), 4), round(float(values.max()), 4)
+
+
+def build_region_cube(event: str, lat_range: Tuple[float, float],
+                      lon_range: Tuple[float, float], path: str) -> Dict:
+    """
+    Bir olayın bölge için (gün, satır, sütun, yıl) değer küpünü diske yazar.
+    
+    Küp float32 .npy dosyasıdır ve memmap ile doldurulur (bellekte tutulmaz).
+    Gün ekseni artık yıl referanslı yılın günüdür (indeks = doy - 1); yıl ekseni
+    en içte olduğundan bir hücrenin serisi bitişiktir. Harmonik olaylarda tarih
+    bağımlılığı olmadığından gün ve yıl eksenleri tek elemanlıdır.
+    Tek aggregation'lı veri setleri yıl başına tek zaman aralığı okumasıyla,
+    şablon URL'li veri setleri dosya başına tek okumayla ve paralel çekilir.
+    
+    Args:
+        event: Olay tipi
+        lat_range: (min, max) enlem
+        lon_range: (min, max) boylam (-180/180)
+        path: Yazılacak .npy dosya yolu
+        
+    Returns:
+        Küp metadata'sı (row_start, col_start, year_start, n_years, harmonic, shape)
+    """
+    config = DATASET_CONFIG[event]
+    year_start, year_end = config['year_range']
+    rows, cols = region_grid(event, lat_range, lon_range)
+    harmonic = config['temporal'] == 'harmonic'
+    
+    n_doy, n_years = (1, 1) if harmonic else (366, year_end - year_start + 1)
+    cube = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32,
+                                     shape=(n_doy, len(rows), len(cols), n_years))
+    cube[:] = np.nan
+    
+    def place(doy_index: int, year_index: int, block: RegionBlock) -> None:
+        row_mask = (block.rows >= rows[0]) & (block.rows <= rows[-1])
+        col_mask = (block.cols >= cols[0]) & (block.cols <= cols[-1])
+        values = block.values[..., row_mask, :][..., col_mask]
+        cube[doy_index][np.ix_(block.rows[row_mask] - rows[0],
+                               block.cols[col_mask] - cols[0], [year_index])] = values[..., None]
+    
+    if harmonic:
+        place(0, 0, fetch_region_block(event, lat_range, lon_range, year_start, 1, 1))
+    elif is_single_aggregation(config):
+        # Her yıl tek zaman aralığı okuması
+        for year_index, year in enumerate(range(year_start, year_end + 1)):
+            try:
+                with open_event_dataset(config, config['url']) as ds:
+                    block = _region_block(event, config, ds, lat_range, lon_range,
+                                          time_range=(datetime(year, 1, 1), datetime(year, 12, 31, 23, 59)))
+                    times = ds['time'].sel(time=slice(datetime(year, 1, 1),
+                                                      datetime(year, 12, 31, 23, 59))).values
+            except Exception as e:
+                logger.error(f"{event} {year} bölge okuma hatası: {str(e)}")
+                continue
+            
+            for time_index, timestamp in enumerate(times.astype('datetime64[D]').astype(object)):
+                doy = day_of_year(timestamp.month, timestamp.day)
+                place(doy - 1, year_index,
+                      RegionBlock(block.rows, block.cols, block.values[time_index]))
+            logger.info(f"{event}: {year} tamamlandı")
+    else:
+        # Aynı dosyaya düşen günler (örn. aylık CCMP) tek okumayla doldurulur
+        files = {}
+        for year_index, year in enumerate(range(year_start, year_end + 1)):
+            for doy in range(1, 367):
+                date = datetime(2000, 1, 1) + timedelta(days=doy - 1)
+                try:
+                    actual = datetime(year, date.month, date.day)
+                except ValueError:
+                    continue  # Artık olmayan yılda 29 Şubat
+                url = config['url_template'].format(
+                    year=year, month=actual.month, day=actual.day,
+                    doy=actual.timetuple().tm_yday
+                )
+                files.setdefault((year_index, url), []).append((doy, actual))
+        
+        futures = {
+            YEAR_FETCH_EXECUTOR.submit(fetch_region_block, event, lat_range, lon_range,
+                                       days[0][1].year, days[0][1].month, days[0][1].day): (year_index, days)
+            for (year_index, url), days in files.items()
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            year_index, days = futures[future]
+            try:
+                block = future.result()
+            except Exception as e:
+                logger.error(f"{event} {days[0][1].date()} bölge okuma hatası: {str(e)}")
+                continue
+            for doy, _ in days:
+                place(doy - 1, year_index, block)
+            if done % 100 == 0:
+                logger.info(f"{event}: {done}/{len(futures)} dosya okundu")
+    
+    cube.flush()
+    return {
+        'row_start': int(rows[0]),
+        'col_start': int(cols[0]),
+        'year_start': year_start,
+        'n_years': year_end - year_start + 1,
+        'harmonic': harmonic,
+        'shape': list(cube.shape)
+    }
+
+
+def build_climatology(region: str, events: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Bir bölge için klimatoloji deposunu oluşturur.
+    
+    Her olay için bölge küpü çekilir, ardından her (hücre, yılın günü) için
+    NaN'leri filtrelenmiş yıllık seri depoya yazılır. Harmonik olaylar (gelgit)
+    tarihten bağımsız tek kayıtla saklanır.
+    
+    Args:
+        region: CLIMATOLOGY_REGIONS anahtarı (örn: 'turkey')
+        events: Olay listesi (varsayılan: grid tanımı olan tüm olaylar)
+        
+    Returns:
+        Olay başına yazılan kayıt sayısı
+    """
+    if region not in CLIMATOLOGY_REGIONS:
+        raise ValueError(f"Geçersiz bölge: {region}. Desteklenen: {list(CLIMATOLOGY_REGIONS.keys())}")
+    
+    bounds = CLIMATOLOGY_REGIONS[region]
+    events = events or gridded_events()
+    written = {}
+    
+    for event in events:
+        if event not in DATASET_CONFIG:
+            raise ValueError(f"Geçersiz olay tipi: {event}")
+        
+        logger.info(f"Klimatoloji oluşturuluyor: {event}, bölge: {bounds['name']}")
+        cube_path = cache_path(f"build_{region}_{event}.npy")
+        
+        try:
+            meta = build_region_cube(event, bounds['lat_range'], bounds['lon_range'], cube_path)
+            cube = np.load(cube_path, mmap_mode='r')
+            
+            def records():
+                for doy_index in range(cube.shape[0]):
+                    slab = np.asarray(cube[doy_index], dtype=float)  # (satır, sütun, yıl)
+                    for r, c in zip(*np.nonzero(np.isfinite(slab).any(axis=-1))):
+                        values = slab[r, c]
+                        values = values[~np.isnan(values)]
+                        if meta['harmonic']:
+                            # fetch_event_data ile aynı: her yıl için aynı değer
+                            values = np.repeat(values, meta['n_years'])
+                        doy = HARMONIC_DOY if meta['harmonic'] else doy_index + 1
+                        yield meta['row_start'] + r, meta['col_start'] + c, doy, values
+            
+            # Yalnızca bu bölgenin hücreleri, tek işlemde değiştirilir (örtüşen bölgeler korunur)
+            count = CLIMATOLOGY_STORE.replace_region(
+                event,
+                (meta['row_start'], meta['row_start'] + cube.shape[1] - 1),
+                (meta['col_start'], meta['col_start'] + cube.shape[2] - 1),
+                records()
+            )
+            
+            written[event] = count
+            logger.info(f"✓ {event}: {count} kayıt yazıldı")
+        finally:
+            if os.path.exists(cube_path):
+                os.remove(cube_path)
+    
+    return written
+
+
+def build_cube(region: str, events: Optional[List[str]] = None) -> Dict[str, List[int]]:
+    """
+    Bir bölge için olay başına bellek eşlemeli klimatoloji küpü oluşturur.
+    
+    Küp CLIMATOLOGY_CUBE_DIR altına yeni adlı bir veri dosyasına yazılır, sonra
+    metadata (yayın işaretçisi) atomik olarak değiştirilir; çalışan worker'lar
+    eski küpü okumaya devam eder ve bir sonraki dizin taramasında yeni veriyi
+    yeni metadata ile birlikte eşler.
+    
+    Args:
+        region: CLIMATOLOGY_REGIONS anahtarı
+        events: Olay listesi (varsayılan: grid tanımı olan tüm olaylar)
+        
+    Returns:
+        Olay başına küp şekli
+    """
+    if region not in CLIMATOLOGY_REGIONS:
+        raise ValueError(f"Geçersiz bölge: {region}. Desteklenen: {list(CLIMATOLOGY_REGIONS.keys())}")
+    
+    bounds = CLIMATOLOGY_REGIONS[region]
+    events = events or gridded_events()
+    shapes = {}
+    
+    for event in events:
+        if event not in DATASET_CONFIG:
+            raise ValueError(f"Geçersiz olay tipi: {event}")
+        
+        logger.info(f"Küp oluşturuluyor: {event}, bölge: {bounds['name']}")
+        os.makedirs(CUBE_DIR, exist_ok=True)
+        data_path = new_cube_data_path(region, event)
+        published = False
+        
+        try:
+            meta = build_region_cube(event, bounds['lat_range'], bounds['lon_range'], data_path)
+            meta.update({'event': event, 'region': region, 'data_file': os.path.basename(data_path),
+                         'lat_range': bounds['lat_range'], 'lon_range': bounds['lon_range']})
+            publish_cube(region, event, meta)
+            published = True
+        finally:
+            # Yayına alınamayan veri dosyası bırakılmaz
+            if not published and os.path.exists(data_path):
+                os.remove(data_path)
+        
+        shapes[event] = meta['shape']
+        logger.info(f"✓ {event}: {data_path} {meta['shape']}")
+    
+    return shapes
+
+
+def mirror_urls(event: str) -> List[str]:
+    """Olayın baz yıllarındaki tüm tarihleri kapsayan kaynak URL'leri (tekrarsız, tarih sıralı)."""
+    config = DATASET_CONFIG[event]
+    if 'url_template' not in config:
+        return [config['url']]
+    
+    year_start, year_end = config['year_range']
+    urls = {}
+    date = datetime(year_start, 1, 1)
+    while date.year <= year_end:
+        urls.setdefault(event_url(config, date), None)
+        date += timedelta(days=1)
+    return list(urls)
+
+
+def mirror_file(event: str, url: str, generation: str, lat_range: Tuple[float, float],
+                lon_range: Tuple[float, float]) -> str:
+    """
+    Tek bir kaynak dosyanın bölge alt kümesini yansı nesline indirir.
+    
+    Tek aggregation'lı veri setlerinde zaman ekseni baz yıllarla sınırlanır ve
+    yıl başına bir okumayla indirilir.
+    
+    Returns:
+        Yazılan yansı dosyasının yolu
+    """
+    config = DATASET_CONFIG[event]
+    with open_event_dataset(config, url) as ds:
+        subset = ds[event_variables(config)].sel(**_region_indexers(ds, config, lat_range, lon_range))
+        if is_single_aggregation(config):
+            year_start, year_end = config['year_range']
+            subset = xr.concat([
+                subset.sel(time=slice(datetime(year, 1, 1), datetime(year, 12, 31, 23, 59))).load()
+                for year in range(year_start, year_end + 1)
+            ], dim='time')
+        else:
+            subset = subset.load()
+    return DATASET_MIRROR.write(url, generation, subset, lat_range, lon_range)
+
+
+def build_mirror(region: str, events: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Bir bölge için olay başına yerel veri seti yansısı oluşturur.
+    
+    Her olayın baz yıllarındaki kaynak dosyalarının bölge alt kümesi
+    MIRROR_DIR altına NetCDF olarak indirilir; dosyalar YEAR_FETCH_EXECUTOR
+    üzerinde paralel çekilir. Yayındaki yansı aynı bölgeye aitse yalnızca eksik
+    dosyalar yerinde tamamlanır. Bölge değiştiyse (veya yansı yoksa) dosyalar
+    yeni bir nesle indirilir ve nesil ancak indirme bittiğinde yayına alınır;
+    bu sırada istekler eski nesilden (yalnızca onun bölgesi için) okunur. İndirme
+    hatası alan nesil yayına alınmaz (yayındaki eksiksiz nesil korunur); yarıda
+    kalan veya hata alan hazırlık nesline yeniden çalıştırıldığında devam edilir.
+    
+    Args:
+        region: CLIMATOLOGY_REGIONS anahtarı
+        events: Olay listesi (varsayılan: grid tanımı olan tüm olaylar)
+        
+    Returns:
+        Olay başına {'downloaded', 'existing', 'missing', 'failed'} dosya sayıları ve
+        neslin yayına alınıp alınmadığı ('published')
+    """
+    if region not in CLIMATOLOGY_REGIONS:
+        raise ValueError(f"Geçersiz bölge: {region}. Desteklenen: {list(CLIMATOLOGY_REGIONS.keys())}")
+    
+    bounds = CLIMATOLOGY_REGIONS[region]
+    lat_range, lon_range = tuple(sorted(bounds['lat_range'])), tuple(sorted(bounds['lon_range']))
+    events = events or gridded_events()
+    stats = {}
+    
+    for event in events:
+        if event not in DATASET_CONFIG:
+            raise ValueError(f"Geçersiz olay tipi: {event}")
+        
+        previous = DATASET_MIRROR.meta(event)
+        if previous is not None and \
+                (tuple(previous['lat_range']), tuple(previous['lon_range'])) == (lat_range, lon_range):
+            generation = previous['generation']
+        else:
+            generation = DATASET_MIRROR.staging(event, lat_range, lon_range)
+        
+        urls = mirror_urls(event)
+        pending = [url for url in urls if not os.path.exists(DATASET_MIRROR.path(url, generation))]
+        logger.info(f"Yansı oluşturuluyor: {event}, bölge: {bounds['name']}, "
+                    f"{len(pending)}/{len(urls)} dosya indirilecek")
+        
+        futures = {YEAR_FETCH_EXECUTOR.submit(mirror_file, event, url, generation, lat_range, lon_range): url
+                   for url in pending}
+        failed = missing = 0
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                future.result()
+            except Exception as e:
+                if is_missing_error(e):
+                    # Ürünün kapsamadığı tarih (örn. 5 günlük SSHA ara günleri)
+                    logger.debug(f"{event} kaynak dosya yok: {futures[future]}")
+                    missing += 1
+                else:
+                    logger.error(f"{event} yansı indirme hatası ({futures[future]}): {str(e)}")
+                    failed += 1
+            if done % 100 == 0:
+                logger.info(f"{event}: {done}/{len(futures)} dosya indirildi")
+        
+        stats[event] = {'downloaded': len(pending) - failed - missing,
+                        'existing': len(urls) - len(pending), 'missing': missing, 'failed': failed}
+        if failed:
+            # Eksik nesil yayına alınmaz; hazırlık nesli sonraki çalıştırmada tamamlanır
+            stats[event]['published'] = False
+            logger.error(f"✗ {event}: {failed} dosya indirilemedi, nesil yayına alınmadı "
+                         f"({generation}): {stats[event]}")
+            continue
+        
+        # Nesil yalnızca indirme hatasız bittikten sonra yayına alınır (eski nesil silinir)
+        stats[event]['published'] = True
+        DATASET_MIRROR.publish(event, {'event': event, 'region': region, 'generation': generation,
+                                       'lat_range': lat_range, 'lon_range': lon_range,
+                                       'files': stats[event]})
+        logger.info(f"✓ {event}: {stats[event]}")
+    
+    return stats
+
+
+def build_climatology_main(argv: Optional[List[str]] = None):
+    """Klimatoloji deposu oluşturma komutu."""
+    parser = argparse.ArgumentParser(
+        prog='calculate_ocean_probabilities.py build-climatology',
+        description='Seçili bölge için klimatoloji deposunu oluşturur'
+    )
+    parser.add_argument('--region', default='turkey', choices=sorted(CLIMATOLOGY_REGIONS.keys()),
+                        help='Bölge (varsayılan: turkey)')
+    parser.add_argument('--events', nargs='+', choices=sorted(gridded_events()),
+                        help='Olaylar (varsayılan: tümü)')
+    args = parser.parse_args(argv)
+    
+    written = build_climatology(args.region, args.events)
+    
+    print("\nYazılan kayıtlar (JSON):")
+    print(json.dumps(written, indent=2, ensure_ascii=False))
+    print(f"Depo: {CLIMATOLOGY_STORE.path}")
+
+
+def build_cube_main(argv: Optional[List[str]] = None):
+    """Bellek eşlemeli klimatoloji küpü oluşturma komutu."""
+    parser = argparse.ArgumentParser(
+        prog='calculate_ocean_probabilities.py build-cube',
+        description='Seçili bölge için olay başına memmap klimatoloji küpü oluşturur'
+    )
+    parser.add_argument('--region', default='turkey', choices=sorted(CLIMATOLOGY_REGIONS.keys()),
+                        help='Bölge (varsayılan: turkey)')
+    parser.add_argument('--events', nargs='+', choices=sorted(gridded_events()),
+                        help='Olaylar (varsayılan: tümü)')
+    args = parser.parse_args(argv)
+    
+    shapes = build_cube(args.region, args.events)
+    
+    print("\nKüp şekilleri (gün, satır, sütun, yıl):")
+    print(json.dumps(shapes, indent=2, ensure_ascii=False))
+    print(f"Dizin: {CUBE_DIR}")
+
+
+def build_mirror_main(argv: Optional[List[str]] = None):
+    """Bölgesel yerel veri seti yansısı oluşturma komutu."""
+    parser = argparse.ArgumentParser(
+        prog='calculate_ocean_probabilities.py mirror',
+        description='Seçili bölge için kaynak veri setlerinin alt kümesini yerel NetCDF dosyalarına indirir'
+    )
+    parser.add_argument('--region', default='turkey', choices=sorted(CLIMATOLOGY_REGIONS.keys()),
+                        help='Bölge (varsayılan: turkey)')
+    parser.add_argument('--events', nargs='+', choices=sorted(gridded_events()),
+                        help='Olaylar (varsayılan: tümü)')
+    args = parser.parse_args(argv)
+    
+    stats = build_mirror(args.region, args.events)
+    
+    print("\nİndirilen dosyalar (JSON):")
+    print(json.dumps(stats, indent=2, ensure_ascii=False))
+    print(f"Dizin: {MIRROR_DIR}")
+    
+    if not all(event_stats['published'] for event_stats in stats.values()):
+        # Yayına alınamayan olay varsa komut hata koduyla biter (yeniden çalıştırılmalı)
+        sys.exit(1)
 
 
 def main():
@@ -487,5 +2570,12 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == 'build-climatology':
+        build_climatology_main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'build-cube':
+        build_cube_main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'mirror':
+        build_mirror_main(sys.argv[2:])
+    else:
+        main()
 
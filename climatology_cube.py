@@ -0,0 +1,213 @@
+"""
+Bellek eşlemeli (numpy.memmap) klimatoloji küpleri.
+Her (bölge, olay) için (yılın günü, satır, sütun, yıl) şeklinde float32 .npy
+dosyası ve yanında JSON metadata tutulur. Her oluşturma yeni adlı bir veri
+dosyası yazar; metadata dosyası yayındaki veri dosyasını gösteren tek
+işaretçidir ve atomik olarak değiştirilir. Dosyalar salt okunur eşlendiğinden
+gunicorn worker'ları sayfaları işletim sisteminin sayfa önbelleği üzerinden
+paylaşır; bir nokta serisi (yıl ekseni bitişik) birkaç sayfa okumasıyla gelir.
+Küpler `python calculate_ocean_probabilities.py build-cube` ile oluşturulur.
+"""
+
+import os
+import json
+import glob
+import threading
+import time
+import uuid
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from series_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+CUBE_DIR = os.environ.get('CLIMATOLOGY_CUBE_DIR') or os.path.join(CACHE_DIR, 'cubes')
+
+
+def cube_meta_path(region: str, event: str, directory: str = CUBE_DIR) -> str:
+    """Bölge/olay küpünün metadata (yayın işaretçisi) dosya yolu."""
+    return os.path.join(directory, f"{region}_{event}.json")
+
+
+def new_cube_data_path(region: str, event: str, directory: str = CUBE_DIR) -> str:
+    """Yeni oluşturulacak küp için benzersiz veri dosyası yolu."""
+    name = f"{region}_{event}-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}.npy"
+    return os.path.join(directory, name)
+
+
+def cube_data_path(meta_path: str, meta: Dict) -> str:
+    """Metadata'nın gösterdiği veri dosyası (data_file'sız eski küplerde aynı adlı .npy)."""
+    data_file = meta.get('data_file') or os.path.basename(meta_path)[:-len('.json')] + '.npy'
+    return os.path.join(os.path.dirname(meta_path), data_file)
+
+
+def publish_cube(region: str, event: str, meta: Dict, directory: str = CUBE_DIR) -> str:
+    """
+    meta['data_file'] küpünü yayına alır.
+
+    Metadata atomik olarak değiştirilir; worker'lar bir sonraki taramada yeni
+    metadata ile yeni veri dosyasını birlikte görür. Önceki veri dosyası
+    silinir; onu eşlemiş worker'lar eşleme kapanana kadar okumaya devam eder.
+
+    Returns:
+        Metadata dosya yolu
+    """
+    meta_path = cube_meta_path(region, event, directory)
+    previous = None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            previous = cube_data_path(meta_path, json.load(f))
+    except (OSError, ValueError):
+        pass
+
+    tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+    if previous is not None and previous != cube_data_path(meta_path, meta):
+        try:
+            os.remove(previous)
+        except OSError:
+            pass
+    return meta_path
+
+
+class _MappedCube:
+    """Tek bir eşlenmiş küp ve metadata'sı."""
+
+    __slots__ = ('meta', 'data', 'mtime')
+
+    def __init__(self, meta: Dict, data: np.ndarray, mtime: int):
+        self.meta = meta
+        self.data = data
+        self.mtime = mtime
+
+    def contains(self, row: int, col: int) -> bool:
+        _, n_rows, n_cols, _ = self.data.shape
+        return (0 <= row - self.meta['row_start'] < n_rows and
+                0 <= col - self.meta['col_start'] < n_cols)
+
+
+class ClimatologyCubes:
+    """
+    Olay başına eşlenmiş küpleri açan ve nokta serisi okuyan arka uç.
+
+    Küpler ilk kullanımda açılır; dizin RESCAN_INTERVAL aralıklarla yeniden
+    taranır ve yeniden yayına alınan (metadata mtime'ı değişen) küpler
+    metadata'nın gösterdiği veri dosyasıyla yeniden eşlenir.
+
+    Args:
+        directory: Küp dizini
+    """
+
+    # Dizin bu süreden sık taranmaz (istek başına dosya sistemi çağrısı yapmamak için)
+    RESCAN_INTERVAL = 30.0
+
+    def __init__(self, directory: str = CUBE_DIR):
+        self.directory = directory
+        self._cubes: Dict[str, List[_MappedCube]] = {}
+        self._scanned: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def series(self, event: str, row: int, col: int, doy: int) -> Optional[np.ndarray]:
+        """
+        Hücrenin yıllık serisini küpten okur.
+
+        Args:
+            event: Olay tipi
+            row, col: Grid hücresi indeksleri
+            doy: Artık yıl referanslı yılın günü (1-366)
+
+        Returns:
+            NaN'leri filtrelenmiş değerler; hücre hiçbir küpte yoksa None
+        """
+        if row is None or col is None:
+            return None
+        for cube in self._event_cubes(event):
+            if not cube.contains(row, col):
+                continue
+            doy_index = 0 if cube.meta['harmonic'] else doy - 1
+            values = np.array(cube.data[doy_index, row - cube.meta['row_start'],
+                                        col - cube.meta['col_start']], dtype=float)
+            values = values[~np.isnan(values)]
+            if cube.meta['harmonic'] and len(values) > 0:
+                # fetch_event_data ile aynı: her yıl için aynı değer
+                values = np.repeat(values, cube.meta['n_years'])
+            return values
+        return None
+
+    def cell_matrix(self, event: str, row: int, col: int) -> Optional[np.ndarray]:
+        """
+        Hücrenin tüm günlerdeki yıllık değerlerini tek dilimde okur.
+        
+        Returns:
+            (yılın günü, yıl) şeklinde dizi (NaN'ler dahil; harmonik küplerde tek
+            satır); hücre hiçbir küpte yoksa None
+        """
+        if row is None or col is None:
+            return None
+        for cube in self._event_cubes(event):
+            if cube.contains(row, col):
+                return np.array(cube.data[:, row - cube.meta['row_start'],
+                                          col - cube.meta['col_start']], dtype=float)
+        return None
+
+    def available(self, event: str) -> bool:
+        """Olay için en az bir küp var mı?"""
+        return bool(self._event_cubes(event))
+
+    def _event_cubes(self, event: str) -> List[_MappedCube]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cubes.get(event)
+            if cached is not None and now - self._scanned.get(event, 0.0) < self.RESCAN_INTERVAL:
+                return cached
+            self._scanned[event] = now
+
+            # Dizin değişmiş olabilir: yeni, silinmiş veya yeniden yayına alınmış küpleri bul
+            cubes = []
+            for meta_path in sorted(glob.glob(os.path.join(self.directory, f"*_{event}.json"))):
+                try:
+                    cube = self._map(event, meta_path, cached or [])
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Küp açılamadı ({meta_path}): {e}")
+                    continue
+                if cube is not None:
+                    cubes.append(cube)
+
+            self._cubes[event] = cubes
+            return cubes
+
+    @staticmethod
+    def _map(event: str, meta_path: str, cached: List[_MappedCube]) -> Optional[_MappedCube]:
+        # Okuma sırasında yeni küp yayına alınıp eski veri dosyası silinirse metadata yeniden okunur
+        for attempt in range(2):
+            mtime = os.stat(meta_path).st_mtime_ns
+            previous = next((cube for cube in cached
+                             if cube.meta['meta_path'] == meta_path and cube.mtime == mtime), None)
+            if previous is not None:
+                return previous
+
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('event') != event:
+                return None
+            data_path = cube_data_path(meta_path, meta)
+            meta.update({'meta_path': meta_path, 'data_path': data_path})
+            try:
+                data = np.load(data_path, mmap_mode='r')
+            except FileNotFoundError:
+                if attempt == 0:
+                    continue
+                raise
+            logger.info(f"Küp eşlendi: {data_path} {data.shape}")
+            return _MappedCube(meta, data, mtime)
+        return None
+
+
+# Süreç genelinde paylaşılan küp arka ucu
+CLIMATOLOGY_CUBES = ClimatologyCubes()
@@ -0,0 +1,168 @@
+"""
+Önceden hesaplanmış klimatoloji deposu.
+(olay, grid hücresi, yılın günü) için yıllık değer serilerini yerel bir SQLite
+dosyasında saklar; calculate_probabilities'in lookup kipi ağa çıkmadan buradan
+okur. Depo `python calculate_ocean_probabilities.py build-climatology` ile
+doldurulur.
+"""
+
+import os
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from series_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Önceden hesaplanacak bölgeler (enlem/boylam sınırları, -180/180 boylam)
+CLIMATOLOGY_REGIONS = {
+    'turkey': {
+        'name': 'Türkiye denizleri (Karadeniz, Marmara, Ege, Akdeniz)',
+        'lat_range': (35.5, 42.5),
+        'lon_range': (25.5, 42.0)
+    },
+    'marmara': {
+        'name': 'Marmara Denizi',
+        'lat_range': (40.2, 41.3),
+        'lon_range': (26.5, 29.9)
+    }
+}
+
+# Tarihten bağımsız (harmonik) olaylar bu gün anahtarıyla saklanır
+HARMONIC_DOY = 0
+
+_DTYPE = np.dtype('<f8')
+
+
+def day_of_year(month: int, day: int) -> int:
+    """
+    Ay/günü artık yıl referanslı yılın gününe çevirir (1-366).
+
+    29 Şubat her zaman 60, 1 Mart her zaman 61 olur; böylece artık olan ve
+    olmayan yıllar aynı gün anahtarını paylaşır.
+    """
+    return datetime(2000, month, day).timetuple().tm_yday
+
+
+class ClimatologyStore:
+    """
+    (olay, satır, sütun, gün) anahtarlı yıllık değer serisi deposu.
+
+    Args:
+        path: SQLite dosya yolu
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    @classmethod
+    def from_env(cls) -> 'ClimatologyStore':
+        """CLIMATOLOGY_STORE_PATH ortam değişkeninden (veya CACHE_DIR altından) oluşturur."""
+        path = os.environ.get('CLIMATOLOGY_STORE_PATH') or os.path.join(CACHE_DIR, 'climatology.sqlite')
+        return cls(path)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def get(self, event: str, row: int, col: int, doy: int) -> Optional[np.ndarray]:
+        """
+        Hücrenin yıllık serisini döner.
+
+        Returns:
+            NaN'leri filtrelenmiş değer dizisi, kayıt yoksa None
+        """
+        if not self.exists():
+            return None
+        result = self._connection().execute(
+            "SELECT data FROM climatology WHERE event = ? AND row = ? AND col = ? AND doy IN (?, ?) "
+            "ORDER BY doy DESC LIMIT 1",
+            (event, row, col, doy, HARMONIC_DOY)
+        ).fetchone()
+        if result is None:
+            return None
+        return np.frombuffer(result[0], dtype=_DTYPE).astype(float)
+
+    def put_many(self, event: str, records: Iterable[Tuple[int, int, int, np.ndarray]]) -> int:
+        """
+        (satır, sütun, gün, değerler) kayıtlarını toplu yazar.
+
+        Returns:
+            Yazılan kayıt sayısı
+        """
+        conn = self._connection()
+        with conn:
+            return self._insert(conn, event, records)
+
+    def replace_region(self, event: str, row_range: Tuple[int, int], col_range: Tuple[int, int],
+                       records: Iterable[Tuple[int, int, int, np.ndarray]]) -> int:
+        """
+        Olayın bölgedeki kayıtlarını yenileriyle tek işlemde değiştirir.
+
+        Yalnızca bölgenin satır/sütun aralığındaki kayıtlar silinir; örtüşen
+        başka bölgelerin aralık dışındaki kayıtları korunur. Silme ve yazma aynı
+        işlemde yapıldığından okuyucular işlem bitene kadar eski kayıtları görür,
+        yarıda kalan oluşturma depoyu değiştirmez.
+
+        Args:
+            event: Olay tipi
+            row_range: (ilk, son) satır indeksi (dahil)
+            col_range: (ilk, son) sütun indeksi (dahil)
+            records: (satır, sütun, gün, değerler) kayıtları (üreteç olabilir)
+
+        Returns:
+            Yazılan kayıt sayısı
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM climatology WHERE event = ? AND row BETWEEN ? AND ? AND col BETWEEN ? AND ?",
+                (event, int(row_range[0]), int(row_range[1]), int(col_range[0]), int(col_range[1]))
+            )
+            return self._insert(conn, event, records)
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, event: str,
+                records: Iterable[Tuple[int, int, int, np.ndarray]]) -> int:
+        count = 0
+
+        def rows():
+            nonlocal count
+            for row, col, doy, values in records:
+                count += 1
+                yield (event, int(row), int(col), int(doy),
+                       np.ascontiguousarray(values, dtype=_DTYPE).tobytes())
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO climatology (event, row, col, doy, data) VALUES (?, ?, ?, ?, ?)",
+            rows()
+        )
+        return count
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS climatology ("
+                    "event TEXT NOT NULL, row INTEGER NOT NULL, col INTEGER NOT NULL, "
+                    "doy INTEGER NOT NULL, data BLOB NOT NULL, "
+                    "PRIMARY KEY (event, row, col, doy)) WITHOUT ROWID"
+                )
+            self._local.conn = conn
+        return conn
+
+
+# Süreç genelinde paylaşılan depo
+CLIMATOLOGY_STORE = ClimatologyStore.from_env()
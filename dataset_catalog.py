@@ -0,0 +1,267 @@
+"""
+Veri seti koordinat ve metadata kataloğu.
+Her veri seti (tek URL veya URL şablonu) için lat/lon (tek URL'lilerde time)
+koordinat dizileri ve değişken adı eşlemesi (örn. u10 → uwnd) CACHE_DIR
+altında .npz + .json olarak saklanır. Katalogdaki veri setleri koordinat
+değişkenleri indirilmeden açılır; koordinatlar yerel dizilerden eklenir ve en
+yakın indeks aritmetik/ikili aramayla bulunur. Kayıt, dosyanın boyut
+uzunlukları ve koordinatların ilk/son değerleri (iki değerlik okuma) kayıtla
+uyuşuyorsa kullanılır.
+"""
+
+import os
+import io
+import json
+import hashlib
+import threading
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import xarray as xr
+from xarray.backends import NetCDF4DataStore
+
+from series_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DIR = os.environ.get('DATASET_CATALOG_DIR') or os.path.join(CACHE_DIR, 'catalog')
+
+# Kodda kullanılan ad → veri setlerinde görülen alternatif adlar
+VARIABLE_ALIASES = {
+    'lat': ('latitude', 'nav_lat'),
+    'lon': ('longitude', 'nav_lon'),
+    'time': ('times',),
+    'uwnd': ('u10', 'u_wind', 'eastward_wind'),
+    'vwnd': ('v10', 'v_wind', 'northward_wind'),
+    'u': ('uo', 'u_current', 'eastward_sea_water_velocity'),
+    'v': ('vo', 'v_current', 'northward_sea_water_velocity'),
+    'swh': ('VAVH', 'significant_wave_height'),
+    'sst': ('analysed_sst',),
+    'precip': ('precipitation',),
+}
+
+def nearest_indices(coords: np.ndarray, values) -> np.ndarray:
+    """
+    Değerlerin monoton koordinat dizisindeki en yakın indekslerini bulur.
+
+    Düzenli gridlerde indeks aritmetikle tahmin edilip komşularla doğrulanır;
+    doğrulanamayan noktalar için ikili arama (searchsorted) kullanılır.
+    datetime64 dizileri tamsayı zaman damgası olarak karşılaştırılır.
+
+    Returns:
+        Değerlerle aynı uzunlukta indeks dizisi
+    """
+    coords = np.asarray(coords)
+    values = np.atleast_1d(np.asarray(values))
+    if np.issubdtype(coords.dtype, np.datetime64):
+        values = values.astype(coords.dtype).astype(np.int64).astype(float)
+        coords = coords.astype(np.int64).astype(float)
+    else:
+        coords = coords.astype(float)
+        values = values.astype(float)
+
+    n = len(coords)
+    if n == 1:
+        return np.zeros(len(values), dtype=int)
+
+    # Düzenli grid tahmini
+    step = (coords[-1] - coords[0]) / (n - 1)
+    indices = np.clip(np.rint((values - coords[0]) / step), 0, n - 1).astype(int)
+    distance = np.abs(coords[indices] - values)
+    ok = ((indices == 0) | (distance <= np.abs(coords[np.maximum(indices - 1, 0)] - values))) & \
+         ((indices == n - 1) | (distance <= np.abs(coords[np.minimum(indices + 1, n - 1)] - values)))
+    if ok.all():
+        return indices
+
+    # Düzensiz grid: artan sıralı görünüm üzerinde ikili arama
+    descending = coords[0] > coords[-1]
+    ordered = coords[::-1] if descending else coords
+    bad = ~ok
+    right = np.clip(np.searchsorted(ordered, values[bad]), 1, n - 1)
+    left = right - 1
+    nearest = np.where(np.abs(ordered[left] - values[bad]) <= np.abs(ordered[right] - values[bad]),
+                       left, right)
+    indices[bad] = (n - 1 - nearest) if descending else nearest
+    return indices
+
+
+class CatalogEntry:
+    """
+    Bir veri setinin katalog kaydı.
+
+    bounds, koordinat değişkenlerinin dosyadaki ham (çözülmemiş) ilk ve son
+    değerleridir; aynı boyutlu ama kaymış gridleri ayırt etmek için kullanılır.
+    """
+
+    __slots__ = ('coords', 'renames', 'bounds')
+
+    def __init__(self, coords: Dict[str, np.ndarray], renames: Dict[str, str],
+                 bounds: Dict[str, List[float]]):
+        self.coords = coords
+        self.renames = renames
+        self.bounds = bounds
+
+    def source_name(self, name: str) -> str:
+        """Kodda kullanılan adın veri setindeki karşılığı."""
+        for source, target in self.renames.items():
+            if target == name:
+                return source
+        return name
+
+
+class DatasetCatalog:
+    """
+    Veri seti anahtarlı, disk destekli koordinat/metadata kataloğu.
+
+    Kayıtlar ilk açılışta veri setinden çıkarılır ve diske yazılır; sonraki
+    açılışlarda (süreç yeniden başlasa da) koordinatlar diskten gelir. Boyut
+    uzunlukları DDS ile veya koordinatların ilk/son değerleri dosyayla
+    uyuşmazsa (örn. aggregation'a yeni gün eklendi, aynı boyutlu kaymış grid)
+    kayıt yeniden oluşturulur.
+
+    Args:
+        directory: Katalog dosyalarının dizini
+    """
+
+    def __init__(self, directory: str = CATALOG_DIR):
+        self.directory = directory
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._lock = threading.Lock()
+
+    def open(self, key: str, url: str, names: List[str], with_time: bool = False) -> xr.Dataset:
+        """
+        Veri setini katalog üzerinden açar.
+
+        Args:
+            key: Katalog anahtarı (aynı gride sahip dosyalar için ortak; örn. URL şablonu)
+            url: Açılacak URL
+            names: Kodda kullanılan değişken adları (alternatif adlar bunlara çevrilir)
+            with_time: Zaman koordinatı da kataloğa alınsın mı (tek URL'li veri setleri)
+
+        Returns:
+            Değişken/koordinat adları kodda kullanılan adlara çevrilmiş Dataset
+        """
+        entry = self.get(key)
+        if entry is not None:
+            drop = [entry.source_name(dim) for dim in entry.coords]
+            store = NetCDF4DataStore.open(url)
+            ds = xr.open_dataset(store, drop_variables=drop)
+            coords = {entry.source_name(dim): values for dim, values in entry.coords.items()}
+            if all(ds.sizes.get(dim) == len(values) for dim, values in coords.items()) and \
+                    self._bounds(store, entry.coords, entry.renames) == entry.bounds:
+                return ds.assign_coords(coords).rename(entry.renames)
+            logger.info(f"Katalog kaydı güncel değil, yeniden oluşturuluyor: {key}")
+            ds.close()
+            self.discard(key)
+
+        store = NetCDF4DataStore.open(url)
+        ds = xr.open_dataset(store)
+        try:
+            renames = self._renames(ds, names)
+            ds = ds.rename(renames)
+            self.record(key, ds, renames, with_time, self._bounds(store, ['lat', 'lon', 'time'], renames))
+        except Exception as e:
+            # Katalog yazılamasa da veri seti kullanılabilir
+            logger.warning(f"Katalog kaydı oluşturulamadı ({key}): {e}")
+        return ds
+
+    def get(self, key: str) -> Optional[CatalogEntry]:
+        """Kaydı bellekten, yoksa diskten döner."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        paths = self._paths(key)
+        try:
+            with open(paths['meta'], 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with np.load(paths['data']) as data:
+                coords = {dim: data[dim] for dim in meta['coords']}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        entry = CatalogEntry(coords, meta['renames'], meta.get('bounds', {}))
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def record(self, key: str, ds: xr.Dataset, renames: Dict[str, str], with_time: bool = False,
+               bounds: Optional[Dict[str, List[float]]] = None) -> CatalogEntry:
+        """
+        Açık (adları çevrilmiş) veri setinden kaydı çıkarıp diske yazar.
+
+        Args:
+            bounds: Koordinatların dosyadaki ham ilk/son değerleri (bkz. CatalogEntry)
+        """
+        dims = ['lat', 'lon'] + (['time'] if with_time and 'time' in ds.coords else [])
+        coords = {dim: np.asarray(ds[dim].values) for dim in dims if dim in ds.coords}
+        bounds = {dim: values for dim, values in (bounds or {}).items() if dim in coords}
+        entry = CatalogEntry(coords, renames, bounds)
+
+        paths = self._paths(key)
+        os.makedirs(self.directory, exist_ok=True)
+        buffer = io.BytesIO()
+        np.savez(buffer, **coords)
+        self._write_atomic(paths['data'], buffer.getvalue())
+        meta = {'key': key, 'coords': list(coords), 'renames': renames, 'bounds': bounds}
+        self._write_atomic(paths['meta'], json.dumps(meta, ensure_ascii=False, indent=2).encode('utf-8'))
+        logger.info(f"Katalog kaydı yazıldı: {key} ({', '.join(f'{d}={len(v)}' for d, v in coords.items())})")
+
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def discard(self, key: str) -> None:
+        """Kaydı bellekten ve diskten siler."""
+        with self._lock:
+            self._entries.pop(key, None)
+        for path in self._paths(key).values():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _bounds(store: NetCDF4DataStore, dims, renames: Dict[str, str]) -> Dict[str, List[float]]:
+        """Koordinat değişkenlerinin ham ilk/son değerleri (boyut başına iki değerlik okuma)."""
+        sources = {target: source for source, target in renames.items()}
+        bounds = {}
+        # Handle kilitsiz alınır (dosya yöneticisi aynı kilidi kullanır), okumalar kilit altında
+        variables = store.ds.variables
+        with store.lock:
+            for dim in dims:
+                variable = variables.get(sources.get(dim, dim))
+                if variable is None or variable.ndim != 1 or variable.shape[0] == 0:
+                    continue
+                variable.set_auto_maskandscale(False)
+                bounds[dim] = [float(variable[0]), float(variable[-1])]
+        return bounds
+
+    @staticmethod
+    def _renames(ds: xr.Dataset, names: List[str]) -> Dict[str, str]:
+        renames = {}
+        for name in ['lat', 'lon', 'time'] + list(names):
+            if name in ds.variables or name in ds.dims:
+                continue
+            source = next((alias for alias in VARIABLE_ALIASES.get(name, ())
+                           if alias in ds.variables or alias in ds.dims), None)
+            if source is not None:
+                renames[source] = name
+        return renames
+
+    def _paths(self, key: str) -> Dict[str, str]:
+        base = os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest()[:16])
+        return {'data': base + '.npz', 'meta': base + '.json'}
+
+    @staticmethod
+    def _write_atomic(path: str, payload: bytes) -> None:
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+
+# Süreç genelinde paylaşılan katalog
+DATASET_CATALOG = DatasetCatalog()
@@ -0,0 +1,213 @@
+"""
+Bölgesel yerel veri seti yansısı.
+`python calculate_ocean_probabilities.py mirror` her olayın kaynak dosyalarının
+(tek URL veya baz yıllardaki şablon URL'ler) bölge alt kümesini MIRROR_DIR
+altına NetCDF olarak indirir. DATA_BACKENDS ile 'mirror' arka ucu seçilen
+olaylarda nokta serileri, yansı bölgesi kapsıyorsa uzak OPeNDAP yerine bu
+dosyalardan okunur; ağ gecikmesi ve THREDDS kesintileri istek yolundan çıkar.
+
+Her yansı bir nesil dizinidir (MIRROR_DIR/<olay>-<zaman damgası>/). Farklı
+bölge için yeniden oluşturulan yansı yeni nesle indirilir ve indirme bitince
+<olay>.json işaretçisi atomik olarak yeni nesle çevrilir; eski bölgenin
+dosyaları, açık handle'ları ve katalog kayıtları yeni nesille karışmaz.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+import logging
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+import xarray as xr
+
+from series_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+MIRROR_DIR = os.environ.get('MIRROR_DIR') or os.path.join(CACHE_DIR, 'mirror')
+
+# netCDF/HDF5 yazımları thread-safe değil; paralel indirmelerde dosyalar sırayla yazılır
+_WRITE_LOCK = threading.Lock()
+
+
+class DatasetMirror:
+    """
+    URL → yerel NetCDF dosyası eşlemesi ve olay bazında yansı metadata'sı.
+
+    Dosyalar MIRROR_DIR/<nesil>/<host>/<URL yolu> düzeninde saklanır (yerel
+    kaynak yolları için host 'local'). <olay>.json yayındaki neslin adını,
+    bölgesini ve indirme istatistiklerini; <olay>.staging.json yarıda kalmış
+    bir yenilemenin neslini ve bölgesini tutar.
+
+    Args:
+        directory: Yansı dizini
+    """
+
+    def __init__(self, directory: str = MIRROR_DIR):
+        self.directory = os.path.abspath(directory)
+        self._meta: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def path(self, url: str, generation: str) -> str:
+        """URL'nin verilen nesildeki dosya yolu."""
+        parts = urlsplit(url)
+        segments = [segment for segment in parts.path.split('/') if segment not in ('', '.', '..')]
+        return os.path.join(self.directory, generation, parts.netloc or 'local', *segments)
+
+    def owns(self, path: str) -> bool:
+        """Yol yansı dizininde mi?"""
+        return os.path.abspath(path).startswith(self.directory + os.sep)
+
+    def catalog_key(self, path: str, key: str) -> str:
+        """Yansı dosyasının katalog anahtarı (nesil başına ayrı; bölge alt kümesi uzak gridden farklıdır)."""
+        generation = os.path.relpath(os.path.abspath(path), self.directory).split(os.sep)[0]
+        return f"mirror:{generation}:{key}"
+
+    def local(self, event: str, url: str, lats, lons) -> Optional[str]:
+        """
+        Olayın URL'si için kullanılabilir yerel dosyayı döner.
+
+        Args:
+            event: Olay tipi
+            url: Kaynak URL
+            lats, lons: Okunacak noktalar (boylam herhangi bir konvansiyonda)
+
+        Returns:
+            Yayındaki nesilde dosya varsa ve nesil bölgesi tüm noktaları
+            kapsıyorsa yolu, değilse None
+        """
+        meta = self.meta(event)
+        if meta is None or not self.covers(meta, lats, lons):
+            return None
+        path = self.path(url, meta['generation'])
+        return path if os.path.exists(path) else None
+
+    @staticmethod
+    def covers(meta: Dict, lats, lons) -> bool:
+        """Yansı bölgesi noktaları kapsıyor mu?"""
+        lats = np.asarray(lats, dtype=float)
+        lons = (np.asarray(lons, dtype=float) + 180) % 360 - 180
+        eps = 1e-6
+        (lat_min, lat_max), (lon_min, lon_max) = meta['lat_range'], meta['lon_range']
+        return bool(np.all((lats >= lat_min - eps) & (lats <= lat_max + eps) &
+                           (lons >= lon_min - eps) & (lons <= lon_max + eps)))
+
+    def meta(self, event: str) -> Optional[Dict]:
+        """Olayın yayındaki yansı metadata'sı (dosya değişince yeniden okunur); yansı yoksa None."""
+        meta = self._read_json(self._meta_path(event), event)
+        return meta if meta is not None and 'generation' in meta else None
+
+    def staging(self, event: str, lat_range: Tuple[float, float],
+                lon_range: Tuple[float, float]) -> str:
+        """
+        Olay için bölgeye ait hazırlık neslini döner.
+
+        Aynı bölge için yarıda kalmış hazırlık nesli varsa devam edilir; farklı
+        bölgeye aitse silinip yeni nesil başlatılır.
+
+        Returns:
+            Nesil adı
+        """
+        path = self._staging_path(event)
+        staged = self._read_json(path)
+        if staged is not None:
+            if (tuple(staged['lat_range']), tuple(staged['lon_range'])) == (lat_range, lon_range):
+                return staged['generation']
+            shutil.rmtree(os.path.join(self.directory, staged['generation']), ignore_errors=True)
+
+        generation = f"{event}-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self._write_json(path, {'generation': generation, 'lat_range': lat_range, 'lon_range': lon_range})
+        return generation
+
+    def publish(self, event: str, meta: Dict) -> None:
+        """
+        meta['generation'] neslini yayına alır.
+
+        İşaretçi atomik olarak değiştirilir; önceki nesil ve hazırlık kaydı silinir.
+        Önceki nesli açık tutan worker'lar okumayı bitirir, sonraki istekler yeni
+        nesil yolunu (ve yeni katalog anahtarını) kullanır.
+        """
+        previous = self.meta(event)
+        self._write_json(self._meta_path(event), meta)
+        try:
+            os.remove(self._staging_path(event))
+        except OSError:
+            pass
+        if previous is not None and previous['generation'] != meta['generation']:
+            shutil.rmtree(os.path.join(self.directory, previous['generation']), ignore_errors=True)
+
+    def write(self, url: str, generation: str, ds: xr.Dataset,
+              lat_range: Tuple[float, float], lon_range: Tuple[float, float]) -> str:
+        """
+        Yüklenmiş veri setini URL'nin nesildeki dosyasına atomik olarak yazar.
+
+        Kaynağın kodlama ayarları (chunk, ölçek, paketleme) taşınmaz; veri
+        değişkenleri çözülmüş değerleriyle sıkıştırılarak yazılır. Dosyanın
+        bölgesi mirror_lat_range/mirror_lon_range öznitelikleriyle saklanır.
+
+        Returns:
+            Yazılan dosya yolu
+        """
+        path = self.path(url, generation)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        ds = ds.copy()
+        for name in ds.variables:
+            ds[name].encoding = {}
+        ds.attrs.update({'mirror_source': url, 'mirror_lat_range': list(lat_range),
+                         'mirror_lon_range': list(lon_range)})
+        encoding = {name: {'zlib': True, 'complevel': 4} for name in ds.data_vars}
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with _WRITE_LOCK:
+                ds.to_netcdf(tmp_path, engine='netcdf4', format='NETCDF4', encoding=encoding)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def _read_json(self, path: str, cache_key: Optional[str] = None) -> Optional[Dict]:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        if cache_key is not None:
+            with self._lock:
+                cached = self._meta.get(cache_key)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Yansı metadata'sı okunamadı ({path}): {e}")
+            return None
+        if cache_key is not None:
+            with self._lock:
+                self._meta[cache_key] = (mtime, meta)
+        return meta
+
+    def _write_json(self, path: str, payload: Dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _meta_path(self, event: str) -> str:
+        return os.path.join(self.directory, f"{event}.json")
+
+    def _staging_path(self, event: str) -> str:
+        return os.path.join(self.directory, f"{event}.staging.json")
+
+
+# Süreç genelinde paylaşılan yansı
+DATASET_MIRROR = DatasetMirror()
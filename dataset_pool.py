@@ -0,0 +1,200 @@
+"""
+OPeNDAP veri seti handle havuzu.
+Tek URL'li veri setleri (GPCP, OISST, TPXO) için açılmış xarray Dataset
+nesnelerini süreç içinde yıllar ve istekler arasında paylaşır.
+"""
+
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+import xarray as xr
+
+logger = logging.getLogger(__name__)
+
+
+def _default_opener(url: str) -> xr.Dataset:
+    """Uzak veri setini netcdf4 engine ile açar."""
+    return xr.open_dataset(url, engine='netcdf4')
+
+
+class _PoolEntry:
+    """Havuzdaki tek bir handle ve kullanım bilgisi."""
+
+    __slots__ = ('dataset', 'last_used', 'in_use', 'stale')
+
+    def __init__(self, dataset: xr.Dataset):
+        self.dataset = dataset
+        self.last_used = time.monotonic()
+        self.in_use = 0
+        self.stale = False
+
+
+class DatasetPool:
+    """
+    URL anahtarlı, LRU + boşta kalma süresi ile tahliye edilen handle havuzu.
+
+    Handle'lar ilk kullanımda açılır. Kullanım sırasında bağlantı kaynaklı bir
+    hata oluşursa handle bozuk kabul edilir ve bir sonraki istekte yeniden
+    açılır. Kullanımdaki bir handle tahliye edilirse son kullanıcı bıraktığında
+    kapatılır.
+
+    Args:
+        max_size: Aynı anda açık tutulacak en fazla handle sayısı
+        idle_timeout: Kullanılmayan handle'ın kapatılacağı süre (saniye)
+        opener: URL'den Dataset açan fonksiyon (varsayılan: xr.open_dataset)
+    """
+
+    def __init__(self, max_size: int = 8, idle_timeout: float = 900.0,
+                 opener: Optional[Callable[[str], xr.Dataset]] = None):
+        self.max_size = max(1, int(max_size))
+        self.idle_timeout = float(idle_timeout)
+        self._opener = opener or _default_opener
+        self._entries: 'OrderedDict[str, _PoolEntry]' = OrderedDict()
+        self._open_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'DatasetPool':
+        """DATASET_POOL_SIZE ve DATASET_POOL_IDLE_TIMEOUT ortam değişkenlerinden oluşturur."""
+        return cls(
+            max_size=int(os.environ.get('DATASET_POOL_SIZE', 8)),
+            idle_timeout=float(os.environ.get('DATASET_POOL_IDLE_TIMEOUT', 900))
+        )
+
+    @contextmanager
+    def dataset(self, url: str,
+                opener: Optional[Callable[[str], xr.Dataset]] = None) -> Iterator[xr.Dataset]:
+        """
+        URL için havuzdaki handle'ı ödünç verir.
+
+        Args:
+            url: Veri seti URL'si
+            opener: Handle yoksa kullanılacak açıcı (varsayılan: havuzun açıcısı)
+
+        Örnek:
+            >>> with DATASET_POOL.dataset(url) as ds:
+            ...     values = ds['sst'].sel(lat=40.0, lon=30.0, method='nearest').values
+        """
+        entry = self._acquire(url, opener or self._opener)
+        try:
+            yield entry.dataset
+        except (KeyError, IndexError, ValueError):
+            # Veri seviyesindeki hatalar (eksik değişken, geçersiz tarih) handle'ı bozmaz
+            raise
+        except Exception:
+            # Bağlantı kopmuş olabilir; bir sonraki kullanımda yeniden aç
+            logger.warning(f"Havuzdaki handle hata verdi, yeniden açılacak: {url}")
+            with self._lock:
+                self._mark_stale_locked(url, entry)
+            raise
+        finally:
+            self._release(entry)
+
+    def discard(self, url: str) -> None:
+        """URL'nin handle'ını havuzdan çıkarır (kullanımdaysa bırakılınca kapanır)."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._mark_stale_locked(url, entry)
+            to_close = self._collect_closable_locked([entry] if entry else [])
+        self._close_all(to_close)
+
+    def clear(self) -> None:
+        """Tüm handle'ları havuzdan çıkarır."""
+        with self._lock:
+            entries = list(self._entries.values())
+            for url, entry in list(self._entries.items()):
+                self._mark_stale_locked(url, entry)
+            to_close = self._collect_closable_locked(entries)
+        self._close_all(to_close)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _acquire(self, url: str, opener: Callable[[str], xr.Dataset]) -> _PoolEntry:
+        with self._lock:
+            to_close = self._evict_idle_locked()
+            entry = self._checkout_locked(url)
+            open_lock = self._open_locks.setdefault(url, threading.Lock())
+        self._close_all(to_close)
+        if entry is not None:
+            return entry
+
+        # Aynı URL'nin paralel açılmasını engelle, diğer URL'leri bekletme
+        with open_lock:
+            with self._lock:
+                entry = self._checkout_locked(url)
+            if entry is not None:
+                return entry
+
+            logger.info(f"Havuz için veri seti açılıyor: {url}")
+            entry = _PoolEntry(opener(url))
+            entry.in_use = 1
+
+            with self._lock:
+                self._entries[url] = entry
+                to_close = self._evict_lru_locked()
+        self._close_all(to_close)
+        return entry
+
+    def _release(self, entry: _PoolEntry) -> None:
+        with self._lock:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+            to_close = self._collect_closable_locked([entry])
+        self._close_all(to_close)
+
+    def _checkout_locked(self, url: str) -> Optional[_PoolEntry]:
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        entry.in_use += 1
+        entry.last_used = time.monotonic()
+        self._entries.move_to_end(url)
+        return entry
+
+    def _mark_stale_locked(self, url: str, entry: _PoolEntry) -> None:
+        entry.stale = True
+        if self._entries.get(url) is entry:
+            del self._entries[url]
+
+    def _evict_idle_locked(self) -> list:
+        now = time.monotonic()
+        expired = [(url, entry) for url, entry in self._entries.items()
+                   if entry.in_use == 0 and now - entry.last_used > self.idle_timeout]
+        for url, entry in expired:
+            logger.debug(f"Boşta kalan handle kapatılıyor: {url}")
+            self._mark_stale_locked(url, entry)
+        return self._collect_closable_locked([entry for _, entry in expired])
+
+    def _evict_lru_locked(self) -> list:
+        evicted = []
+        while len(self._entries) > self.max_size:
+            url, entry = next(iter(self._entries.items()))
+            logger.debug(f"LRU tahliyesi: {url}")
+            self._mark_stale_locked(url, entry)
+            evicted.append(entry)
+        return self._collect_closable_locked(evicted)
+
+    @staticmethod
+    def _collect_closable_locked(entries: list) -> list:
+        return [entry for entry in entries
+                if entry is not None and entry.stale and entry.in_use == 0]
+
+    @staticmethod
+    def _close_all(entries: list) -> None:
+        for entry in entries:
+            try:
+                entry.dataset.close()
+            except Exception as e:
+                logger.debug(f"Handle kapatılırken hata (yok sayıldı): {e}")
+
+
+# Süreç genelinde paylaşılan havuz (gunicorn worker başına bir tane)
+DATASET_POOL = DatasetPool.from_env()
@@ -0,0 +1,398 @@
+"""
+Uzun süren olasılık hesaplamaları için kalıcı iş kuyruğu ve worker.
+İşler CACHE_DIR altındaki SQLite (WAL) dosyasında tutulur; web worker'ları
+işi kuyruğa yazıp hemen iş kimliği döner, arka plandaki worker süreçleri
+kuyruğu boşaltır. Aynı kanonik istek hash'ine sahip bekleyen, çalışan veya
+eksiksiz tamamlanmış iş varsa yeni iş açılmaz.
+
+Kullanım:
+    python jobs.py worker            # Kuyruğu sürekli boşaltır
+    python jobs.py worker --once     # Kuyruktaki işleri bitirip çıkar
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import argparse
+import threading
+import subprocess
+import logging
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: gömülü worker tekilliği sağlanamaz
+    fcntl = None
+
+from series_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Çalışıyor görünen ama bu süre boyunca ilerleme bildirmeyen işler yeniden kuyruğa alınır
+JOB_STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', 900))
+# Tamamlanmış işlerin saklanma süresi (saniye)
+JOB_RESULT_TTL = float(os.environ.get('JOB_RESULT_TTL', 86400))
+# Web sürecinin ilk iş isteğinde başlattığı gömülü worker sayısı (0 ise yalnızca harici worker)
+JOB_WORKER_PROCESSES = int(os.environ.get('JOB_WORKER_PROCESSES', 1))
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+class JobQueue:
+    """
+    SQLite üzerinde kalıcı iş kuyruğu.
+
+    Her thread kendi bağlantısını kullanır; iş alma (claim) BEGIN IMMEDIATE
+    ile yapıldığından birden çok worker süreci aynı işi alamaz.
+
+    Args:
+        path: SQLite dosya yolu
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._initialized = False
+
+    @classmethod
+    def from_env(cls) -> 'JobQueue':
+        """JOB_QUEUE_PATH ortam değişkeninden (varsayılan CACHE_DIR/jobs.sqlite) oluşturur."""
+        return cls(os.environ.get('JOB_QUEUE_PATH') or os.path.join(CACHE_DIR, 'jobs.sqlite'))
+
+    def submit(self, params: Dict, request_hash: Optional[str] = None) -> Dict:
+        """
+        İşi kuyruğa ekler; aynı hash'li kullanılabilir iş varsa onu döner.
+
+        Args:
+            params: Doğrulanmış istek parametreleri (parse_probability_request çıktısı)
+            request_hash: Kanonik istek hash'i (None ise tekilleştirme yapılmaz)
+
+        Returns:
+            İş kaydı ('deduplicated' alanı mevcut işe bağlandıysa True)
+        """
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if request_hash is not None:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE request_hash = ? AND "
+                    "(status IN ('queued', 'running') OR (status = 'done' AND partial = 0 AND finished > ?)) "
+                    "ORDER BY created DESC LIMIT 1",
+                    (request_hash, now - JOB_RESULT_TTL)
+                ).fetchone()
+                if row is not None:
+                    return dict(self._to_job(row), deduplicated=True)
+
+            job_id = uuid.uuid4().hex
+            progress = {event: {'status': 'pending'} for event in params['events']}
+            conn.execute(
+                "INSERT INTO jobs (id, request_hash, params, status, progress, created) "
+                "VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, request_hash, json.dumps(params), json.dumps(progress), now)
+            )
+        logger.info(f"İş kuyruğa alındı: {job_id}")
+        return dict(self.get(job_id), deduplicated=False)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """İş kaydını döner; yoksa None."""
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else self._to_job(row)
+
+    def claim(self, worker: str) -> Optional[Dict]:
+        """
+        Sıradaki işi worker adına alır (zaman aşımına uğramış çalışan işler dahil).
+
+        Returns:
+            Alınan iş kaydı; kuyruk boşsa None
+        """
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' OR (status = 'running' AND heartbeat < ?) "
+                "ORDER BY created ASC LIMIT 1",
+                (now - JOB_STALE_SECONDS,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started = ?, heartbeat = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (worker, now, now, row[0])
+            )
+        return self.get(row[0])
+
+    def update_progress(self, job_id: str, event: str, detail: Dict) -> None:
+        """Bir olayın sonucunu işin ilerlemesine yazar."""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT progress FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            progress = json.loads(row[0])
+            progress[event] = dict(detail, status='done')
+            conn.execute("UPDATE jobs SET progress = ?, heartbeat = ? WHERE id = ?",
+                         (json.dumps(progress), time.time(), job_id))
+
+    def heartbeat(self, job_id: str) -> None:
+        """Çalışan işin canlılık zamanını yeniler (uzun olaylarda işin yeniden alınmasını önler)."""
+        conn = self._connection()
+        with conn:
+            conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = 'running'",
+                         (time.time(), job_id))
+
+    def finish(self, job_id: str, details: Dict[str, Dict]) -> None:
+        """İşi olay ayrıntılarıyla tamamlanmış olarak işaretler."""
+        partial = any(detail['partial'] or detail['probability'] is None for detail in details.values())
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, partial = ?, finished = ? WHERE id = ?",
+                (json.dumps(details), int(partial), time.time(), job_id)
+            )
+        logger.info(f"İş tamamlandı: {job_id}")
+
+    def fail(self, job_id: str, error: str) -> None:
+        """İşi hatalı olarak işaretler."""
+        conn = self._connection()
+        with conn:
+            conn.execute("UPDATE jobs SET status = 'failed', error = ?, finished = ? WHERE id = ?",
+                         (error, time.time(), job_id))
+        logger.error(f"İş başarısız: {job_id}: {error}")
+
+    def purge(self) -> int:
+        """Saklama süresi dolmuş bitmiş işleri siler; silinen iş sayısını döner."""
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?",
+                                  (time.time() - JOB_RESULT_TTL,))
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Durum başına iş sayısı."""
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: dict(rows).get(status, 0) for status in JOB_STATUSES}
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> Dict:
+        return {
+            'id': row['id'],
+            'request_hash': row['request_hash'],
+            'params': json.loads(row['params']),
+            'status': row['status'],
+            'progress': json.loads(row['progress']),
+            'result': json.loads(row['result']) if row['result'] else None,
+            'partial': bool(row['partial']),
+            'error': row['error'],
+            'created': row['created'],
+            'started': row['started'],
+            'finished': row['finished'],
+            'attempts': row['attempts']
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Açık işlemleri kendimiz (BEGIN IMMEDIATE) yönetiriz
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._ensure_schema(conn)
+            self._local.conn = conn
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        if self._initialized:
+            return
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, request_hash TEXT, params TEXT NOT NULL, status TEXT NOT NULL, "
+            "progress TEXT NOT NULL, result TEXT, partial INTEGER NOT NULL DEFAULT 0, error TEXT, "
+            "worker TEXT, attempts INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL, "
+            "started REAL, heartbeat REAL, finished REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_request_hash ON jobs (request_hash)")
+        self._initialized = True
+
+
+# Süreç genelinde paylaşılan kuyruk
+JOB_QUEUE = JobQueue.from_env()
+
+
+def run_job(queue: JobQueue, job: Dict) -> None:
+    """
+    Tek bir işi hesaplar; her olay bittikçe ilerlemeyi kuyruğa yazar.
+
+    İşlerde süre bütçesi yoktur: amaç web worker'larını bekletmeden tüm yılları
+    toplamaktır. Tek bir olay JOB_STALE_SECONDS'tan uzun sürebileceğinden canlılık
+    zamanı iş boyunca ayrı bir thread'den yenilenir.
+    """
+    from calculate_ocean_probabilities import iter_probabilities_detailed
+
+    params = job['params']
+    stop = threading.Event()
+
+    def beat() -> None:
+        while not stop.wait(JOB_STALE_SECONDS / 3):
+            try:
+                queue.heartbeat(job['id'])
+            except sqlite3.Error as e:
+                logger.warning(f"İş canlılık zamanı yenilenemedi ({job['id']}): {e}")
+
+    heartbeat = threading.Thread(target=beat, name=f"job-heartbeat-{job['id'][:8]}", daemon=True)
+    heartbeat.start()
+    try:
+        details = {}
+        for event, detail in iter_probabilities_detailed(
+            params['lat'], params['lon'], params['month'], params['day'], params['events'],
+            params['thresholds'], params['use_synthetic'], params['use_climatology'],
+            params['window_days']
+        ):
+            details[event] = detail
+            queue.update_progress(job['id'], event, detail)
+        queue.finish(job['id'], {event: details[event] for event in params['events']})
+    except Exception as e:
+        logger.error(f"İş hesaplanamadı ({job['id']}): {e}", exc_info=True)
+        queue.fail(job['id'], str(e))
+    finally:
+        stop.set()
+        heartbeat.join()
+
+
+def run_worker(queue: JobQueue = JOB_QUEUE, poll_interval: float = 1.0, once: bool = False) -> int:
+    """
+    Kuyruğu boşaltan worker döngüsü.
+
+    Args:
+        queue: İş kuyruğu
+        poll_interval: Kuyruk boşken bekleme süresi (saniye)
+        once: True ise kuyruk boşalınca çıkar
+
+    Returns:
+        İşlenen iş sayısı
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info(f"İş worker'ı başladı: {worker}")
+    processed = 0
+    last_purge = 0.0
+    while True:
+        if time.monotonic() - last_purge > 3600:
+            removed = queue.purge()
+            if removed:
+                logger.info(f"{removed} eski iş silindi")
+            last_purge = time.monotonic()
+
+        job = queue.claim(worker)
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        logger.info(f"İş alındı: {job['id']} ({', '.join(job['params']['events'])})")
+        run_job(queue, job)
+        processed += 1
+
+
+_EMBEDDED_WORKERS: Dict[int, subprocess.Popen] = {}
+_EMBEDDED_LOCK = threading.Lock()
+
+
+def ensure_embedded_workers() -> int:
+    """
+    Boş gömülü worker yuvaları (JOB_WORKER_PROCESSES) için worker süreci başlatır.
+
+    Her gömülü worker bir yuva kilidi (CACHE_DIR/jobs/worker-N.lock) tutar. Yuva
+    kilidi başka bir web sürecinin başlattığı worker'da ise yeni süreç
+    başlatılmaz; böylece gunicorn worker sayısından bağımsız olarak en fazla
+    JOB_WORKER_PROCESSES gömülü worker çalışır ve iş isteği başına süreç açılmaz.
+
+    Returns:
+        Bu süreçten başlatılmış ve çalışan worker sayısı
+    """
+    if JOB_WORKER_PROCESSES <= 0:
+        return 0
+    with _EMBEDDED_LOCK:
+        script = os.path.abspath(__file__)
+        for slot in range(JOB_WORKER_PROCESSES):
+            process = _EMBEDDED_WORKERS.get(slot)
+            if process is not None and process.poll() is None:
+                continue
+            _EMBEDDED_WORKERS.pop(slot, None)
+            if _slot_taken(slot):
+                continue
+            _EMBEDDED_WORKERS[slot] = subprocess.Popen(
+                [sys.executable, script, 'worker', '--slot', str(slot)],
+                cwd=os.path.dirname(script), start_new_session=True
+            )
+            logger.info(f"Gömülü iş worker'ı başlatıldı (yuva {slot})")
+        return len(_EMBEDDED_WORKERS)
+
+
+def _slot_path(slot: int) -> str:
+    directory = os.path.join(CACHE_DIR, 'jobs')
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"worker-{slot}.lock")
+
+
+def _hold_slot(slot: int):
+    """Gömülü worker yuvasının kilidini alır; alınamazsa None (yuva dolu)."""
+    if fcntl is None:
+        return None
+    handle = open(_slot_path(slot), 'a')
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        return None
+    return handle
+
+
+def _slot_taken(slot: int) -> bool:
+    """Yuvanın kilidini çalışan bir worker tutuyor mu? (kilit denenip hemen bırakılır)"""
+    handle = _hold_slot(slot)
+    if handle is None:
+        return fcntl is not None
+    handle.close()
+    return False
+
+
+def worker_main(argv: List[str]) -> None:
+    """İş worker'ı CLI girişi."""
+    parser = argparse.ArgumentParser(prog='jobs.py worker', description="Kalıcı iş kuyruğunu boşaltır")
+    parser.add_argument('--once', action='store_true', help="Kuyruk boşalınca çık")
+    parser.add_argument('--poll', type=float, default=1.0, help="Kuyruk boşken bekleme süresi (saniye)")
+    parser.add_argument('--slot', type=int, default=None,
+                        help="Gömülü worker yuvası (aynı yuvada tek worker çalışır)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.slot is not None:
+        slot_lock = _hold_slot(args.slot)
+        if slot_lock is None and fcntl is not None:
+            logger.info(f"Worker yuvası {args.slot} dolu, çıkılıyor")
+            return
+
+    processed = run_worker(poll_interval=args.poll, once=args.once)
+    print(f"{processed} iş işlendi")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'worker':
+        worker_main(sys.argv[2:])
+    else:
+        print(__doc__)
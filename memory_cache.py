@@ -0,0 +1,68 @@
+"""
+Süreç içi, thread-safe LRU önbellek.
+Worker belleğinde tutulan küçük sonuçlar (sıralı seriler vb.) için kullanılır.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Boyutu sınırlı, isteğe bağlı TTL'li LRU önbellek.
+
+    Args:
+        max_size: En fazla kayıt sayısı (0 ise önbellek kapalı)
+        ttl: Kayıt ömrü (saniye); None ise süresiz
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        self.max_size = int(max_size)
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Anahtarın değerini döner; yoksa veya süresi dolmuşsa default."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Değeri saklar; sınır aşılırsa en eski kullanılan kayıt çıkarılır."""
+        if self.max_size <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Anahtarı çıkarır ve değerini döner."""
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,180 @@
+"""
+Nokta zaman serileri için kalıcı disk önbelleği.
+fetch_event_data'nın döndürdüğü yıllık değer dizilerini SQLite (WAL) içinde
+ikili formatta saklar; gunicorn worker'ları aynı dosyayı paylaşır.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Önbellek dosyalarının varsayılan dizini (CACHE_DIR ile değiştirilebilir)
+CACHE_DIR = os.environ.get(
+    'CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+)
+
+# Değerler sabit genişlikli little-endian float64 olarak saklanır
+_DTYPE = np.dtype('<f8')
+
+
+def cache_path(filename: str) -> str:
+    """CACHE_DIR altındaki bir dosyanın yolunu döner (dizin yoksa oluşturur)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
+
+
+class SeriesCache:
+    """
+    Anahtar → float dizisi eşlemesi tutan, boyutu sınırlı kalıcı önbellek.
+
+    Her thread kendi SQLite bağlantısını kullanır; WAL kipi sayesinde birden
+    çok süreç aynı anda okuyup yazabilir. Toplam boyut max_bytes'ı aşınca en
+    uzun süredir erişilmeyen kayıtlar silinir.
+
+    Args:
+        path: SQLite dosya yolu
+        max_bytes: Saklanacak en fazla veri boyutu (0 ise önbellek kapalı)
+    """
+
+    # Erişim zamanını bu süreden sık güncelleme (okuma başına yazmayı önler)
+    TOUCH_INTERVAL = 300.0
+    # Her bu kadar yazmada bir boyut kontrolü yap
+    EVICT_EVERY = 50
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self._local = threading.local()
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @classmethod
+    def from_env(cls) -> 'SeriesCache':
+        """SERIES_CACHE_PATH ve SERIES_CACHE_MAX_BYTES ortam değişkenlerinden oluşturur."""
+        path = os.environ.get('SERIES_CACHE_PATH') or os.path.join(CACHE_DIR, 'series.sqlite')
+        max_bytes = int(os.environ.get('SERIES_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+        return cls(path, max_bytes)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Anahtarın dizisini döner; yoksa veya okunamazsa None."""
+        if not self.enabled:
+            return None
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT data, accessed FROM series WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            data, accessed = row
+            now = time.time()
+            if now - accessed > self.TOUCH_INTERVAL:
+                with conn:
+                    conn.execute("UPDATE series SET accessed = ? WHERE key = ?", (now, key))
+
+            return np.frombuffer(data, dtype=_DTYPE).astype(float)
+        except sqlite3.Error as e:
+            logger.warning(f"Seri önbelleği okunamadı ({key}): {e}")
+            return None
+
+    def put(self, key: str, values: np.ndarray) -> None:
+        """Diziyi anahtar altında saklar (varsa üzerine yazar)."""
+        if not self.enabled:
+            return
+        data = np.ascontiguousarray(values, dtype=_DTYPE).tobytes()
+        now = time.time()
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO series (key, data, nbytes, created, accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, data, len(data), now, now)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Seri önbelleğine yazılamadı ({key}): {e}")
+            return
+
+        with self._lock:
+            self._puts += 1
+            should_evict = self._puts % self.EVICT_EVERY == 1
+        if should_evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Toplam boyut sınırı aşıldıysa en eski erişilen kayıtları siler.
+
+        Returns:
+            Silinen kayıt sayısı
+        """
+        if not self.enabled:
+            return 0
+        try:
+            conn = self._connection()
+            total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM series").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+
+            # Sınırın %90'ına inene kadar en eski erişilenleri sil
+            target = int(self.max_bytes * 0.9)
+            removed = 0
+            with conn:
+                rows = conn.execute(
+                    "SELECT key, nbytes FROM series ORDER BY accessed ASC"
+                ).fetchall()
+                for key, nbytes in rows:
+                    if total <= target:
+                        break
+                    conn.execute("DELETE FROM series WHERE key = ?", (key,))
+                    total -= nbytes
+                    removed += 1
+
+            logger.info(f"Seri önbelleğinden {removed} kayıt silindi")
+            return removed
+        except sqlite3.Error as e:
+            logger.warning(f"Seri önbelleği temizlenemedi: {e}")
+            return 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._ensure_schema(conn)
+            self._local.conn = conn
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        if self._initialized:
+            return
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS series ("
+                "key TEXT PRIMARY KEY, data BLOB NOT NULL, nbytes INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS series_accessed ON series (accessed)")
+        self._initialized = True
+
+
+# Süreç genelinde paylaşılan önbellek
+SERIES_CACHE = SeriesCache.from_env()
@@ -0,0 +1,236 @@
+"""
+Aynı anahtarlı eşzamanlı hesaplamaları tek hesaplamada birleştirme (single-flight).
+Süreç içinde ilk çağıran hesaplar, aynı anahtarla gelen diğerleri aynı
+Future'ı bekler. Süreçler (gunicorn worker'ları) arasında ise CACHE_DIR
+altındaki kilit dosyalarıyla (fcntl.flock) aynı anahtar tek worker'da hesaplanır.
+"""
+
+import os
+import time
+import zlib
+import threading
+import logging
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: süreçler arası kilit yok, yalnızca süreç içi birleştirme
+    fcntl = None
+
+from series_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Lider sonucu paylaşılamaz olduğunda bekleyenlere iletilen işaret
+_UNSHARED = object()
+
+
+class SingleFlight:
+    """
+    Süreç içi single-flight grubu.
+
+    Örnek:
+        >>> flight = SingleFlight()
+        >>> value, shared = flight.do('key', expensive_fetch)
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None,
+           shareable: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, bool]:
+        """
+        fn'i anahtar başına aynı anda en fazla bir kez çalıştırır.
+
+        Args:
+            key: Hesaplama anahtarı
+            fn: Hesaplama
+            timeout: Bekleyen çağıranın lider sonucunu en fazla bekleme süresi (saniye)
+            shareable: Lider sonucu için False dönerse (örn. eksik seri) sonuç
+                paylaşılmaz; bekleyenler fn'i kendileri çalıştırır
+
+        Returns:
+            (sonuç, sonuç başka bir çağrıyla paylaşıldıysa True)
+
+        Raises:
+            fn'in fırlattığı hata (bekleyen tüm çağıranlara iletilir)
+            TimeoutError: Bekleyen çağıran timeout içinde sonuç alamazsa
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = Future()
+                    self._calls[key] = future
+            if leader:
+                break
+
+            logger.debug(f"Devam eden hesaplama bekleniyor: {key}")
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            result = future.result(remaining)
+            if result is not _UNSHARED:
+                return result, True
+            # Lider sonucu paylaşılamaz: bekleyenler arasından yeni lider seçilir
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._release(key)
+            future.set_exception(e)
+            raise
+        self._release(key)
+        future.set_result(result if shareable is None or shareable(result) else _UNSHARED)
+        return result, False
+
+    def do_many(self, keys: Iterable[Hashable], fn: Callable[[List[Hashable]], Dict[Hashable, Any]],
+                timeout: Optional[float] = None,
+                shareable: Optional[Callable[[Any], bool]] = None) -> Dict[Hashable, Tuple[Any, bool]]:
+        """
+        Birden çok anahtarı tek hesaplamada çalıştırır (toplu okuma).
+
+        Devam eden hesaplaması olmayan anahtarlar için çağıran liderdir ve
+        fn(lider anahtarları) tek çağrıda hepsini hesaplar; başka bir çağrıda
+        (do veya do_many) devam eden anahtarların sonucu beklenir.
+
+        Args:
+            keys: Hesaplama anahtarları
+            fn: Anahtar listesini alıp {anahtar: sonuç} dönen hesaplama
+            timeout: Devam eden hesaplamaları en fazla bekleme süresi (saniye)
+            shareable: bkz. do
+
+        Returns:
+            {anahtar: (sonuç, paylaşıldıysa True)}; timeout içinde sonuçlanmayan
+            anahtarlar sözlükte yer almaz
+
+        Raises:
+            fn'in veya beklenen hesaplamanın fırlattığı hata
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results: Dict[Hashable, Tuple[Any, bool]] = {}
+        remaining_keys = list(dict.fromkeys(keys))
+        while remaining_keys:
+            owned: Dict[Hashable, Future] = {}
+            waiting: Dict[Hashable, Future] = {}
+            with self._lock:
+                for key in remaining_keys:
+                    future = self._calls.get(key)
+                    if future is None:
+                        owned[key] = self._calls[key] = Future()
+                    else:
+                        waiting[key] = future
+
+            if owned:
+                try:
+                    computed = fn(list(owned))
+                except BaseException as e:
+                    for key, future in owned.items():
+                        self._release(key)
+                        future.set_exception(e)
+                    raise
+                for key, future in owned.items():
+                    result = computed[key]
+                    self._release(key)
+                    future.set_result(result if shareable is None or shareable(result) else _UNSHARED)
+                    results[key] = (result, False)
+
+            # Lider sonucu paylaşılamayan anahtarlar bir sonraki turda yeniden denenir
+            remaining_keys = []
+            for key, future in waiting.items():
+                logger.debug(f"Devam eden hesaplama bekleniyor: {key}")
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    result = future.result(remaining)
+                except FutureTimeoutError:
+                    continue
+                if result is _UNSHARED:
+                    remaining_keys.append(key)
+                else:
+                    results[key] = (result, True)
+        return results
+
+    def _release(self, key: Hashable) -> None:
+        # Sonuç bildirilmeden önce kaldırılır; uyanan bekleyenler yeni hesaplama başlatabilir
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        """Devam eden hesaplama sayısı."""
+        with self._lock:
+            return len(self._calls)
+
+
+class FileLocks:
+    """
+    Süreçler arası anahtar kilitleri.
+
+    Anahtarlar sabit sayıda kilit dosyasına hash'lenir; dosya sayısı anahtar
+    sayısıyla büyümez (nadiren iki farklı anahtar aynı kilidi paylaşır).
+
+    Args:
+        directory: Kilit dosyalarının dizini
+        buckets: Kilit dosyası sayısı
+        timeout: Kilit için en fazla bekleme süresi (saniye); aşılırsa kilitsiz devam edilir
+    """
+
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, directory: str, buckets: int = 1024, timeout: float = 300.0):
+        self.directory = directory
+        self.buckets = buckets
+        self.timeout = timeout
+
+    @contextmanager
+    def hold(self, key: str, timeout: Optional[float] = None) -> Iterator[bool]:
+        """
+        Anahtarın kilidini tutar.
+
+        Args:
+            key: Kilit anahtarı
+            timeout: Bu çağrı için bekleme üst sınırı (örn. istek süre bütçesinin
+                kalanı); sınıfın timeout değerinden büyükse yok sayılır
+
+        Yields:
+            Kilit alındıysa True (zaman aşımı veya desteklenmeyen platformda False)
+        """
+        if fcntl is None:
+            yield False
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        bucket = zlib.crc32(key.encode('utf-8')) % self.buckets
+        path = os.path.join(self.directory, f"{bucket:04d}.lock")
+
+        limit = self.timeout if timeout is None else min(self.timeout, timeout)
+        with open(path, 'a') as handle:
+            acquired = self._acquire(handle, limit)
+            if not acquired:
+                logger.warning(f"Kilit zaman aşımı, kilitsiz devam ediliyor: {key}")
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _acquire(self, handle, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(self.POLL_INTERVAL)
+
+
+# Süreç genelinde paylaşılan single-flight grubu ve süreçler arası kilitler
+SINGLE_FLIGHT = SingleFlight()
+FILE_LOCKS = FileLocks(
+    os.path.join(CACHE_DIR, 'locks'),
+    timeout=float(os.environ.get('SINGLE_FLIGHT_LOCK_TIMEOUT', 300))
+)
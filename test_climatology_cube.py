@@ -0,0 +1,42 @@
+"""
+Klimatoloji küpü yayınlama testleri (pytest)
+"""
+
+import json
+import os
+
+import numpy as np
+
+from climatology_cube import ClimatologyCubes, cube_meta_path, new_cube_data_path, publish_cube
+
+
+def write_cube(directory, value: float) -> dict:
+    data_path = new_cube_data_path('test', 'sst_high', str(directory))
+    np.save(data_path, np.full((366, 2, 2, 3), value, dtype=np.float32))
+    meta = {'event': 'sst_high', 'harmonic': False, 'n_years': 3, 'row_start': 10, 'col_start': 20,
+            'data_file': os.path.basename(data_path)}
+    publish_cube('test', 'sst_high', meta, str(directory))
+    return meta
+
+
+def test_republish_swaps_data_and_meta_together(tmp_path):
+    cubes = ClimatologyCubes(str(tmp_path))
+    cubes.RESCAN_INTERVAL = 0
+    first = write_cube(tmp_path, 1.0)
+    assert cubes.series('sst_high', 10, 20, 196).tolist() == [1.0] * 3
+
+    second = write_cube(tmp_path, 2.0)
+    assert cubes.series('sst_high', 10, 20, 196).tolist() == [2.0] * 3
+
+    # Önceki veri dosyası silinir, yalnızca yayındaki küp kalır
+    assert not os.path.exists(tmp_path / first['data_file'])
+    assert sorted(os.listdir(tmp_path)) == sorted([second['data_file'], 'test_sst_high.json'])
+
+
+def test_legacy_cube_without_data_file(tmp_path):
+    np.save(tmp_path / 'test_sst_high.npy', np.full((366, 2, 2, 3), 5.0, dtype=np.float32))
+    meta = {'event': 'sst_high', 'harmonic': False, 'n_years': 3, 'row_start': 10, 'col_start': 20}
+    with open(cube_meta_path('test', 'sst_high', str(tmp_path)), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    assert ClimatologyCubes(str(tmp_path)).series('sst_high', 11, 21, 1).tolist() == [5.0] * 3
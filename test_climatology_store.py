@@ -0,0 +1,37 @@
+"""
+ClimatologyStore bölge yenileme testleri (pytest)
+"""
+
+import numpy as np
+import pytest
+
+from climatology_store import ClimatologyStore
+
+
+def region_records(rows, cols, value):
+    return [(row, col, 196, np.full(3, value)) for row in rows for col in cols]
+
+
+def test_replace_region_keeps_overlapping_region(tmp_path):
+    store = ClimatologyStore(str(tmp_path / 'climatology.sqlite'))
+    store.replace_region('sst_high', (0, 9), (0, 9), region_records(range(10), range(10), 1.0))
+
+    # Küçük bölge yeniden oluşturulur: büyük bölgenin aralık dışındaki kayıtları kalır
+    store.replace_region('sst_high', (2, 4), (2, 4), region_records(range(2, 5), range(2, 5), 2.0))
+
+    assert store.get('sst_high', 0, 0, 196)[0] == 1.0
+    assert store.get('sst_high', 3, 3, 196)[0] == 2.0
+
+
+def test_failed_replace_leaves_store_unchanged(tmp_path):
+    store = ClimatologyStore(str(tmp_path / 'climatology.sqlite'))
+    store.replace_region('sst_high', (0, 1), (0, 1), region_records(range(2), range(2), 1.0))
+
+    def broken():
+        yield from region_records(range(2), range(1), 2.0)
+        raise RuntimeError("okuma hatası")
+
+    with pytest.raises(RuntimeError):
+        store.replace_region('sst_high', (0, 1), (0, 1), broken())
+
+    assert [store.get('sst_high', row, col, 196)[0] for row in range(2) for col in range(2)] == [1.0] * 4
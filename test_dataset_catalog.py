@@ -0,0 +1,43 @@
+"""
+DatasetCatalog kayıt doğrulama testleri (pytest)
+"""
+
+import numpy as np
+import xarray as xr
+
+from dataset_catalog import DatasetCatalog
+
+
+def write_grid(path, lat_first: float) -> str:
+    lats = lat_first + 0.25 * np.arange(8)
+    lons = 25.125 + 0.25 * np.arange(12)
+    ds = xr.Dataset({'sst': (('lat', 'lon'), np.zeros((8, 12), dtype='f4'))},
+                    coords={'lat': lats, 'lon': lons})
+    ds.to_netcdf(path, engine='netcdf4')
+    return str(path)
+
+
+def test_shifted_grid_rebuilds_record(tmp_path):
+    catalog = DatasetCatalog(str(tmp_path / 'catalog'))
+    first = write_grid(tmp_path / 'a.nc', 35.125)
+    shifted = write_grid(tmp_path / 'b.nc', 35.625)
+
+    with catalog.open('template', first, ['sst']) as ds:
+        assert float(ds['lat'][0]) == 35.125
+    assert catalog.get('template').bounds['lat'] == [35.125, 36.875]
+
+    # Aynı boyutlu ama kaymış grid: kayıt koordinatları kullanılmaz, kayıt yenilenir
+    with catalog.open('template', shifted, ['sst']) as ds:
+        assert float(ds['lat'][0]) == 35.625
+    assert catalog.get('template').bounds['lat'] == [35.625, 37.375]
+
+
+def test_matching_grid_uses_record(tmp_path):
+    catalog = DatasetCatalog(str(tmp_path / 'catalog'))
+    path = write_grid(tmp_path / 'a.nc', 35.125)
+    catalog.open('template', path, ['sst']).close()
+
+    # Yeni süreç: kayıt diskten okunur ve dosyayla uyuştuğu için kullanılır
+    reopened = DatasetCatalog(str(tmp_path / 'catalog'))
+    with reopened.open('template', path, ['sst']) as ds:
+        np.testing.assert_array_equal(ds['lon'].values, 25.125 + 0.25 * np.arange(12))
@@ -0,0 +1,35 @@
+"""
+snap_to_grid hücre sınırı yuvarlama testleri (pytest)
+"""
+
+import pytest
+
+from calculate_ocean_probabilities import DATASET_CONFIG, snap_to_grid
+
+
+@pytest.mark.parametrize('event', ['sst_high', 'wind_high'])
+def test_cell_boundary_rounds_up(event):
+    grid = DATASET_CONFIG[event]['grid']
+    resolution = grid['resolution']
+    lat_first = grid['lat_range'][0]
+
+    # İki hücrenin tam ortasındaki enlemler her zaman üst hücreye düşer
+    rows = [snap_to_grid(event, lat_first + resolution * (k + 0.5), 10.0).row for k in range(4)]
+    assert rows == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize('event', ['sst_high', 'wind_high'])
+def test_lon_cell_boundary_rounds_up(event):
+    grid = DATASET_CONFIG[event]['grid']
+    resolution = grid['resolution']
+    lon_first = grid['lon_range'][0]
+
+    cols = [snap_to_grid(event, 0.0, lon_first + resolution * (k + 0.5)).col for k in range(4)]
+    assert cols == [1, 2, 3, 4]
+
+
+def test_swath_product_keeps_request_coordinate():
+    # MOD04_L2 swath ürünü: hücre yok, istek koordinatı aynen kullanılır
+    cell = snap_to_grid('fog_low', 40.05, -29.05)
+    assert (cell.row, cell.col) == (None, None)
+    assert (cell.lat, cell.lon, cell.native_lon) == (40.05, -29.05, -29.05)
@@ -0,0 +1,40 @@
+"""
+UpstreamGuard devre kesici testleri (pytest)
+"""
+
+import time
+
+import pytest
+
+from upstream_guard import MissingDataset, UpstreamGuard, UpstreamUnavailable
+
+URL = 'https://thredds.example.org/thredds/dodsC/data_20200715.nc'
+
+
+def open_circuit(guard: UpstreamGuard) -> None:
+    """Art arda sunucu hatalarıyla host'un devresini açar."""
+    for _ in range(guard.failure_threshold):
+        guard.check(URL)
+        guard.failure(URL, OSError("NetCDF: DAP server error"))
+
+
+def test_circuit_opens_after_threshold():
+    guard = UpstreamGuard(failure_threshold=2, reset_seconds=60)
+    open_circuit(guard)
+    with pytest.raises(UpstreamUnavailable):
+        guard.check(URL)
+
+
+def test_not_found_probe_closes_circuit():
+    guard = UpstreamGuard(failure_threshold=2, reset_seconds=0.01)
+    open_circuit(guard)
+    time.sleep(0.02)
+
+    # Deneme isteği 404 alır: URL negatif önbelleğe girer, host sağlıklı sayılır
+    guard.check(URL)
+    guard.failure(URL, OSError("NetCDF: file not found"))
+    assert guard.open_hosts() == {}
+
+    with pytest.raises(MissingDataset):
+        guard.check(URL)
+    guard.check(URL.replace('20200715', '20200716'))
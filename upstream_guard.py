@@ -0,0 +1,167 @@
+"""
+Uzak veri seti URL'leri için negatif önbellek ve host bazlı devre kesici.
+Bulunamayan URL'ler (eksik günlük dosya, 5 günlük ürünün kapsamadığı tarih)
+TTL süresince yeniden denenmez. Art arda hata veren bir THREDDS sunucusunun
+devresi açılır; açık devrede istekler bağlantı beklemeden hemen reddedilir ve
+çağıran kendi yedeğine (sentetik veri, kısmi sonuç) geçer. Devre süre
+dolunca tek bir deneme isteğiyle yeniden sınanır.
+"""
+
+import os
+import time
+import threading
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from memory_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class MissingDataset(FileNotFoundError):
+    """URL yakın zamanda bulunamadı (negatif önbellekte)."""
+
+
+class UpstreamUnavailable(ConnectionError):
+    """Host'un devresi açık; istek uzak sunucuya gönderilmedi."""
+
+
+def is_missing_error(error: BaseException) -> bool:
+    """Hata, URL'nin var olmadığını mı gösteriyor (sunucu arızası değil)?"""
+    if isinstance(error, FileNotFoundError):
+        return True
+    message = str(error).lower()
+    return isinstance(error, OSError) and any(
+        marker in message for marker in ('file not found', 'no such file', '404')
+    )
+
+
+def url_host(url: str) -> str:
+    """URL'nin host'u (yerel dosya yolları için 'local')."""
+    return urlsplit(url).netloc or 'local'
+
+
+class _Circuit:
+    """Tek bir host'un devre durumu."""
+
+    __slots__ = ('failures', 'opened_at', 'probing')
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+
+class UpstreamGuard:
+    """
+    Negatif URL önbelleği ve host bazlı devre kesici.
+
+    Örnek:
+        >>> UPSTREAM_GUARD.check(url)      # bilinen eksik URL veya açık devrede hata fırlatır
+        >>> try:
+        ...     ds = open_dataset(url)
+        ... except Exception as e:
+        ...     UPSTREAM_GUARD.failure(url, e)
+        ...     raise
+        >>> UPSTREAM_GUARD.success(url)
+
+    Args:
+        missing_ttl: Bulunamayan URL'nin yeniden denenmeyeceği süre (saniye)
+        missing_size: Negatif önbellekteki en fazla URL sayısı
+        failure_threshold: Devreyi açan art arda hata sayısı
+        reset_seconds: Açık devrenin deneme isteğine izin vermeden önceki süresi
+    """
+
+    def __init__(self, missing_ttl: float = 21600.0, missing_size: int = 65536,
+                 failure_threshold: int = 5, reset_seconds: float = 60.0):
+        self.missing = LRUCache(max_size=missing_size, ttl=missing_ttl)
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_seconds = float(reset_seconds)
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'UpstreamGuard':
+        """NEGATIVE_CACHE_* ve CIRCUIT_* ortam değişkenlerinden oluşturur."""
+        return cls(
+            missing_ttl=float(os.environ.get('NEGATIVE_CACHE_TTL', 21600)),
+            missing_size=int(os.environ.get('NEGATIVE_CACHE_SIZE', 65536)),
+            failure_threshold=int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5)),
+            reset_seconds=float(os.environ.get('CIRCUIT_RESET_SECONDS', 60))
+        )
+
+    def check(self, url: str) -> None:
+        """
+        URL'ye istek gönderilebilir mi kontrol eder.
+
+        Raises:
+            MissingDataset: URL negatif önbellekte
+            UpstreamUnavailable: Host'un devresi açık (deneme sırası başka istekte)
+        """
+        if url in self.missing:
+            raise MissingDataset(f"URL yakın zamanda bulunamadı: {url}")
+
+        host = url_host(url)
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.opened_at is None:
+                return
+            if circuit.probing or time.monotonic() - circuit.opened_at < self.reset_seconds:
+                raise UpstreamUnavailable(f"{host} devresi açık, istek gönderilmedi")
+            # Süre doldu: bu istek deneme isteği olarak geçer
+            circuit.probing = True
+        logger.info(f"{host} devresi deneme isteğiyle sınanıyor")
+
+    def success(self, url: str) -> None:
+        """Başarılı isteği kaydeder (devreyi kapatır)."""
+        host = url_host(url)
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                return
+            if circuit.opened_at is not None:
+                logger.info(f"{host} devresi kapandı")
+            del self._circuits[host]
+
+    def failure(self, url: str, error: BaseException) -> None:
+        """
+        Başarısız isteği kaydeder.
+
+        Bulunamayan URL'ler negatif önbelleğe alınır ve host hatası sayılmaz;
+        diğer hatalar art arda failure_threshold kez olursa host'un devresini açar.
+        """
+        if isinstance(error, (MissingDataset, UpstreamUnavailable)):
+            return
+        if is_missing_error(error):
+            self.missing.set(url, True)
+            logger.info(f"URL negatif önbelleğe alındı: {url}")
+            # Sunucu yanıt verdi: host için başarılı istek sayılır (deneme isteği dahil)
+            self.success(url)
+            return
+
+        host = url_host(url)
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _Circuit())
+            circuit.failures += 1
+            reopen = circuit.probing
+            circuit.probing = False
+            if reopen or (circuit.opened_at is None and circuit.failures >= self.failure_threshold):
+                circuit.opened_at = time.monotonic()
+                logger.warning(f"{host} devresi açıldı ({circuit.failures} art arda hata): {error}")
+
+    def open_hosts(self) -> Dict[str, int]:
+        """Devresi açık host'lar ve art arda hata sayıları."""
+        with self._lock:
+            return {host: circuit.failures for host, circuit in self._circuits.items()
+                    if circuit.opened_at is not None}
+
+    def reset(self) -> None:
+        """Tüm devreleri kapatır ve negatif önbelleği temizler."""
+        with self._lock:
+            self._circuits.clear()
+        self.missing.clear()
+
+
+# Süreç genelinde paylaşılan koruma
+UPSTREAM_GUARD = UpstreamGuard.from_env()